@@ -4,6 +4,17 @@ from pathlib import Path
 import pytest
 
 from yamu.library.library import Library
+from yamu.util import ratelimit
+from yamu.util.cache import close_caches
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path: Path, monkeypatch) -> Path:
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
+    yield cache
+    close_caches()
+    ratelimit.reset()
 
 
 @pytest.fixture()
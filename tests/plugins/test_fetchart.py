@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from yamu.util import http_client
+from yamu.util.cache import KeyValueCache
 from yamuplug import fetchart
 
 
@@ -14,7 +16,7 @@ def test_steam_appid_from_path() -> None:
 def test_fetch_art_for_game(library, tmp_path, monkeypatch) -> None:
     game = library.add_game({"title": "Game A", "path": "steam://123"})
 
-    def fake_fetch(_appid, dest: Path) -> None:
+    def fake_fetch(_appid, dest: Path, cache=None) -> None:
         dest.write_bytes(b"art")
 
     monkeypatch.setattr(fetchart, "fetch_steam_art", fake_fetch)
@@ -26,3 +28,24 @@ def test_fetch_art_for_game(library, tmp_path, monkeypatch) -> None:
     updated = library.get_game(game.id)
     assert updated is not None
     assert updated.artpath == artpath
+
+
+def test_fetch_steam_art_revalidates_existing_file(tmp_path, monkeypatch) -> None:
+    sent: list[dict] = []
+
+    def fake_get(url, headers=None):
+        sent.append(dict(headers or {}))
+        if headers:
+            return http_client.Response(304, url, b"", {"etag": '"a"'})
+        return http_client.Response(200, url, b"art", {"etag": '"a"'})
+
+    monkeypatch.setattr(fetchart.http_client, "get", fake_get)
+    cache = KeyValueCache(tmp_path / "cache.db")
+    dest = tmp_path / "art" / "steam-1.jpg"
+
+    fetchart.fetch_steam_art("1", dest, cache=cache)
+    fetchart.fetch_steam_art("1", dest, cache=cache)
+
+    assert sent == [{}, {"If-None-Match": '"a"'}]
+    assert dest.read_bytes() == b"art"
+    cache.close()
@@ -1,5 +1,12 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from yamu.importer.pipeline import ImportTask
+from yamu.ui.commands import import_ as import_cmd
 from yamuplug import igdb
 
 
@@ -54,23 +61,110 @@ def test_search_returns_candidates(monkeypatch) -> None:
 def test_fetch_igdb_games_escapes_search_term(monkeypatch) -> None:
     captured: dict[str, str] = {}
 
-    class FakeResponse:
-        def __enter__(self):
-            return self
+    def fake_post_json(url, data=None, headers=None):
+        assert url == igdb.IGDB_GAMES_URL
+        assert headers["Client-ID"] == "client"
+        captured["query"] = data
+        return []
+
+    monkeypatch.setattr(igdb, "get_igdb_token", lambda _config: "token")
+    monkeypatch.setattr(igdb.http_client, "post_json", fake_post_json)
+
+    assert igdb.fetch_igdb_games('Alpha"Beta', {"igdb": {"client_id": "client"}}) == []
+    assert 'search "Alpha\\"Beta";' in captured["query"]
 
-        def __exit__(self, exc_type, exc, tb) -> None:
-            return None
 
-        def read(self) -> bytes:
-            return b"[]"
+def test_fetch_igdb_games_many_splits_results(monkeypatch) -> None:
+    captured: dict[str, str] = {}
 
-    def fake_urlopen(request, timeout=30):
-        assert timeout == 30
-        captured["query"] = request.data.decode("utf-8")
-        return FakeResponse()
+    def fake_post_json(url, data=None, headers=None):
+        assert url == igdb.IGDB_MULTIQUERY_URL
+        captured["body"] = data
+        return [
+            {"name": "1", "result": [{"name": "Quake"}]},
+            {"name": "0", "result": [{"name": "Doom"}]},
+        ]
 
     monkeypatch.setattr(igdb, "get_igdb_token", lambda _config: "token")
-    monkeypatch.setattr(igdb.urllib.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(igdb.http_client, "post_json", fake_post_json)
 
-    assert igdb.fetch_igdb_games('Alpha"Beta', {"igdb": {"client_id": "client"}}) == []
-    assert 'search "Alpha\\"Beta";' in captured["query"]
+    results = igdb.fetch_igdb_games_many([("Doom", 5), ("Quake", 2), ("None", 1)], {})
+
+    assert results == [[{"name": "Doom"}], [{"name": "Quake"}], []]
+    assert captured["body"].count("query games") == 3
+    assert 'query games "1" { search "Quake";' in captured["body"]
+
+
+def test_search_batcher_groups_concurrent_searches(monkeypatch) -> None:
+    calls: list[list[str]] = []
+
+    def fake_many(searches, _config):
+        calls.append([term for term, _ in searches])
+        if "Broken" in calls[-1]:
+            raise igdb.IgdbError("HTTP 500")
+        return [[{"name": term}] for term, _ in searches]
+
+    monkeypatch.setattr(igdb, "fetch_igdb_games_many", fake_many)
+    monkeypatch.setattr(
+        igdb,
+        "fetch_igdb_games",
+        lambda term, config, limit=5: fake_many([(term, limit)], config)[0],
+    )
+    batcher = igdb.SearchBatcher({}, size=4, linger=0.1)
+    terms = [f"Game {idx}" for idx in range(6)]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(batcher.search, terms))
+
+    assert results == [[{"name": term}] for term in terms]
+    assert sorted(len(batch) for batch in calls) == [2, 4]
+
+    with pytest.raises(igdb.IgdbError):
+        batcher.search("Broken")
+    assert calls[-1] == ["Broken"]
+
+
+class ListProvider:
+    name = "list"
+
+    def tasks(self, _config):
+        for idx in range(8):
+            yield ImportTask(original={"title": f"Game {idx}", "path": f"l://{idx}"})
+
+
+def test_import_batches_more_searches_than_threads(library, monkeypatch) -> None:
+    calls: list[list[str]] = []
+
+    def fake_many(searches, _config):
+        calls.append([term for term, _ in searches])
+        return [[] for _ in searches]
+
+    monkeypatch.setattr(igdb, "fetch_igdb_games_many", fake_many)
+    monkeypatch.setattr(igdb, "fetch_igdb_games", lambda *_args, **_kwargs: [])
+    config = {
+        "plugins": ["list", "igdb"],
+        "import": {"threads": 2},
+        "igdb": {
+            "batch_size": 4,
+            "batch_linger": 0.2,
+            "search_cache_ttl": 0,
+            "search_negative_ttl": 0,
+        },
+    }
+    providers = [ListProvider(), igdb.IgdbImportProvider()]
+    monkeypatch.setattr(import_cmd, "import_providers", lambda: providers)
+    monkeypatch.setattr(import_cmd, "load_config", lambda: config)
+    monkeypatch.setattr(import_cmd, "load_plugins", lambda *_args, **_kwargs: None)
+    args = SimpleNamespace(
+        threads=None,
+        force=False,
+        query=[],
+        quiet=True,
+        auto_accept=None,
+        defer=False,
+        review=False,
+        record=None,
+        decisions=None,
+    )
+
+    assert import_cmd.run(args, library) == 0
+    assert max(len(batch) for batch in calls) > 2
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import pytest
+
 from yamuplug import steam
 
 
@@ -21,14 +23,14 @@ def test_extract_release_date_alt_format() -> None:
 
 
 def test_steam_ids() -> None:
-    assert steam._steam_ids({"steam": {"steam_ids": "123"}}) == ["123"]
-    assert steam._steam_ids({"steam": {"steam_ids": ["1", "2"]}}) == ["1", "2"]
+    assert steam.get_steam_ids({"steam": {"steam_ids": "123"}}) == ["123"]
+    assert steam.get_steam_ids({"steam": {"steam_ids": ["1", "2"]}}) == ["1", "2"]
 
 
 def test_tasks_return_minimal_fields(monkeypatch) -> None:
     provider = steam.SteamImportProvider()
 
-    def fake_owned(_steam_id, _key):
+    def fake_owned(_steam_id, _key, cache=None):
         return [
             {"appid": 1, "name": "Game A"},
             {"appid": 2, "name": "Game B"},
@@ -80,3 +82,101 @@ def test_search_uses_appid(monkeypatch) -> None:
     assert fields["genre"] == "Action"
     assert fields["release_date"] == "2006-11-29"
     assert fields["achievements"] == [{"name": "Achieve", "achieved": 1}]
+
+
+def test_app_details_are_cached_per_key(monkeypatch) -> None:
+    calls: list[str] = []
+
+    def fake_get_json(url, params=None, **kwargs):
+        appid = params["appids"]
+        calls.append(appid)
+        if appid == "2":
+            return {"2": {"success": False}}
+        return {"1": {"success": True, "data": {"name": "A"}}}
+
+    monkeypatch.setattr(steam.http_client, "get_json", fake_get_json)
+    cache = steam.open_steam_cache({"steam": {"cache_ttl": 60}})
+
+    for _ in range(2):
+        assert steam.fetch_app_details("1", cache=cache, ttl=60) == {"name": "A"}
+        assert steam.fetch_app_details("2", cache=cache, ttl=60, negative_ttl=60) == {}
+
+    assert calls == ["1", "2"]
+
+
+def test_search_refreshes_only_games_played_since_last_sync(monkeypatch) -> None:
+    provider = steam.SteamImportProvider()
+    owned = [
+        {
+            "appid": 1,
+            "name": "A",
+            "playtime_forever": 10,
+            "has_community_visible_stats": True,
+        },
+        {"appid": 2, "name": "B", "playtime_forever": 5},
+    ]
+    fetched: list[str] = []
+    details: list[str] = []
+
+    def fake_achievements(_steam_id, _api_key, appid, **_kwargs):
+        fetched.append(appid)
+        return [{"api_name": "WIN", "achieved": 1}]
+
+    def fake_details(appid, **_kwargs):
+        details.append(appid)
+        return {}
+
+    monkeypatch.setattr(steam, "fetch_owned_games", lambda *_args, **_kwargs: owned)
+    monkeypatch.setattr(steam, "fetch_game_achievements", fake_achievements)
+    monkeypatch.setattr(steam, "fetch_app_details", fake_details)
+    config = {"steam": {"steam_ids": ["1"], "api_key": "x", "fetch_details": True}}
+    synced: dict[str, str] = {}
+
+    def sync() -> list[list]:
+        results = []
+        for task in provider.tasks(config):
+            path = task.original["path"]
+            stored = {"achievements_synced": synced.get(path)}
+            game = type("G", (), {**task.original, **stored})()
+            for candidate in provider.search(game, config):
+                results.append(candidate.fields["achievements"])
+                synced[path] = candidate.fields["achievements_synced"]
+        return results
+
+    assert sync() == [[{"api_name": "WIN", "achieved": 1}], []]
+    assert sync() == []
+    assert fetched == ["1"]
+    assert details == ["1", "2"]
+
+    owned[0]["rtime_last_played"] = 1700000000
+    assert sync() == [[{"api_name": "WIN", "achieved": 1}]]
+    assert fetched == ["1", "1"]
+    assert details == ["1", "2", "1"]
+
+
+def test_import_achievements_keeps_rows_fetched_before_an_interrupt(
+    library, monkeypatch
+) -> None:
+    games = [
+        library.add_game({"title": f"Game {appid}", "path": f"steam://{appid}"})
+        for appid in ("1", "2", "3")
+    ]
+
+    def fake_achievements(_steam_id, _api_key, appid, **_kwargs):
+        if appid == "2":
+            raise RuntimeError("bad payload")
+        if appid == "3":
+            raise KeyboardInterrupt
+        return [{"api_name": "WIN", "achieved": 1}]
+
+    monkeypatch.setattr(steam, "fetch_game_achievements", fake_achievements)
+    config = {"steam": {"incremental": False}}
+
+    with pytest.raises(KeyboardInterrupt):
+        steam.import_achievements(library, "9", "x", games, config, workers=1)
+    assert len(library.list_achievements(games[0].id)) == 1
+
+    games[2].source = "other"
+    report = steam.import_achievements(library, "9", "x", games, config)
+    assert report.errors == [("Game 2", "bad payload")]
+    assert (report.games, report.updated) == (2, 1)
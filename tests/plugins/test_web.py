@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import time
+from types import SimpleNamespace
+
+from yamu.dbcore.db import QueryInterrupted
 from yamuplug import web
 
 
@@ -14,3 +18,52 @@ def test_resolve_static_path_blocks_traversal() -> None:
 
     assert web._resolve_static_path("yamu.css") == static_root / "yamu.css"
     assert web._resolve_static_path("../../README.md") is None
+
+
+def _get(library, path: str, monkeypatch) -> tuple[int, dict]:
+    sent: list[tuple[int, dict]] = []
+    handler = web.WebHandler.__new__(web.WebHandler)
+    handler.server = SimpleNamespace(library=library, query_timeout=5, query_steps=0)
+    handler.path = path
+    monkeypatch.setattr(
+        handler, "_send_json", lambda code, payload: sent.append((code, payload))
+    )
+    handler.do_GET()
+    return sent[0]
+
+
+def test_api_games_reports_interrupted_queries(library, monkeypatch) -> None:
+    library.add_game({"title": "Game A"})
+    code, payload = _get(library, "/api/games?q=Game", monkeypatch)
+    assert code == 200
+    assert payload["games"][0]["title"] == "Game A"
+
+    def interrupted(_query=None):
+        raise QueryInterrupted("Query exceeded its time budget")
+
+    monkeypatch.setattr(library, "list_games", interrupted)
+    code, payload = _get(library, "/api/games?q=Game", monkeypatch)
+    assert code == 400
+    assert payload == {"error": "Query exceeded its time budget"}
+
+
+def test_api_games_rejects_backtracking_regexes(library, monkeypatch) -> None:
+    library.add_game({"title": "a" * 28})
+    for query in ("title::(a|aa)*b", ":(.|.)*x"):
+        start = time.monotonic()
+        code, payload = _get(library, f"/api/games?q={query}", monkeypatch)
+        assert code == 400
+        assert "too expensive" in payload["error"]
+        assert time.monotonic() - start < 1
+
+
+def test_api_pending_lists_deferred_imports(library, monkeypatch) -> None:
+    library.add_pending_import(
+        {"title": "Game A", "path": "x://1"},
+        [{"source": "base", "fields": {"title": "Game A"}}],
+    )
+
+    code, payload = _get(library, "/api/pending", monkeypatch)
+
+    assert code == 200
+    assert [entry["path"] for entry in payload["pending"]] == ["x://1"]
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from yamu.util.cache import MISSING, cached_search, open_cache
+
+
+def test_cached_search_reuses_results_across_queries() -> None:
+    calls: list[str] = []
+
+    def fetch():
+        calls.append("fetch")
+        return [{"id": 1}]
+
+    assert cached_search("igdb", "Half-Life 2", fetch, {}) == [{"id": 1}]
+    assert cached_search("igdb", "half life 2", fetch, {}) == [{"id": 1}]
+    assert cached_search("igdb", "Half-Life 2", fetch, {}, params={"limit": 2})
+    assert len(calls) == 2
+
+
+def test_cached_search_honours_negative_ttl() -> None:
+    calls: list[str] = []
+
+    def fetch():
+        calls.append("fetch")
+        return []
+
+    config = {"steam": {"search_negative_ttl": 0}}
+    assert cached_search("steam", "Nothing", fetch, config) == []
+    assert cached_search("steam", "Nothing", fetch, config) == []
+    assert len(calls) == 2
+    assert cached_search("steam", "Nothing", fetch, {}) == []
+    assert cached_search("steam", "Nothing", fetch, {}) == []
+    assert len(calls) == 3
+
+
+def test_key_value_cache_expires_entries() -> None:
+    cache = open_cache()
+    cache.set("ns", "fresh", {"a": 1}, ttl=60)
+    cache.set("ns", "stale", {"a": 2}, ttl=60)
+    cache.conn.execute("UPDATE entries SET expires = 0 WHERE key = 'stale'")
+
+    assert cache.get("ns", "fresh") == {"a": 1}
+    assert cache.get("ns", "stale", MISSING) is MISSING
+    assert cache.purge() == 1
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from yamu.dbcore.db import Database, DatabaseChanged, QueryInterrupted
+from yamu.library.library import Library
+from yamu.util.query import build_game_query
+
+
+def test_readonly_library_rejects_writes(tmp_path: Path) -> None:
+    db_path = tmp_path / "library.db"
+    Library(str(db_path)).close()
+    lib = Library(str(db_path), mode="ro")
+    try:
+        assert lib.list_games() == []
+        with pytest.raises(sqlite3.OperationalError):
+            lib.add_game({"title": "Game A"})
+    finally:
+        lib.close()
+
+
+def test_snapshot_refreshes_when_source_changes(tmp_path: Path) -> None:
+    db_path = tmp_path / "library.db"
+    writer = Library(str(db_path))
+    reader = Library(str(db_path), mode="snapshot")
+    try:
+        writer.add_game({"title": "Game A"})
+        assert reader.list_games() == []
+
+        with reader.db.read():
+            titles = [game.title for game in reader.list_games()]
+        assert titles == ["Game A"]
+        assert reader.db.refresh() is False
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_unknown_mode(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        Database(str(tmp_path / "library.db"), mode="nope")
+
+
+def test_backup_copies_live_library(tmp_path: Path) -> None:
+    lib = Library(str(tmp_path / "library.db"))
+    try:
+        lib.add_game({"title": "Game A"})
+        dest = tmp_path / "backup" / "library.db"
+        steps: list[int] = []
+        lib.db.backup(str(dest), pages=1, sleep=0, progress=lambda *a: steps.append(1))
+        assert steps
+        assert not dest.with_name("library.db.tmp").exists()
+    finally:
+        lib.close()
+    copy = Library(str(dest))
+    try:
+        assert [game.title for game in copy.list_games()] == ["Game A"]
+    finally:
+        copy.close()
+
+
+def test_optimize_enables_incremental_vacuum(library) -> None:
+    for idx in range(50):
+        library.add_game({"title": f"Game {idx}"})
+    for game in library.list_games():
+        library.remove_game(game.id)
+
+    stats = library.db.optimize()
+
+    assert stats["size_before"] > 0
+    assert stats["size_after"] > 0
+    assert library.db.query("PRAGMA auto_vacuum")[0][0] == 2
+    assert library.db.optimize()["seconds"] >= 0
+
+
+def test_memory_mode_writes_back_on_close(tmp_path: Path) -> None:
+    db_path = tmp_path / "library.db"
+    Library(str(db_path)).close()
+    lib = Library(str(db_path), mode="memory")
+    lib.add_game({"title": "Game A"})
+
+    on_disk = Library(str(db_path), mode="ro")
+    try:
+        assert on_disk.list_games() == []
+    finally:
+        on_disk.close()
+
+    lib.close()
+    reopened = Library(str(db_path))
+    try:
+        assert [game.title for game in reopened.list_games()] == ["Game A"]
+    finally:
+        reopened.close()
+
+
+def test_memory_mode_writes_back_schema_changes_and_optimize(tmp_path: Path) -> None:
+    db_path = tmp_path / "library.db"
+    Library(str(db_path)).close()
+    lib = Library(str(db_path), mode="memory")
+    try:
+        lib.db.execute("CREATE TABLE extra (x)")
+        assert lib.db.checkpoint() is True
+        assert lib.db.checkpoint() is False
+        lib.db.optimize()
+        assert lib.db.checkpoint() is True
+        lib.db.optimize()
+        assert lib.db.checkpoint() is True
+    finally:
+        lib.close()
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+@pytest.mark.parametrize("mode", ["ro", "snapshot"])
+def test_readers_reopen_after_memory_write_back(tmp_path: Path, mode: str) -> None:
+    db_path = tmp_path / "library.db"
+    Library(str(db_path)).close()
+    reader = Library(str(db_path), mode=mode)
+    try:
+        with reader.db.read():
+            assert reader.list_games() == []
+        writer = Library(str(db_path), mode="memory")
+        writer.add_game({"title": "Game A"})
+        writer.close()
+
+        with reader.db.read():
+            assert [game.title for game in reader.list_games()] == ["Game A"]
+            query, _ = build_game_query(["~game"])
+            assert len(reader.list_games(query)) == 1
+    finally:
+        reader.close()
+
+
+def test_memory_mode_checkpoints_on_interval(tmp_path: Path) -> None:
+    db_path = tmp_path / "library.db"
+    lib = Library(str(db_path), mode="memory", checkpoint_interval=1e-9)
+    try:
+        lib.add_game({"title": "Game A"})
+        assert lib.db.checkpoint() is False
+        on_disk = Library(str(db_path), mode="ro")
+        try:
+            assert len(on_disk.list_games()) == 1
+        finally:
+            on_disk.close()
+    finally:
+        lib.close()
+
+
+def test_memory_mode_refuses_to_overwrite_concurrent_writes(tmp_path: Path) -> None:
+    db_path = tmp_path / "library.db"
+    Library(str(db_path)).close()
+    lib = Library(str(db_path), mode="memory")
+    lib.add_game({"title": "Game A"})
+
+    other = Library(str(db_path))
+    try:
+        other.add_game({"title": "Game B"})
+    finally:
+        other.close()
+
+    with pytest.raises(DatabaseChanged):
+        lib.close()
+    reopened = Library(str(db_path))
+    try:
+        assert [game.title for game in reopened.list_games()] == ["Game B"]
+    finally:
+        reopened.close()
+    unsaved = Library(str(tmp_path / "library.db.unsaved"))
+    try:
+        assert [game.title for game in unsaved.list_games()] == ["Game A"]
+    finally:
+        unsaved.close()
+
+
+def test_budget_interrupts_long_queries(library) -> None:
+    for idx in range(20):
+        library.add_game({"title": f"Game {idx}"})
+    sql = """
+        WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n)
+        SELECT count(*) FROM n, games WHERE regexp(title, 'Game')
+    """
+    with pytest.raises(QueryInterrupted):
+        with library.db.budget(seconds=0.05):
+            library.db.query(sql)
+    with pytest.raises(QueryInterrupted):
+        with library.db.budget(steps=10_000):
+            library.db.query(sql)
+
+    assert len(library.list_games()) == 20
+    with library.db.budget(seconds=5):
+        assert len(library.list_games()) == 20
+
+
+def test_budget_interrupts_regex_calls_past_the_deadline(library) -> None:
+    for idx in range(3):
+        library.add_game({"title": f"Game {idx}"})
+    with pytest.raises(QueryInterrupted):
+        with library.db.budget(seconds=0.01):
+            time.sleep(0.02)
+            library.db.query("SELECT id FROM games WHERE regexp(title, 'Game')")
+
+    with library.db.budget(seconds=5):
+        rows = library.db.query("SELECT id FROM games WHERE regexp(title, 'Game')")
+    assert len(rows) == 3
+
+
+def test_instrumented_database_logs_slow_queries(library, caplog) -> None:
+    library.db.instrument(slow_query_ms=1e-9)
+    library.add_game({"title": "Game A"})
+    library.db.query("SELECT * FROM games WHERE title_norm = ?", ["game a"])
+
+    assert "SELECT * FROM games WHERE title_norm = ?" in library.db.stats
+    assert any("games_title_norm" in record.message for record in caplog.records)
+    assert any(
+        "SELECT * FROM games WHERE title_norm" in line
+        for line in library.db.format_stats()
+    )
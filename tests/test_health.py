@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from yamu.importer.health import (
+    AdaptiveLimit,
+    CircuitBreaker,
+    ProviderHealth,
+    ProviderUnavailable,
+    is_overload,
+)
+from yamu.util.http_client import HttpError
+
+
+def test_is_overload_follows_wrapped_errors() -> None:
+    try:
+        try:
+            raise HttpError("slow down", 429)
+        except HttpError as exc:
+            raise RuntimeError("search failed") from exc
+    except RuntimeError as exc:
+        assert is_overload(exc)
+    assert is_overload(HttpError("down", 503))
+    assert is_overload(HttpError("network"))
+    assert not is_overload(HttpError("missing", 404))
+    assert not is_overload(ValueError("bad payload"))
+
+
+def test_adaptive_limit_halves_once_per_window_and_recovers() -> None:
+    limit = AdaptiveLimit(8)
+    starts = [limit.acquire() for _ in range(4)]
+    for started in starts:
+        limit.release(started, overloaded=True)
+    assert limit.limit == 4
+
+    started = limit.acquire()
+    limit.release(started, overloaded=True)
+    assert limit.limit == 2
+
+    for _ in range(20):
+        limit.release(limit.acquire())
+    assert 2 < limit.limit <= 8
+
+
+def test_circuit_breaker_opens_and_probes_after_cooldown() -> None:
+    breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+    assert not breaker.failure()
+    assert breaker.failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed"
+
+
+def test_provider_health_fails_fast_and_counts(capsys) -> None:
+    health = ProviderHealth("steam", 2, threshold=2, cooldown=60)
+
+    def failing():
+        raise HttpError("HTTP 429", 429)
+
+    for _ in range(2):
+        with pytest.raises(HttpError):
+            health.call(failing)
+    with pytest.raises(ProviderUnavailable):
+        health.call(failing)
+
+    assert "steam is failing" in capsys.readouterr().out
+    assert health.stats.calls == 2
+    assert health.stats.errors == 2
+    assert health.stats.rejected == 1
+    assert health.limit.limit == 1
+    assert "1 skipped while unavailable" in health.stats.summary()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Iterable
 
+from yamu.importer.decisions import DecisionRecorder, load_decisions
 from yamu.importer.pipeline import (
     ImportCandidate,
     Importer,
@@ -9,6 +11,8 @@ from yamu.importer.pipeline import (
     _candidate_similarity,
     _sort_candidates,
 )
+from yamu.importer.similarity import SimilarityScorer
+from yamu.library.library import Library
 
 
 class StaticProvider:
@@ -270,3 +274,314 @@ def test_prompt_shows_similarity_for_candidates(library, capsys, monkeypatch) ->
     assert selected == 0
     output = capsys.readouterr().out
     assert "100.0%" in output
+
+
+def test_prompt_warns_about_same_title_under_other_path(
+    library, capsys, monkeypatch
+) -> None:
+    library.add_game({"title": "Portal", "path": "gog://portal"})
+    importer = Importer(library, threads=1)
+    task = ImportTask(original={"title": "Portal", "path": "steam://400"})
+    monkeypatch.setattr(
+        "yamu.importer.pipeline.input_options", lambda *args, **kwargs: "s"
+    )
+
+    importer._prompt(task, [ImportCandidate(fields=task.original)])
+
+    assert "Already in library as 1: Portal (gog://portal)" in capsys.readouterr().out
+
+
+def test_importer_consumes_task_source_lazily(library, monkeypatch) -> None:
+    produced: list[int] = []
+
+    def source():
+        for idx in range(1000):
+            produced.append(idx)
+            yield ImportTask(original={"title": f"Game {idx}", "path": f"x://{idx}"})
+
+    importer = Importer(library, provider=StaticProvider([]), threads=2, prefetch=2)
+    monkeypatch.setattr(
+        "yamu.importer.pipeline.input_options", lambda *args, **kwargs: "q"
+    )
+
+    completed, updated = importer.run(source())
+
+    assert (completed, updated) == (0, 0)
+    assert len(produced) < 20
+
+
+def test_async_engine_runs_lookups_concurrently(library, monkeypatch) -> None:
+    in_flight = 0
+    peak = 0
+
+    class SlowAsyncProvider:
+        async def acandidates(self, task: ImportTask):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return [ImportCandidate(fields=task.original)]
+
+    tasks = [
+        ImportTask(original={"title": f"Game {idx}", "path": f"x://{idx}"})
+        for idx in range(50)
+    ]
+    importer = Importer(
+        library,
+        provider=SlowAsyncProvider(),
+        prefetch=50,
+        engine="async",
+        concurrency=50,
+    )
+    monkeypatch.setattr(
+        "yamu.importer.pipeline.input_options", lambda *args, **kwargs: "a"
+    )
+
+    completed, _ = importer.run(tasks)
+
+    assert completed == 50
+    assert peak > 10
+
+
+def test_async_engine_adapts_sync_providers(library, monkeypatch) -> None:
+    task = ImportTask(original={"title": "Game A", "path": "steam://1"})
+    importer = Importer(library, provider=StaticProvider([task]), engine="async")
+    monkeypatch.setattr(
+        "yamu.importer.pipeline.input_options", lambda *args, **kwargs: "a"
+    )
+
+    completed, _ = importer.run([task])
+
+    assert completed == 1
+    assert library.list_games()[0].title == "Game A"
+
+
+def test_auto_accept_imports_confident_matches_without_prompt(
+    library, monkeypatch, capsys
+) -> None:
+    class SearchProvider:
+        def candidates(self, task: ImportTask):
+            title = task.original["title"]
+            return [
+                ImportCandidate(fields=dict(task.original)),
+                ImportCandidate(
+                    fields={**task.original, "title": title.replace("Portl", "Portal")},
+                    source="igdb",
+                ),
+            ]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("prompted")
+
+    monkeypatch.setattr("yamu.importer.pipeline.input_options", fail)
+    monkeypatch.setattr("yamu.importer.pipeline.input_options_with_numbers", fail)
+    tasks = [
+        ImportTask(original={"title": "Half-Life", "path": "x://1"}),
+        ImportTask(original={"title": "Portl", "path": "x://2"}),
+    ]
+    importer = Importer(
+        library, provider=SearchProvider(), auto_accept=0.95, quiet=True
+    )
+
+    completed, _ = importer.run(tasks)
+
+    assert completed == 1
+    assert importer.skipped == 1
+    assert [game.title for game in library.list_games()] == ["Half-Life"]
+    assert 'Skipped "Portl"' in capsys.readouterr().out
+
+
+def test_deferred_imports_are_reviewed_later(library, monkeypatch) -> None:
+    tasks = [
+        ImportTask(original={"title": "Game A", "path": "x://1"}),
+        ImportTask(original={"title": "Game B", "path": "x://2"}),
+    ]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("prompted")
+
+    monkeypatch.setattr("yamu.importer.pipeline.input_options", fail)
+    importer = Importer(library, defer=True)
+    assert importer.run(tasks) == (0, 0)
+    assert importer.deferred == 2
+    assert [entry["path"] for entry in library.list_pending_imports()] == [
+        "x://1",
+        "x://2",
+    ]
+
+    answers = iter(["s", "q"])
+    monkeypatch.setattr(
+        "yamu.importer.pipeline.input_options", lambda *args, **kwargs: next(answers)
+    )
+    assert Importer(library).review() == (0, 1)
+    assert len(library.list_pending_imports()) == 2
+
+    answers = iter(["a", "q"])
+    assert Importer(library).review() == (1, 1)
+    assert [game.title for game in library.list_games()] == ["Game A"]
+    assert [entry["path"] for entry in library.list_pending_imports()] == ["x://2"]
+
+
+def test_recorded_decisions_replay_without_prompting(
+    library, tmp_path, monkeypatch
+) -> None:
+    class SearchProvider:
+        def candidates(self, task: ImportTask):
+            return [
+                ImportCandidate(fields=dict(task.original)),
+                ImportCandidate(
+                    fields={**task.original, "genre": "RPG"}, source="igdb"
+                ),
+            ]
+
+    tasks = [
+        ImportTask(original={"title": "Game A", "path": "x://1"}),
+        ImportTask(original={"title": "Game B", "path": "x://2"}),
+    ]
+    record = tmp_path / "decisions.jsonl"
+    recorder = DecisionRecorder(record)
+    answers = iter(["2", "a", "s"])
+    monkeypatch.setattr(
+        "yamu.importer.pipeline.input_options_with_numbers",
+        lambda *args, **kwargs: next(answers),
+    )
+    monkeypatch.setattr(
+        "yamu.importer.pipeline.input_options", lambda *args, **kwargs: next(answers)
+    )
+    Importer(library, provider=SearchProvider(), recorder=recorder).run(tasks)
+    recorder.close()
+
+    rebuilt = Library(str(tmp_path / "rebuilt.db"))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("prompted")
+
+    monkeypatch.setattr("yamu.importer.pipeline.input_options", fail)
+    monkeypatch.setattr("yamu.importer.pipeline.input_options_with_numbers", fail)
+    importer = Importer(
+        rebuilt, provider=SearchProvider(), decisions=load_decisions(record)
+    )
+
+    assert importer.run(tasks) == (1, 0)
+    games = rebuilt.list_games()
+    assert [(game.title, game.genre) for game in games] == [("Game A", "RPG")]
+    rebuilt.close()
+
+    class ReorderedProvider:
+        def candidates(self, task: ImportTask):
+            return [
+                ImportCandidate(fields={"title": "Other Game"}, source="igdb"),
+                *SearchProvider().candidates(task),
+            ]
+
+    reordered = Library(str(tmp_path / "reordered.db"))
+    importer = Importer(
+        reordered,
+        provider=ReorderedProvider(),
+        quiet=True,
+        decisions=load_decisions(record),
+    )
+    assert importer.run(tasks[:1]) == (1, 0)
+    assert [game.genre for game in reordered.list_games()] == ["RPG"]
+    reordered.close()
+
+    class ChangedProvider:
+        def candidates(self, task: ImportTask):
+            return [
+                ImportCandidate(fields=dict(task.original)),
+                ImportCandidate(fields={"title": "Other Game"}, source="igdb"),
+            ]
+
+    changed = Library(str(tmp_path / "changed.db"))
+    importer = Importer(
+        changed,
+        provider=ChangedProvider(),
+        quiet=True,
+        decisions=load_decisions(record),
+    )
+    importer.run(tasks[:1])
+    assert changed.list_games() == []
+    assert importer.skipped == 1
+    changed.close()
+
+
+def test_similarity_scorer_best_matches_exhaustive_scoring() -> None:
+    scorer = SimilarityScorer()
+    base = {"title": "The Witcher 3", "platform": "PC", "developer": "CD Projekt"}
+    candidates = [
+        {"title": "Witcher", "platform": "PC"},
+        {"title": "The Witcher 3: Wild Hunt", "developer": "CD Projekt Red"},
+        {"title": "Portal 2", "platform": "Xbox 360"},
+        {"title": "The Witcher 3", "platform": "PC", "developer": "CD Projekt"},
+    ]
+
+    scores = scorer.score_all(base, candidates)
+    idx, score = scorer.best(base, candidates)
+
+    assert (idx, score) == (3, 1.0)
+    assert scores[idx] == max(scores)
+    for candidate, exact in zip(candidates, scores):
+        assert scorer.bound(base, candidate) >= exact
+
+
+def test_force_update_stores_achievements_when_metadata_is_unchanged(
+    library, monkeypatch
+) -> None:
+    game = library.add_game({"title": "Game A", "path": "steam://1"})
+    importer = Importer(library, threads=1, prompt_existing=True)
+    candidates = [
+        ImportCandidate(fields={"title": "Game A", "path": "steam://1"}, source="igdb"),
+        ImportCandidate(
+            fields={
+                "title": "Game A",
+                "path": "steam://1",
+                "achievements": [{"api_name": "a", "achieved": 1}],
+                "achievements_synced": "100",
+            },
+            source="steam",
+        ),
+    ]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("prompted")
+
+    monkeypatch.setattr("yamu.importer.pipeline.prompt_apply_changes", fail)
+    monkeypatch.setattr(
+        "yamu.importer.pipeline.input_options_with_numbers", lambda *a, **k: "1"
+    )
+
+    assert importer.prompt_existing_update(game, candidates) == (0, False)
+    assert [row["api_name"] for row in library.list_achievements(game.id)] == ["a"]
+    assert library.achievement_sync_tokens() == {"steam://1": "100"}
+
+
+def test_auto_accept_force_update_stores_achievements(library) -> None:
+    game = library.add_game({"title": "Portal", "path": "steam://1"})
+
+    class SearchProvider:
+        def candidates(self, task: ImportTask):
+            return [
+                ImportCandidate(fields=dict(task.original)),
+                ImportCandidate(
+                    fields={
+                        **task.original,
+                        "achievements": [{"api_name": "a", "achieved": 1}],
+                        "achievements_synced": "100",
+                    },
+                    source="steam",
+                ),
+            ]
+
+    importer = Importer(
+        library,
+        provider=SearchProvider(),
+        prompt_existing=True,
+        auto_accept=0.9,
+        quiet=True,
+    )
+
+    importer.run([ImportTask(original={"title": "Portal", "path": "steam://1"})])
+
+    assert [row["api_name"] for row in library.list_achievements(game.id)] == ["a"]
+    assert library.achievement_sync_tokens() == {"steam://1": "100"}
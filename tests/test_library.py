@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import sqlite3
 from pathlib import Path
 
+import pytest
+
+from yamu.dbcore.query import parse_query
 from yamu.library.library import Library
+from yamu.util.query import build_game_query
 
 
 def test_library_crud(tmp_path: Path) -> None:
@@ -84,3 +89,157 @@ def test_remove_game_also_removes_achievements(tmp_path: Path) -> None:
         assert lib.list_achievements(game.id) == []
     finally:
         lib.close()
+
+
+def test_upsert_achievements_many_writes_one_batch(library) -> None:
+    first = library.add_game({"title": "Game A"})
+    second = library.add_game({"title": "Game B"})
+    library.upsert_achievements(first.id, [{"api_name": "a", "achieved": 0}])
+
+    written = library.upsert_achievements_many(
+        [
+            (first.id, [{"api_name": "a", "achieved": 1}]),
+            (second.id, [{"api_name": "b"}, {"api_name": "c"}]),
+        ]
+    )
+
+    assert written == 3
+    assert [row["achieved"] for row in library.list_achievements(first.id)] == [1]
+    assert len(library.list_achievements(second.id)) == 2
+    assert library.upsert_achievements_many([(first.id, [])]) == 0
+
+
+def test_library_searches_attached_libraries(tmp_path: Path) -> None:
+    other_path = tmp_path / "bob.db"
+    other = Library(str(other_path))
+    other.add_game({"title": "Portal", "platform": "steam"})
+    other.add_game({"title": "Doom", "platform": "gog"})
+    other.close()
+
+    lib = Library(str(tmp_path / "alice.db"), attach=[str(other_path)])
+    try:
+        lib.add_game({"title": "Portal 2", "platform": "steam"})
+        assert lib.federated is True
+
+        query = parse_query(["portal"], default_field="title", allowed_fields=set())
+        found = {(game.source, game.title) for game in lib.list_games(query)}
+        assert found == {("alice", "Portal 2"), ("bob", "Portal")}
+
+        query = parse_query(
+            ["source:bob"],
+            default_field="title",
+            allowed_fields={"source"},
+            contains_fields={"source"},
+        )
+        assert {game.title for game in lib.list_games(query)} == {"Portal", "Doom"}
+
+        assert [g.title for g in lib.list_games(main_only=True)] == ["Portal 2"]
+        doom = next(g for g in lib.list_games() if g.title == "Doom")
+        assert lib.get_game(doom.id, "bob").title == "Doom"
+        assert lib.get_game(doom.id, "alice") is None
+        assert lib.get_game(doom.id, "carol") is None
+    finally:
+        lib.close()
+
+
+def test_library_rejects_attached_files_with_an_old_schema(tmp_path: Path) -> None:
+    old_path = tmp_path / "old.db"
+    conn = sqlite3.connect(old_path)
+    conn.execute("CREATE TABLE games (id INTEGER PRIMARY KEY, title TEXT)")
+    conn.close()
+
+    with pytest.raises(ValueError, match="older library schema"):
+        Library(str(tmp_path / "alice.db"), attach=[str(old_path)])
+
+
+def test_title_keys_are_persisted_and_sorted(tmp_path: Path) -> None:
+    lib = Library(str(tmp_path / "library.db"))
+    try:
+        lib.add_game({"title": "The Witcher 3"})
+        game = lib.add_game({"title": "Zork"})
+        lib.add_game({"title": "Amnesia"})
+        lib.update_game(game.id, {"title": "A Bird Story"})
+
+        row = lib.db.query(
+            "SELECT title_norm, title_sort FROM games WHERE id = ?", [game.id]
+        )[0]
+        assert (row["title_norm"], row["title_sort"]) == ("a bird story", "bird story")
+        assert [g.title for g in lib.list_games()] == [
+            "Amnesia",
+            "A Bird Story",
+            "The Witcher 3",
+        ]
+        assert [g.title for g in lib.find_games_by_title("the witcher-3")] == [
+            "The Witcher 3"
+        ]
+    finally:
+        lib.close()
+
+
+def test_title_keys_backfilled_for_existing_rows(tmp_path: Path) -> None:
+    db_path = tmp_path / "library.db"
+    lib = Library(str(db_path))
+    lib.add_game({"title": "Half-Life"})
+    lib.db.execute("UPDATE games SET title_norm = NULL, title_sort = NULL")
+    lib.db.conn.commit()
+    lib.close()
+
+    lib = Library(str(db_path))
+    try:
+        assert [g.id for g in lib.find_games_by_title("half life")] == [1]
+    finally:
+        lib.close()
+
+
+def test_non_latin_titles_only_match_themselves(tmp_path: Path) -> None:
+    db_path = tmp_path / "library.db"
+    lib = Library(str(db_path))
+    zelda = lib.add_game({"title": "ゼルダの伝説"})
+    lib.add_game({"title": "ファイナルファンタジー"})
+    lib.add_game({"title": "Тетрис"})
+    lib.db.execute("UPDATE games SET title_norm = '', title_sort = ''")
+    lib.db.conn.commit()
+    lib.close()
+
+    lib = Library(str(db_path))
+    try:
+        assert [g.id for g in lib.find_games_by_title("ゼルダの伝説")] == [zelda.id]
+        assert [g.title for g in lib.find_games_by_title("ТЕТРИС")] == ["Тетрис"]
+        assert lib.find_games_by_title("!!!") == []
+        query, _ = build_game_query(["~ゼルダ"])
+        assert [g.id for g in lib.list_games(query)] == [zelda.id]
+    finally:
+        lib.close()
+
+
+def test_smart_collections_track_changes(tmp_path: Path) -> None:
+    lib = Library(str(tmp_path / "library.db"))
+    try:
+        lib.add_game({"title": "Portal", "platform": "steam", "genre": "Puzzle"})
+        doom = lib.add_game({"title": "Doom", "platform": "gog", "genre": "Shooter"})
+
+        assert lib.save_collection("steam", ["platform:steam"]) == 1
+        assert lib.list_collections() == {"steam": ["platform:steam"]}
+
+        hand = lib.add_game({"title": "Hades", "collection": "steam favourites"})
+        lib.add_game({"title": "Dota 2", "platform": "steam"})
+        lib.update_game(doom.id, {"platform": "steam"})
+        query, _ = build_game_query(["in:steam"])
+        assert "LIKE" not in query.clause()[0]
+        titles = {game.title for game in lib.list_games(query)}
+        assert titles == {"Portal", "Doom", "Dota 2"}
+        query, _ = build_game_query(["collection:steam"])
+        assert [game.title for game in lib.list_games(query)] == ["Hades"]
+
+        lib.remove_game(hand.id)
+        lib.update_game(doom.id, {"platform": "gog"})
+        rows = lib.db.query(
+            "SELECT game_id FROM collection_members WHERE collection = 'steam'"
+        )
+        assert len(rows) == 2
+        assert lib.refresh_collections() == {"steam": 2}
+
+        assert lib.remove_collection("steam") is True
+        assert lib.list_collections() == {}
+    finally:
+        lib.close()
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import time
+
 import pytest
 
 from yamu.dbcore.query import parse_query
+from yamu.library.library import Library
 
 
 def test_parse_query_default_field_contains() -> None:
@@ -61,3 +64,78 @@ def test_parse_query_any_field_regex() -> None:
     clause, params = query.clause()
     assert clause == "((regexp(artpath, ?)) OR (regexp(title, ?)))"
     assert params == ["^$", "^$"]
+
+
+def test_parse_query_fuzzy_term() -> None:
+    query = parse_query(["~Wit"], default_field="title", allowed_fields={"title"})
+    clause, params = query.clause()
+    assert clause == (
+        '(id IN (SELECT rowid FROM "main".games_fts WHERE title MATCH ?) '
+        "AND similarity(title, ?) >= 0.7)"
+    )
+    assert params == ['"wit"', "Wit"]
+    assert query.order() == ("similarity(title, ?) DESC", ["Wit"])
+
+
+def test_fuzzy_query_ranks_library_titles(library) -> None:
+    library.add_game({"title": "The Witcher 3: Wild Hunt"})
+    library.add_game({"title": "The Witcher III"})
+    library.add_game({"title": "Doom"})
+    game = library.add_game({"title": "Witch Hunt"})
+    library.update_game(game.id, {"title": "Portal"})
+
+    for term in ("~wticher", "~witcher 3", "~The Witcher III"):
+        query = parse_query([term], default_field="title", allowed_fields={"title"})
+        titles = [game.title for game in library.list_games(query)]
+        assert set(titles) == {"The Witcher 3: Wild Hunt", "The Witcher III"}
+
+    query = parse_query(["~witcher iii"], default_field="title", allowed_fields=set())
+    assert library.list_games(query)[0].title == "The Witcher III"
+
+
+def test_fuzzy_query_without_fts5(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(Library, "_trigram_supported", lambda self: False)
+    path = str(tmp_path / "library.db")
+    library = Library(path)
+    library.add_game({"title": "The Witcher III"})
+    doom = library.add_game({"title": "Doom"})
+    library.remove_game(doom.id)
+    query = parse_query(["~wticher"], default_field="title", allowed_fields=set())
+    assert [game.title for game in library.list_games(query)] == ["The Witcher III"]
+    library.close()
+
+    monkeypatch.undo()
+    upgraded = Library(path)
+    try:
+        kind = upgraded.db.query(
+            "SELECT type FROM sqlite_master WHERE name = 'games_fts'"
+        )[0]["type"]
+        assert kind == "table"
+        titles = [game.title for game in upgraded.list_games(query)]
+        assert titles == ["The Witcher III"]
+    finally:
+        upgraded.close()
+
+
+def test_regex_rejects_backtracking_patterns(library) -> None:
+    with pytest.raises(ValueError, match="too expensive"):
+        parse_query(["title::(a+)+$"], default_field="title", allowed_fields={"title"})
+    with pytest.raises(ValueError, match="too expensive"):
+        parse_query([r":(\w|\d)*x\1"], default_field="title", allowed_fields={"title"})
+    for pattern in (r"(a|aa)*b", r"(.|.)*x", r"a*a*x", r".*a.*a.*x", r"\w+\s*\w+"):
+        with pytest.raises(ValueError, match="too expensive"):
+            parse_query(
+                [f"title::{pattern}"],
+                default_field="title",
+                allowed_fields={"title"},
+            )
+    for pattern in (r"^(\d{3}-)+\w+$", r"(foo|bar)+", r"(\w|\s)*x", r"foo.*bar"):
+        parse_query(
+            [f"title::{pattern}"], default_field="title", allowed_fields={"title"}
+        )
+
+    library.add_game({"title": "a" * 40 + "!"})
+    start = time.monotonic()
+    rows = library.db.query("SELECT id FROM games WHERE regexp(title, '(a+)+$')")
+    assert rows == []
+    assert time.monotonic() - start < 1
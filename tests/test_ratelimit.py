@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from yamu.util import ratelimit
+from yamu.util.ratelimit import TokenBucket
+
+
+def test_token_bucket_spaces_requests_across_threads() -> None:
+    bucket = TokenBucket(requests=20, per=1, burst=1)
+    stamps: list[float] = []
+    lock = threading.Lock()
+
+    def worker() -> None:
+        for _ in range(2):
+            bucket.acquire()
+            with lock:
+                stamps.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(stamps) == 6
+    assert time.monotonic() - start >= 0.24
+
+
+def test_token_bucket_pause_and_async_acquire() -> None:
+    bucket = TokenBucket(requests=100, per=1)
+    bucket.pause(0.1)
+
+    start = time.monotonic()
+    asyncio.run(bucket.acquire_async())
+
+    assert time.monotonic() - start >= 0.09
+
+
+def test_configure_from_reuses_matching_buckets() -> None:
+    ratelimit.reset()
+    limits = {"api.example.com": {"requests": 4, "per": 1, "concurrency": 8}}
+    ratelimit.configure_from(limits)
+    first = ratelimit.limiter_for("api.example.com")
+    ratelimit.configure_from(limits)
+
+    assert ratelimit.limiter_for("api.example.com") is first
+    assert first.rate == 4
+    assert ratelimit.limiter_for("other.example.com") is None
+    ratelimit.reset()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from yamu.ui.commands import achievements as achievements_cmd
+from yamu.util.http_client import HttpError
+from yamuplug import steam
+
+
+def _args(**kwargs) -> SimpleNamespace:
+    defaults = {"query": [], "threads": 2, "rate": None, "steam_id": None}
+    return SimpleNamespace(**{**defaults, **kwargs})
+
+
+def test_achievements_sync_batches_and_reports(library, monkeypatch, capsys) -> None:
+    for appid in ("1", "2", "3"):
+        library.add_game({"title": f"Game {appid}", "path": f"steam://{appid}"})
+    library.add_game({"title": "Local", "path": "/games/local"})
+    owned = [
+        {"appid": 1, "playtime_forever": 5, "has_community_visible_stats": True},
+        {"appid": 2, "playtime_forever": 5, "has_community_visible_stats": True},
+        {"appid": 3, "playtime_forever": 5},
+    ]
+    fetched: list[str] = []
+
+    def fake_achievements(_steam_id, _api_key, appid, **_kwargs):
+        fetched.append(appid)
+        if appid == "2":
+            raise HttpError("HTTP 500", 500)
+        return [{"api_name": "WIN", "name": "Win", "achieved": 1}]
+
+    monkeypatch.setattr(steam, "fetch_owned_games", lambda *_a, **_k: owned)
+    monkeypatch.setattr(steam, "fetch_game_achievements", fake_achievements)
+    monkeypatch.setattr(
+        achievements_cmd,
+        "load_config",
+        lambda: {"steam": {"steam_ids": ["9"], "api_key": "x"}},
+    )
+
+    assert achievements_cmd.run_sync(_args(), library) == 1
+    output = capsys.readouterr().out
+    assert "Game 2: HTTP 500" in output
+    assert "Synced achievements for 1 of 3 games (1 achievements)" in output
+    assert "1 games failed" in output
+    game = library.get_game_by_path("steam://1")
+    assert [row["api_name"] for row in library.list_achievements(game.id)] == ["WIN"]
+
+    fetched.clear()
+    assert achievements_cmd.run_sync(_args(query=["title:Game 1"]), library) == 0
+    assert fetched == []
+    assert "1 games unchanged" in capsys.readouterr().out
+
+
+def test_achievements_sync_rate_overrides_api_limit() -> None:
+    config = {"steam": {"rate_limits": {steam.STEAM_API_HOST: {"requests": 5}}}}
+    updated = achievements_cmd._with_rate(config, 2)
+    assert updated["steam"]["rate_limits"][steam.STEAM_API_HOST] == {
+        "requests": 2,
+        "per": 1,
+    }
+    assert config["steam"]["rate_limits"][steam.STEAM_API_HOST] == {"requests": 5}
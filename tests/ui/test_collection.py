@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from yamu.ui.commands import collection as collection_cmd
+
+
+def test_collection_save_and_list(library, capsys) -> None:
+    library.add_game({"title": "Portal", "platform": "steam"})
+    args = SimpleNamespace(name="steam", query=["platform:steam"])
+    assert collection_cmd.run_save(args, library) == 0
+    assert collection_cmd.run_list(SimpleNamespace(), library) == 0
+    output = capsys.readouterr().out
+    assert "Saved collection steam with 1 games" in output
+    assert "steam: platform:steam" in output
+
+
+def test_collection_save_rejects_unknown_field(library, capsys) -> None:
+    args = SimpleNamespace(name="bad", query=["nope:value"])
+    assert collection_cmd.run_save(args, library) == 1
+    assert "Unknown field" in capsys.readouterr().out
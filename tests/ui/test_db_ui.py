@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from yamu.library.library import Library
+from yamu.ui.commands import db as db_cmd
+
+
+def test_db_backup_command(library, tmp_path, capsys) -> None:
+    library.add_game({"title": "Game A"})
+    dest = tmp_path / "copy.db"
+    args = SimpleNamespace(dest=str(dest), pages=4, sleep=0.0)
+    assert db_cmd.run_backup(args, library) == 0
+    assert "Backed up" in capsys.readouterr().out
+    copy = Library(str(dest))
+    try:
+        assert copy.get_game_by_path("missing") is None
+        assert len(copy.list_games()) == 1
+    finally:
+        copy.close()
+
+
+def test_db_backup_to_memory(library, capsys) -> None:
+    args = SimpleNamespace(dest=":memory:", pages=-1, sleep=0.0)
+    assert db_cmd.run_backup(args, library) == 0
+    assert "into memory" in capsys.readouterr().out
+
+
+def test_db_optimize_command(library, capsys) -> None:
+    assert db_cmd.run_optimize(SimpleNamespace(), library) == 0
+    assert "Optimized library" in capsys.readouterr().out
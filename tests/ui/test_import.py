@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import threading
+import time
 from types import SimpleNamespace
 
-from yamu.importer.pipeline import ImportTask
+from yamu.importer.pipeline import ImportCandidate, ImportTask
 from yamu.ui.commands import import_ as import_cmd
+from yamu.util.http_client import HttpError
 
 
 class EmptyProvider:
@@ -56,10 +60,25 @@ class ForceUpdateProvider:
         )
 
 
+def _args(**kwargs) -> SimpleNamespace:
+    defaults = {
+        "threads": None,
+        "force": False,
+        "query": [],
+        "quiet": False,
+        "auto_accept": None,
+        "defer": False,
+        "review": False,
+        "record": None,
+        "decisions": None,
+    }
+    return SimpleNamespace(**{**defaults, **kwargs})
+
+
 def test_import_empty_library(library, monkeypatch, capsys) -> None:
     monkeypatch.setattr(import_cmd, "import_providers", lambda: [EmptyProvider()])
     monkeypatch.setattr(import_cmd, "load_config", lambda: {"plugins": ["empty"]})
-    args = SimpleNamespace(threads=None, force=False, query=[])
+    args = _args(force=False, query=[])
     assert import_cmd.run(args, library) == 0
     output = capsys.readouterr().out
     assert "No new games found to import" in output
@@ -71,7 +90,7 @@ def test_import_single_game(library, monkeypatch, capsys) -> None:
     monkeypatch.setattr(
         "yamu.importer.pipeline.input_options", lambda *args, **kwargs: "a"
     )
-    args = SimpleNamespace(threads=None, force=False, query=[])
+    args = _args(force=False, query=[])
     assert import_cmd.run(args, library) == 0
     output = capsys.readouterr().out
     assert "Imported 1 games" in output
@@ -83,7 +102,7 @@ def test_import_dedupes_paths(library, monkeypatch, capsys) -> None:
     monkeypatch.setattr(
         "yamu.importer.pipeline.input_options", lambda *args, **kwargs: "a"
     )
-    args = SimpleNamespace(threads=None, force=False, query=[])
+    args = _args(force=False, query=[])
     assert import_cmd.run(args, library) == 0
     output = capsys.readouterr().out
     assert "Imported 1 games" in output
@@ -98,7 +117,7 @@ def test_import_force_can_filter_existing_subset(library, monkeypatch, capsys) -
     monkeypatch.setattr(
         "yamu.importer.pipeline.prompt_apply_changes", lambda *args, **kwargs: "a"
     )
-    args = SimpleNamespace(threads=None, force=True, query=["title:Game A"])
+    args = _args(force=True, query=["title:Game A"])
     assert import_cmd.run(args, library) == 0
     output = capsys.readouterr().out
     assert "Updated metadata for 1 games" in output
@@ -109,7 +128,7 @@ def test_import_force_can_filter_existing_subset(library, monkeypatch, capsys) -
 def test_import_query_requires_force(library, monkeypatch, capsys) -> None:
     monkeypatch.setattr(import_cmd, "import_providers", lambda: [EmptyProvider()])
     monkeypatch.setattr(import_cmd, "load_config", lambda: {"plugins": ["empty"]})
-    args = SimpleNamespace(threads=None, force=False, query=["title:Game A"])
+    args = _args(force=False, query=["title:Game A"])
     assert import_cmd.run(args, library) == 1
     output = capsys.readouterr().out
     assert "QUERY is only supported with --force" in output
@@ -119,7 +138,7 @@ def test_import_skips_ignored_paths(library, monkeypatch, capsys) -> None:
     library.ignore_import_path("steam://1", "Game A")
     monkeypatch.setattr(import_cmd, "import_providers", lambda: [OneGameProvider()])
     monkeypatch.setattr(import_cmd, "load_config", lambda: {"plugins": ["one"]})
-    args = SimpleNamespace(threads=None, force=False, query=[])
+    args = _args(force=False, query=[])
     assert import_cmd.run(args, library) == 0
     output = capsys.readouterr().out
     assert "No new games found to import" in output
@@ -133,8 +152,149 @@ def test_import_force_skips_ignored_existing_games(
     monkeypatch.setattr(import_cmd, "import_providers", lambda: [ForceUpdateProvider()])
     monkeypatch.setattr(import_cmd, "load_config", lambda: {"plugins": ["force"]})
     monkeypatch.setattr(import_cmd, "load_plugins", lambda *_args, **_kwargs: None)
-    args = SimpleNamespace(threads=None, force=True, query=["title:Game A"])
+    args = _args(force=True, query=["title:Game A"])
     assert import_cmd.run(args, library) == 0
     output = capsys.readouterr().out
     assert "No new games found to import" in output
     assert library.get_game_by_path("steam://1").genre is None
+
+
+class SleepySearch:
+    def __init__(self, name: str, delay: float):
+        self.name = name
+        self.delay = delay
+
+    def search(self, game, _config):
+        time.sleep(self.delay)
+        return [ImportCandidate(fields={"title": f"{game.title} ({self.name})"})]
+
+
+def test_candidate_provider_queries_providers_in_parallel() -> None:
+    provider = import_cmd.CandidateProvider(
+        [SleepySearch("a", 0.2), SleepySearch("b", 0.2)], {}
+    )
+    task = ImportTask(original={"title": "Game A"})
+
+    start = time.monotonic()
+    candidates = provider.candidates(task)
+    elapsed = time.monotonic() - start
+    provider.close()
+
+    assert [c.source for c in candidates] == ["base", "a", "b"]
+    assert elapsed < 0.35
+
+
+def test_candidate_provider_collects_late_results() -> None:
+    provider = import_cmd.CandidateProvider(
+        [SleepySearch("fast", 0), SleepySearch("slow", 0.2)],
+        {"slow": {"search_timeout": 0.05}},
+    )
+    task = ImportTask(original={"title": "Game A"})
+
+    candidates = provider.candidates(task)
+    assert [c.source for c in candidates] == ["base", "fast"]
+    time.sleep(0.3)
+    late = provider.late_candidates(task)
+    provider.close()
+
+    assert [c.fields["title"] for c in late] == ["Game A (slow)"]
+    assert provider.late_candidates(task) == []
+
+
+class FailingSearch:
+    name = "down"
+
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, _game, _config):
+        self.calls += 1
+        raise HttpError("HTTP 503", 503)
+
+
+def test_candidate_provider_stops_calling_failing_provider(capsys) -> None:
+    failing = FailingSearch()
+    provider = import_cmd.CandidateProvider(
+        [failing], {}, breaker_threshold=2, breaker_cooldown=60
+    )
+
+    for idx in range(5):
+        task = ImportTask(original={"title": f"Game {idx}"})
+        assert [c.source for c in provider.candidates(task)] == ["base"]
+    provider.close()
+
+    assert failing.calls == 2
+    [stats] = provider.stats()
+    assert (stats.calls, stats.errors, stats.rejected) == (2, 2, 3)
+    assert "down is failing" in capsys.readouterr().out
+
+
+def test_candidate_provider_runs_sync_searches_on_its_pool_when_async() -> None:
+    threads: list[threading.Thread] = []
+
+    class RecordingSearch(SleepySearch):
+        def search(self, game, config):
+            threads.append(threading.current_thread())
+            return super().search(game, config)
+
+    provider = import_cmd.CandidateProvider([RecordingSearch("a", 0)], {})
+    task = ImportTask(original={"title": "Game A"})
+    candidates = asyncio.run(provider.acandidates(task))
+    provider.close()
+
+    assert [c.source for c in candidates] == ["base", "a"]
+    assert threads[0] in provider._executor._threads
+
+
+def test_candidate_provider_drops_late_results_for_finished_tasks() -> None:
+    provider = import_cmd.CandidateProvider(
+        [SleepySearch("slow", 0.2)], {"slow": {"search_timeout": 0.05}}
+    )
+    task = ImportTask(original={"title": "Game A"})
+
+    assert [c.source for c in provider.candidates(task)] == ["base"]
+    assert provider.late_candidates(task) == []
+    provider.finish(task)
+    time.sleep(0.3)
+    provider.close()
+
+    assert provider.late_candidates(task) == []
+    assert provider._late == {}
+
+
+class WideProvider:
+    name = "wide"
+
+    def __init__(self):
+        self.inflight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def tasks(self, _config):
+        for idx in range(12):
+            yield ImportTask(original={"title": f"Game {idx}", "path": f"w://{idx}"})
+
+    def search(self, game, _config):
+        with self._lock:
+            self.inflight += 1
+            self.peak = max(self.peak, self.inflight)
+        time.sleep(0.1)
+        with self._lock:
+            self.inflight -= 1
+        return []
+
+
+def test_import_async_engine_runs_more_lookups_than_threads(
+    library, monkeypatch
+) -> None:
+    wide = WideProvider()
+    config = {
+        "plugins": ["wide"],
+        "import": {"engine": "async", "concurrency": 8, "threads": 2},
+    }
+    monkeypatch.setattr(import_cmd, "import_providers", lambda: [wide])
+    monkeypatch.setattr(import_cmd, "load_config", lambda: config)
+    monkeypatch.setattr(import_cmd, "load_plugins", lambda *_args, **_kwargs: None)
+
+    assert import_cmd.run(_args(quiet=True), library) == 0
+    assert wide.peak > 2
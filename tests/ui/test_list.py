@@ -33,3 +33,13 @@ def test_list_command_format_unknown_field(library, capsys) -> None:
     assert list_cmd.run(args, library) == 1
     output = capsys.readouterr().out
     assert "Unknown field" in output
+
+
+def test_list_command_explain(library, capsys) -> None:
+    library.add_game({"title": "Game A"})
+    args = SimpleNamespace(query=["~game"], format=None, explain=True)
+    assert list_cmd.run(args, library) == 0
+    output = capsys.readouterr().out
+    assert "SELECT * FROM games WHERE" in output
+    assert "games_fts" in output
+    assert "1 rows in" in output
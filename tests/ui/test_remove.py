@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 
+from yamu.library.library import Library
 from yamu.ui.commands import remove as remove_cmd
 
 
@@ -14,3 +15,19 @@ def test_remove_subparser_accepts_rm_alias() -> None:
 
     assert args.command == "rm"
     assert args.func is remove_cmd.run
+
+
+def test_remove_only_matches_games_in_the_main_library(tmp_path) -> None:
+    other_path = tmp_path / "bob.db"
+    other = Library(str(other_path))
+    other.add_game({"title": "Doom"})
+    other.close()
+
+    library = Library(str(tmp_path / "alice.db"), attach=[str(other_path)])
+    try:
+        library.add_game({"title": "Portal"})
+        args = argparse.Namespace(query=["doom"], raw=False)
+        assert remove_cmd.run(args, library) == 1
+        assert [game.title for game in library.list_games()] == ["Doom", "Portal"]
+    finally:
+        library.close()
@@ -1,24 +1,216 @@
 from __future__ import annotations
 
-import re
+import logging
+import os
 import sqlite3
+import time
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Iterable, Iterator
+from typing import Any, Callable, Iterable, Iterator
+
+from yamu.dbcore.query import compile_regex
+
+
+MODES = ("rw", "ro", "snapshot", "memory")
+READONLY_MODES = {"ro", "snapshot"}
+BACKUP_PAGES = 256
+BACKUP_SLEEP = 0.05
+PROGRESS_INTERVAL = 1000
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInterrupted(RuntimeError):
+    pass
+
+
+class DatabaseChanged(RuntimeError):
+    pass
 
 
 class Database:
-    def __init__(self, path: str) -> None:
+    def __init__(
+        self, path: str, mode: str = "rw", checkpoint_interval: float = 0
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown database mode: {mode}")
         self.path = Path(path)
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(self.path)
+        self.mode = mode
+        self.checkpoint_interval = checkpoint_interval
+        self._source: sqlite3.Connection | None = None
+        self._origin: sqlite3.Connection | None = None
+        self._origin_state: tuple[int, ...] | None = None
+        self._data_version: int | None = None
+        self._saved_changes: tuple[int, int] = (0, 0)
+        self._dirty = False
+        self._file: tuple[int, int] | None = None
+        self._functions: dict[str, tuple[int, Callable[..., Any], bool]] = {}
+        self._attached: list[tuple[str, str]] = []
+        self._last_checkpoint = time.monotonic()
+        self._deadline: float | None = None
+        self._interrupted = False
+        self.stats: dict[str, list[int]] | None = None
+        self.slow_query_ms = 0.0
+        if mode == "rw":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(self.path)
+        elif mode == "ro":
+            self.conn = self._connect_readonly()
+        elif mode == "memory":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(":memory:")
+            self._open_origin()
+            assert self._origin is not None
+            self._origin.backup(self.conn)
+            self._saved_changes = self._changes()
+        else:
+            self._source = self._connect_readonly()
+            self.conn = sqlite3.connect(":memory:")
+            self._load_snapshot()
+        self._configure()
+
+    def _configure(self) -> None:
+        if self.readonly:
+            self.conn.execute("PRAGMA query_only = ON")
         self.conn.row_factory = sqlite3.Row
         self.conn.create_function("regexp", 2, self._regexp)
+        for name, (narg, func, deterministic) in self._functions.items():
+            self.conn.create_function(name, narg, func, deterministic=deterministic)
+        for path, schema in self._attached:
+            self.conn.execute(f'ATTACH DATABASE ? AS "{schema}"', (path,))
+
+    @property
+    def readonly(self) -> bool:
+        return self.mode in READONLY_MODES
+
+    def _connect_readonly(self) -> sqlite3.Connection:
+        uri = f"{self.path.resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True)
+        self._file = self._file_id()
+        return conn
+
+    def _file_id(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_dev, stat.st_ino)
+
+    def _reopen_if_replaced(self) -> bool:
+        # A memory-mode write-back swaps in a new file, which an open
+        # connection would never see.
+        file_id = self._file_id()
+        if file_id is None or file_id == self._file:
+            return False
+        if self._source is not None:
+            self._source.close()
+            self._source = self._connect_readonly()
+            self._load_snapshot()
+            return True
+        self.conn.close()
+        self.conn = self._connect_readonly()
+        self._configure()
+        return True
+
+    def _changes(self) -> tuple[int, int]:
+        # DDL and VACUUM do not count in total_changes but bump schema_version.
+        schema = self.conn.execute("PRAGMA schema_version").fetchone()[0]
+        return (self.conn.total_changes, int(schema))
+
+    def create_function(
+        self,
+        name: str,
+        narg: int,
+        func: Callable[..., Any],
+        deterministic: bool = False,
+    ) -> None:
+        self._functions[name] = (narg, func, deterministic)
+        self.conn.create_function(name, narg, func, deterministic=deterministic)
+
+    def _source_data_version(self) -> int:
+        assert self._source is not None
+        return int(self._source.execute("PRAGMA data_version").fetchone()[0])
+
+    def _load_snapshot(self) -> None:
+        assert self._source is not None
+        self.conn.execute("PRAGMA query_only = OFF")
+        self._source.backup(self.conn)
+        self.conn.execute("PRAGMA query_only = ON")
+        self._data_version = self._source_data_version()
+
+    def _open_origin(self) -> None:
+        if self._origin is not None:
+            self._origin.close()
+        self._origin = sqlite3.connect(self.path)
+        self._origin_state = self._read_origin_state()
+
+    def _read_origin_state(self) -> tuple[int, ...]:
+        assert self._origin is not None
+        version = int(self._origin.execute("PRAGMA data_version").fetchone()[0])
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return (version,)
+        return (version, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def checkpoint(self) -> bool:
+        if self.mode != "memory":
+            return False
+        self._last_checkpoint = time.monotonic()
+        changes = self._changes()
+        if not self._dirty and changes == self._saved_changes:
+            return False
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        target = sqlite3.connect(tmp)
+        try:
+            self.conn.backup(target)
+        except Exception:
+            target.close()
+            tmp.unlink(missing_ok=True)
+            raise
+        target.close()
+        with open(tmp, "rb") as handle:
+            os.fsync(handle.fileno())
+        if self._read_origin_state() != self._origin_state:
+            unsaved = self.path.with_name(f"{self.path.name}.unsaved")
+            os.replace(tmp, unsaved)
+            self._saved_changes = changes
+            self._dirty = False
+            raise DatabaseChanged(
+                f"{self.path} was changed by another program since it was loaded; "
+                f"changes were saved to {unsaved} instead"
+            )
+        os.replace(tmp, self.path)
+        self._saved_changes = changes
+        self._dirty = False
+        self._open_origin()
+        return True
+
+    def _maybe_checkpoint(self) -> None:
+        if self.mode != "memory" or self.checkpoint_interval <= 0:
+            return
+        if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def refresh(self) -> bool:
+        if self._source is None:
+            return False
+        if self._reopen_if_replaced():
+            return True
+        if self._source_data_version() == self._data_version:
+            return False
+        self._load_snapshot()
+        return True
 
-    @staticmethod
-    def _regexp(value: Any, pattern: Any) -> int:
+    def _regexp(self, value: Any, pattern: Any) -> int:
         if pattern is None:
             return 0
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            # sqlite3 reports this as a failed function call; budget() turns
+            # it back into QueryInterrupted.
+            self._interrupted = True
+            raise QueryInterrupted("Query exceeded its time budget")
         if value is None:
             value = ""
         if isinstance(pattern, bytes):
@@ -26,12 +218,66 @@ class Database:
         if isinstance(value, bytes):
             value = value.decode("utf-8", "ignore")
         try:
-            return 1 if re.search(str(pattern), str(value)) else 0
-        except (re.error, TypeError):
+            return 1 if compile_regex(str(pattern)).search(str(value)) else 0
+        except (ValueError, TypeError):
             return 0
 
+    def instrument(self, slow_query_ms: float = 0) -> None:
+        if self.stats is None:
+            self.stats = {}
+        self.slow_query_ms = slow_query_ms
+
+    def _record(self, sql: str, params: tuple[Any, ...], seconds: float) -> None:
+        if self.stats is None:
+            return
+        elapsed_ms = seconds * 1000
+        buckets = self.stats.setdefault(sql, [0] * (len(LATENCY_BUCKETS_MS) + 1))
+        for idx, limit in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= limit:
+                buckets[idx] += 1
+                break
+        else:
+            buckets[-1] += 1
+        if self.slow_query_ms > 0 and elapsed_ms >= self.slow_query_ms:
+            try:
+                plan = "\n".join(self.explain(sql, params))
+            except sqlite3.Error:
+                plan = "(no plan)"
+            logger.warning("Slow query (%.1f ms): %s\n%s", elapsed_ms, sql, plan)
+
+    def format_stats(self) -> list[str]:
+        if not self.stats:
+            return []
+        labels = [f"<={limit}ms" for limit in LATENCY_BUCKETS_MS] + [
+            f">{LATENCY_BUCKETS_MS[-1]}ms"
+        ]
+        lines = []
+        ordered = sorted(self.stats.items(), key=lambda item: -sum(item[1]))
+        for sql, buckets in ordered:
+            counts = " ".join(
+                f"{label}:{count}" for label, count in zip(labels, buckets) if count
+            )
+            lines.append(f"{sum(buckets):6d}  {counts}  {' '.join(sql.split())}")
+        return lines
+
+    def explain(self, sql: str, params: Iterable[Any] = ()) -> list[str]:
+        rows = self.conn.execute(f"EXPLAIN QUERY PLAN {sql}", tuple(params))
+        depth: dict[int, int] = {0: 0}
+        lines = []
+        for row in rows:
+            node, parent, detail = row[0], row[1], row[3]
+            depth[node] = depth.get(parent, 0) + 1
+            lines.append(f"{'  ' * (depth[node] - 1)}{detail}")
+        return lines
+
     def execute(self, sql: str, params: Iterable[Any] = ()) -> sqlite3.Cursor:
-        return self.conn.execute(sql, tuple(params))
+        if self.stats is None:
+            return self.conn.execute(sql, tuple(params))
+        values = tuple(params)
+        start = time.perf_counter()
+        cur = self.conn.execute(sql, values)
+        self._record(sql, values, time.perf_counter() - start)
+        return cur
 
     def executemany(
         self, sql: str, param_list: Iterable[Iterable[Any]]
@@ -39,11 +285,88 @@ class Database:
         return self.conn.executemany(sql, [tuple(params) for params in param_list])
 
     def query(self, sql: str, params: Iterable[Any] = ()) -> list[sqlite3.Row]:
-        cur = self.execute(sql, params)
-        return cur.fetchall()
+        if self.stats is None:
+            return self.conn.execute(sql, tuple(params)).fetchall()
+        values = tuple(params)
+        start = time.perf_counter()
+        rows = self.conn.execute(sql, values).fetchall()
+        self._record(sql, values, time.perf_counter() - start)
+        return rows
+
+    def attach(self, path: str, schema: str) -> None:
+        if not Path(path).exists():
+            raise ValueError(f"Database not found: {path}")
+        self.conn.execute(f'ATTACH DATABASE ? AS "{schema}"', (str(path),))
+        self._attached.append((str(path), schema))
+
+    def columns(self, table: str, schema: str = "main") -> list[str]:
+        rows = self.conn.execute(f'PRAGMA "{schema}".table_info({table})')
+        return [row[1] for row in rows]
+
+    def size(self) -> int:
+        page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        return int(page_count) * int(page_size)
+
+    def backup(
+        self,
+        target: str | sqlite3.Connection,
+        *,
+        pages: int = BACKUP_PAGES,
+        sleep: float = BACKUP_SLEEP,
+        progress: Callable[[int, int, int], object] | None = None,
+    ) -> None:
+        def step(status: int, remaining: int, total: int) -> None:
+            if progress is not None:
+                progress(status, remaining, total)
+            if remaining and sleep > 0:
+                time.sleep(sleep)
+
+        if isinstance(target, sqlite3.Connection):
+            self.conn.backup(target, pages=pages, sleep=sleep, progress=step)
+            return
+        dest = Path(target)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f"{dest.name}.tmp")
+        conn = sqlite3.connect(tmp)
+        try:
+            self.conn.backup(conn, pages=pages, sleep=sleep, progress=step)
+        except Exception:
+            conn.close()
+            tmp.unlink(missing_ok=True)
+            raise
+        conn.close()
+        os.replace(tmp, dest)
+
+    def optimize(self) -> dict[str, float]:
+        start = time.perf_counter()
+        size_before = self.size()
+        self.conn.execute("ANALYZE")
+        self.conn.execute("PRAGMA optimize")
+        auto_vacuum = self.conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if auto_vacuum != 2:
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.conn.execute("VACUUM")
+        else:
+            self.conn.execute("PRAGMA incremental_vacuum")
+        self.conn.commit()
+        # Refreshed statistics are not counted as changes either.
+        self._dirty = True
+        return {
+            "size_before": size_before,
+            "size_after": self.size(),
+            "seconds": time.perf_counter() - start,
+        }
 
     def close(self) -> None:
-        self.conn.close()
+        try:
+            self.checkpoint()
+        finally:
+            self.conn.close()
+            if self._source is not None:
+                self._source.close()
+            if self._origin is not None:
+                self._origin.close()
 
     @contextmanager
     def transaction(self) -> Iterator[sqlite3.Connection]:
@@ -54,3 +377,49 @@ class Database:
         except Exception:
             self.conn.rollback()
             raise
+        self._maybe_checkpoint()
+
+    @contextmanager
+    def budget(self, seconds: float = 0, steps: int = 0) -> Iterator[None]:
+        if seconds <= 0 and steps <= 0:
+            yield
+            return
+        deadline = time.monotonic() + seconds if seconds > 0 else None
+        executed = 0
+
+        def check() -> int:
+            nonlocal executed
+            executed += PROGRESS_INTERVAL
+            if steps > 0 and executed > steps:
+                return 1
+            if deadline is not None and time.monotonic() > deadline:
+                return 1
+            return 0
+
+        self._deadline = deadline
+        self._interrupted = False
+        self.conn.set_progress_handler(check, PROGRESS_INTERVAL)
+        try:
+            yield
+        except sqlite3.OperationalError as exc:
+            if str(exc) != "interrupted" and not self._interrupted:
+                raise
+            raise QueryInterrupted("Query exceeded its time budget") from exc
+        finally:
+            self.conn.set_progress_handler(None, 0)
+            self._deadline = None
+            self._interrupted = False
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        if self._source is not None:
+            self.refresh()
+            yield self.conn
+            return
+        if self.mode == "ro":
+            self._reopen_if_replaced()
+        self.conn.execute("BEGIN")
+        try:
+            yield self.conn
+        finally:
+            self.conn.rollback()
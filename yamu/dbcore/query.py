@@ -1,14 +1,219 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 import re
-from typing import Iterable, Sequence
+from typing import Any, Callable, Iterable, Sequence
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python 3.10
+    import sre_parse
+
+from yamu.util.text import trigrams
+
+
+FUZZY_THRESHOLD = 0.7
+MAX_REGEX_LENGTH = 256
+_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+_ATOMIC = tuple(
+    getattr(sre_parse, name)
+    for name in ("ATOMIC_GROUP", "POSSESSIVE_REPEAT")
+    if hasattr(sre_parse, name)
+)
+_PROBES = tuple(chr(code) for code in range(128)) + (
+    "\u00a0",
+    "\u00e9",
+    "\u0436",
+    "\u0663",
+    "\u2028",
+    "\u30bc",
+)
+_CATEGORIES: dict[Any, Callable[[str], bool]] = {
+    sre_parse.CATEGORY_DIGIT: str.isdecimal,
+    sre_parse.CATEGORY_NOT_DIGIT: lambda char: not char.isdecimal(),
+    sre_parse.CATEGORY_SPACE: str.isspace,
+    sre_parse.CATEGORY_NOT_SPACE: lambda char: not char.isspace(),
+    sre_parse.CATEGORY_WORD: lambda char: char.isalnum() or char == "_",
+    sre_parse.CATEGORY_NOT_WORD: lambda char: not (char.isalnum() or char == "_"),
+}
+_ZERO_WIDTH = (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT)
+
+
+def _subpatterns(value: Any) -> Iterable[Any]:
+    if isinstance(value, sre_parse.SubPattern):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _subpatterns(item)
+
+
+def _unbounded(op: Any, av: Any) -> bool:
+    return op in _REPEATS and av[1] == sre_parse.MAXREPEAT
+
+
+class _RegexGuard:
+    def __init__(self, pattern: str) -> None:
+        self.parsed = sre_parse.parse(pattern)
+        self.ignorecase = bool(self.parsed.state.flags & re.IGNORECASE)
+        literals = {char for char in pattern if ord(char) >= 128}
+        self.probes = _PROBES + tuple(sorted(literals))
+
+    def _matches(self, op: Any, av: Any, char: str) -> bool:
+        if op == sre_parse.LITERAL:
+            return ord(char) == av
+        if op == sre_parse.NOT_LITERAL:
+            return ord(char) != av
+        if op == sre_parse.RANGE:
+            return av[0] <= ord(char) <= av[1]
+        if op == sre_parse.CATEGORY:
+            return _CATEGORIES.get(av, lambda _char: True)(char)
+        if op == sre_parse.IN:
+            negate = bool(av) and av[0][0] == sre_parse.NEGATE
+            found = any(self._matches(iop, iav, char) for iop, iav in av[negate:])
+            return found != negate
+        return True
+
+    def _charset(self, op: Any, av: Any) -> frozenset[str]:
+        found = set()
+        for char in self.probes:
+            if self._matches(op, av, char) or (
+                self.ignorecase and self._matches(op, av, char.swapcase())
+            ):
+                found.add(char)
+        return frozenset(found)
+
+    def chars(self, pattern: Any) -> frozenset[str]:
+        found: frozenset[str] = frozenset()
+        for op, av in pattern:
+            if op in _ZERO_WIDTH:
+                continue
+            subs = list(_subpatterns(av))
+            if subs:
+                for sub in subs:
+                    found |= self.chars(sub)
+            else:
+                found |= self._charset(op, av)
+        return found
+
+    def edge(self, pattern: Any, last: bool = False) -> tuple[frozenset[str], bool]:
+        found: frozenset[str] = frozenset()
+        items = list(pattern)
+        for op, av in reversed(items) if last else items:
+            if op in _ZERO_WIDTH:
+                continue
+            if op == sre_parse.BRANCH:
+                nullable = False
+                for branch in av[1]:
+                    chars, empty = self.edge(branch, last)
+                    found |= chars
+                    nullable = nullable or empty
+            elif isinstance(av, sre_parse.SubPattern):
+                chars, nullable = self.edge(av, last)
+                found |= chars
+            elif op in _REPEATS or op in _ATOMIC:
+                chars, empty = self.edge(av[2], last)
+                found |= chars
+                nullable = empty or av[0] == 0
+            elif op == sre_parse.SUBPATTERN:
+                chars, nullable = self.edge(av[-1], last)
+                found |= chars
+            else:
+                found |= self._charset(op, av)
+                nullable = False
+            if not nullable:
+                return found, False
+        return found, True
+
+    def _flatten(self, pattern: Any) -> list[tuple[Any, Any]]:
+        items = []
+        for op, av in pattern:
+            if op == sre_parse.SUBPATTERN:
+                items.extend(self._flatten(av[-1]))
+            else:
+                items.append((op, av))
+        return items
+
+    def _check_overlapping_repeats(self, pattern: Any) -> None:
+        previous: frozenset[str] | None = None
+        between: list[frozenset[str]] = []
+        for op, av in self._flatten(pattern):
+            if op in _ZERO_WIDTH:
+                continue
+            if not _unbounded(op, av):
+                if not self.edge([(op, av)])[1]:
+                    between.append(self.chars([(op, av)]))
+                continue
+            chars = self.edge(av[2])[0]
+            if (
+                previous is not None
+                and previous & chars
+                and all(sep & (previous | chars) for sep in between)
+            ):
+                raise ValueError(
+                    "repeats like a*a* or .*a.* that can match the same text "
+                    "take polynomial time"
+                )
+            last = self.edge(av[2], last=True)[0]
+            if av[0] == 0 and previous is not None:
+                # An optional repeat can be skipped, so the one before it
+                # still borders whatever follows.
+                last |= previous
+            previous = last
+            between = []
+
+    def check(self, pattern: Any, repeated: bool = False) -> None:
+        for op, av in pattern:
+            if op in _ATOMIC:
+                continue
+            if op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS):
+                raise ValueError("backreferences are not supported")
+            if op in _REPEATS:
+                low, high, body = av
+                if repeated and low != high:
+                    raise ValueError(
+                        "nested repeats like (a+)+ can take exponential time"
+                    )
+                self.check(body, repeated or high > 1)
+                continue
+            if op == sre_parse.BRANCH and repeated:
+                seen: frozenset[str] = frozenset()
+                for branch in av[1]:
+                    chars, nullable = self.edge(branch)
+                    if nullable or seen & chars:
+                        raise ValueError(
+                            "repeated alternatives like (a|aa)* that can match "
+                            "the same text take exponential time"
+                        )
+                    seen |= chars
+            for sub in _subpatterns(av):
+                self.check(sub, repeated)
+        self._check_overlapping_repeats(pattern)
+
+
+@lru_cache(maxsize=256)
+def compile_regex(pattern: str) -> re.Pattern[str]:
+    # Python regexes cannot be interrupted once running, so refuse patterns
+    # that backtrack heavily instead of relying on a budget.
+    if len(pattern) > MAX_REGEX_LENGTH:
+        raise ValueError(f"Regex is longer than {MAX_REGEX_LENGTH} characters")
+    try:
+        guard = _RegexGuard(pattern)
+        guard.check(guard.parsed)
+    except re.error as exc:
+        raise ValueError(f"Invalid regex {pattern!r}: {exc}") from exc
+    except ValueError as exc:
+        raise ValueError(f"Regex {pattern!r} is too expensive: {exc}") from exc
+    return re.compile(pattern)
 
 
 class Query:
-    def clause(self) -> tuple[str, list[str]]:
+    def clause(self, schema: str = "main") -> tuple[str, list[str]]:
         raise NotImplementedError
 
+    def order(self) -> tuple[str, list[Any]] | None:
+        return None
+
 
 CONTAINS_FIELDS = {
     "title",
@@ -29,7 +234,7 @@ class FieldQuery(Query):
     field: str
     value: str
 
-    def clause(self) -> tuple[str, list[str]]:
+    def clause(self, schema: str = "main") -> tuple[str, list[str]]:
         return f"{self.field} = ?", [self.value]
 
 
@@ -38,7 +243,7 @@ class ContainsQuery(Query):
     field: str
     value: str
 
-    def clause(self) -> tuple[str, list[str]]:
+    def clause(self, schema: str = "main") -> tuple[str, list[str]]:
         return f"LOWER({self.field}) LIKE ?", [f"%{self.value.lower()}%"]
 
 
@@ -48,54 +253,107 @@ class RegexpQuery(Query):
     pattern: str
 
     def __post_init__(self) -> None:
-        re.compile(self.pattern)
+        compile_regex(self.pattern)
 
-    def clause(self) -> tuple[str, list[str]]:
+    def clause(self, schema: str = "main") -> tuple[str, list[str]]:
         return f"regexp({self.field}, ?)", [self.pattern]
 
 
+@dataclass
+class FuzzyQuery(Query):
+    field: str
+    term: str
+    table: str = "games_fts"
+
+    def clause(self, schema: str = "main") -> tuple[str, list[str]]:
+        similar = f"similarity({self.field}, ?) >= {FUZZY_THRESHOLD}"
+        grams = trigrams(self.term)
+        if not grams:
+            return similar, [self.term]
+        match = " OR ".join(f'"{gram}"' for gram in grams)
+        return (
+            f'id IN (SELECT rowid FROM "{schema}".{self.table} '
+            f"WHERE {self.field} MATCH ?) AND {similar}",
+            [match, self.term],
+        )
+
+    def order(self) -> tuple[str, list[Any]] | None:
+        return f"similarity({self.field}, ?) DESC", [self.term]
+
+
+@dataclass
+class CollectionQuery(Query):
+    name: str
+    table: str = "collection_members"
+
+    def clause(self, schema: str = "main") -> tuple[str, list[str]]:
+        return (
+            f'id IN (SELECT game_id FROM "{schema}".{self.table} WHERE collection = ?)',
+            [self.name],
+        )
+
+
+def _first_order(queries: Sequence[Query]) -> tuple[str, list[Any]] | None:
+    for query in queries:
+        order = query.order()
+        if order is not None:
+            return order
+    return None
+
+
 @dataclass
 class AndQuery(Query):
     queries: Sequence[Query]
 
-    def clause(self) -> tuple[str, list[str]]:
+    def clause(self, schema: str = "main") -> tuple[str, list[str]]:
         if not self.queries:
             return "1", []
         clauses: list[str] = []
         params: list[str] = []
         for query in self.queries:
-            clause, qparams = query.clause()
+            clause, qparams = query.clause(schema)
             clauses.append(f"({clause})")
             params.extend(qparams)
         return " AND ".join(clauses), params
 
+    def order(self) -> tuple[str, list[Any]] | None:
+        return _first_order(self.queries)
+
 
 @dataclass
 class OrQuery(Query):
     queries: Sequence[Query]
 
-    def clause(self) -> tuple[str, list[str]]:
+    def clause(self, schema: str = "main") -> tuple[str, list[str]]:
         if not self.queries:
             return "0", []
         clauses: list[str] = []
         params: list[str] = []
         for query in self.queries:
-            clause, qparams = query.clause()
+            clause, qparams = query.clause(schema)
             clauses.append(f"({clause})")
             params.extend(qparams)
         return " OR ".join(clauses), params
 
+    def order(self) -> tuple[str, list[Any]] | None:
+        return _first_order(self.queries)
+
 
 def parse_query(
     parts: Iterable[str],
     default_field: str,
     allowed_fields: set[str],
     contains_fields: set[str] | None = None,
+    field_queries: dict[str, Callable[[str], Query]] | None = None,
 ) -> Query:
     queries: list[Query] = []
     contains = contains_fields or set()
+    custom = field_queries or {}
     any_fields = sorted(allowed_fields)
     for part in parts:
+        if part.startswith("~") and len(part) > 1:
+            queries.append(FuzzyQuery(default_field, part[1:]))
+            continue
         if part.startswith(":") and not part.startswith("::"):
             pattern = part[1:]
             queries.append(
@@ -115,9 +373,11 @@ def parse_query(
             continue
         if ":" in part:
             field, value = part.split(":", 1)
-            if field not in allowed_fields:
+            if field in custom:
+                queries.append(custom[field](value))
+            elif field not in allowed_fields:
                 raise ValueError(f"Unknown field: {field}")
-            if field in contains:
+            elif field in contains:
                 queries.append(ContainsQuery(field, value))
             else:
                 queries.append(FieldQuery(field, value))
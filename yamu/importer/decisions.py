@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+from yamu.util.text import normalize_text
+
+
+ACTIONS = ("accept", "skip", "ignore")
+IDENTITY_FIELDS = ("title", "platform", "release_date")
+
+
+def candidate_identity(fields: Dict[str, Any]) -> dict[str, Any]:
+    identity = {key: fields.get(key) for key in IDENTITY_FIELDS}
+    identity["title"] = normalize_text(identity["title"] or "")
+    return identity
+
+
+def load_decisions(path: str | Path) -> dict[str, dict[str, Any]]:
+    decisions: dict[str, dict[str, Any]] = {}
+    with open(path, encoding="utf-8") as handle:
+        for number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{number}: {exc.msg}") from exc
+            if (
+                not isinstance(entry, dict)
+                or not entry.get("path")
+                or entry.get("action") not in ACTIONS
+            ):
+                raise ValueError(f"{path}:{number}: invalid decision")
+            decisions[str(entry["path"])] = entry
+    return decisions
+
+
+class DecisionRecorder:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = open(self.path, "a", encoding="utf-8")
+
+    def record(
+        self,
+        path: str,
+        action: str,
+        *,
+        source: str | None = None,
+        rank: int | None = None,
+        identity: Dict[str, Any] | None = None,
+        fields: Dict[str, Any] | None = None,
+    ) -> None:
+        entry: dict[str, Any] = {"path": path, "action": action}
+        if source is not None:
+            entry["source"] = source
+            entry["rank"] = rank
+            entry["identity"] = identity
+        if fields is not None:
+            entry["fields"] = fields
+        self._handle.write(json.dumps(entry, default=str) + "\n")
+        self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
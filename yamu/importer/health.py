@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from yamu.util.color import warning
+from yamu.util.http_client import HttpError
+
+
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 30.0
+DECREASE_FACTOR = 0.5
+ACQUIRE_POLL = 0.01
+
+
+class ProviderUnavailable(RuntimeError):
+    pass
+
+
+def is_overload(exc: BaseException | None) -> bool:
+    while exc is not None:
+        if isinstance(exc, HttpError):
+            return exc.code is None or exc.code == 429 or exc.code >= 500
+        if isinstance(exc, TimeoutError):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+class AdaptiveLimit:
+    def __init__(
+        self,
+        maximum: int,
+        minimum: int = 1,
+        decrease: float = DECREASE_FACTOR,
+    ) -> None:
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.decrease = decrease
+        self.limit = float(self.maximum)
+        self.inflight = 0
+        self._decreased_at = 0.0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.inflight >= int(self.limit):
+                return False
+            self.inflight += 1
+            return True
+
+    def acquire(self) -> float:
+        with self._cond:
+            self._cond.wait_for(lambda: self.inflight < int(self.limit))
+            self.inflight += 1
+        return time.monotonic()
+
+    async def acquire_async(self) -> float:
+        while not self.try_acquire():
+            await asyncio.sleep(ACQUIRE_POLL)
+        return time.monotonic()
+
+    def release(self, started: float, overloaded: bool = False) -> None:
+        with self._cond:
+            self.inflight -= 1
+            if overloaded:
+                # One cut per congestion window: requests already in flight
+                # when the limit dropped do not cut it again.
+                if started >= self._decreased_at:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._decreased_at = time.monotonic()
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+    ) -> None:
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return "open"
+            return "half-open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self._probing = True
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def failure(self) -> bool:
+        with self._lock:
+            self.failures += 1
+            if self._probing or (
+                self.opened_at is None and self.failures >= self.threshold
+            ):
+                self._probing = False
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+@dataclass
+class ProviderStats:
+    name: str
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    rejected: int = 0
+    latency: float = 0.0
+    max_latency: float = 0.0
+
+    def record(self, elapsed: float, failed: bool = False) -> None:
+        self.calls += 1
+        self.errors += int(failed)
+        self.latency += elapsed
+        self.max_latency = max(self.max_latency, elapsed)
+
+    def summary(self) -> str:
+        average = self.latency / self.calls if self.calls else 0.0
+        parts = [
+            f"{self.calls} searches",
+            f"{self.errors} errors",
+            f"{self.timeouts} timeouts",
+        ]
+        if self.rejected:
+            parts.append(f"{self.rejected} skipped while unavailable")
+        parts.append(f"avg {average:.2f}s")
+        parts.append(f"max {self.max_latency:.2f}s")
+        return f"{self.name}: " + ", ".join(parts)
+
+
+class ProviderHealth:
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+    ) -> None:
+        self.name = name
+        self.limit = AdaptiveLimit(concurrency)
+        self.breaker = CircuitBreaker(threshold, cooldown)
+        self.stats = ProviderStats(name)
+        self._lock = threading.Lock()
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            with self._lock:
+                self.stats.rejected += 1
+            raise ProviderUnavailable(f"{self.name} is unavailable")
+
+    def _finish(self, started: float, exc: BaseException | None) -> None:
+        overloaded = exc is not None and is_overload(exc)
+        self.limit.release(started, overloaded)
+        with self._lock:
+            self.stats.record(time.monotonic() - started, exc is not None)
+        if not overloaded:
+            self.breaker.success()
+        elif self.breaker.failure():
+            print(
+                warning(
+                    f"{self.name} is failing ({exc}); pausing searches for "
+                    f"{self.breaker.cooldown:g}s"
+                )
+            )
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.stats.timeouts += 1
+
+    def call(self, func: Callable[..., Any], *args: Any) -> Any:
+        self._admit()
+        started = self.limit.acquire()
+        try:
+            result = func(*args)
+        except Exception as exc:
+            self._finish(started, exc)
+            raise
+        self._finish(started, None)
+        return result
+
+    async def acall(self, func: Callable[..., Any], *args: Any) -> Any:
+        self._admit()
+        started = await self.limit.acquire_async()
+        try:
+            result = await func(*args)
+        except asyncio.CancelledError:
+            self.limit.release(started)
+            raise
+        except Exception as exc:
+            self._finish(started, exc)
+            raise
+        self._finish(started, None)
+        return result
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 import queue
 import threading
-import re
+from concurrent.futures import Executor, ThreadPoolExecutor
 from dataclasses import dataclass
-from difflib import SequenceMatcher
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Protocol
 
+from yamu.importer.decisions import DecisionRecorder, candidate_identity
+from yamu.importer.similarity import scorer
 from yamu.library.library import Library
 from yamu.library.models import GAME_FIELDS
 from yamu.util.changes import show_model_changes
@@ -31,67 +33,40 @@ class Provider:
         return [ImportCandidate(fields=task.original)]
 
 
-SIMILARITY_FIELDS = (
-    "title",
-    "platform",
-    "release_date",
-    "genre",
-    "developer",
-    "publisher",
-    "region",
-)
+class AsyncProvider(Protocol):
+    async def acandidates(self, task: ImportTask) -> List[ImportCandidate]: ...
 
-SIMILARITY_WEIGHTS = {
-    "title": 5.0,
-    "platform": 1.0,
-    "release_date": 1.0,
-    "genre": 1.0,
-    "developer": 1.0,
-    "publisher": 1.0,
-    "region": 1.0,
-}
 
-
-def _normalize_similarity_value(value: Any) -> str:
-    text = str(value).strip().lower()
-    text = re.sub(r"[^a-z0-9]+", " ", text)
-    return " ".join(text.split())
-
-
-def _string_similarity(left: Any, right: Any) -> float:
-    normalized_left = _normalize_similarity_value(left)
-    normalized_right = _normalize_similarity_value(right)
-    if not normalized_left and not normalized_right:
-        return 1.0
-    if not normalized_left or not normalized_right:
-        return 0.0
-    return SequenceMatcher(a=normalized_left, b=normalized_right).ratio()
+async def provider_candidates(
+    provider: Any, task: ImportTask, executor: Executor | None = None
+) -> List[ImportCandidate]:
+    if hasattr(provider, "acandidates"):
+        return await provider.acandidates(task)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, provider.candidates, task)
 
 
 def _candidate_similarity(base: Dict[str, Any], candidate: Dict[str, Any]) -> float:
-    weighted_score = 0.0
-    total_weight = 0.0
-    for field in SIMILARITY_FIELDS:
-        left = base.get(field)
-        right = candidate.get(field)
-        if left in (None, "") or right in (None, ""):
-            continue
-        weight = SIMILARITY_WEIGHTS.get(field, 1.0)
-        weighted_score += _string_similarity(left, right) * weight
-        total_weight += weight
-    if total_weight:
-        return weighted_score / total_weight
-    return _string_similarity(base.get("title"), candidate.get("title"))
+    return scorer.score(base, candidate)
 
 
 def _sort_candidates(
     base: Dict[str, Any], candidates: List[ImportCandidate]
 ) -> List[ImportCandidate]:
-    return sorted(
-        candidates,
-        key=lambda candidate: _candidate_similarity(base, candidate.fields),
-        reverse=True,
-    )
+    scores = scorer.score_all(base, [candidate.fields for candidate in candidates])
+    order = sorted(range(len(candidates)), key=lambda idx: scores[idx], reverse=True)
+    return [candidates[idx] for idx in order]
+
+
+def _achievement_fields(
+    chosen: ImportCandidate, candidates: List[ImportCandidate]
+) -> Dict[str, Any]:
+    # Achievements come from the store the game was imported from, not from
+    # the metadata source the user picked.
+    for candidate in [chosen, *candidates]:
+        if candidate.fields.get("achievements") is not None:
+            return candidate.fields
+    return {}
 
 
 def _similarity_color_name(similarity: float) -> str:
@@ -106,6 +81,12 @@ def _similarity_string(similarity: float) -> str:
     return colorize(_similarity_color_name(similarity), f"{similarity * 100:.1f}%")
 
 
+DEFAULT_PREFETCH = 8
+DEFAULT_CONCURRENCY = 64
+ENGINES = ("threads", "async")
+QUEUE_POLL = 0.1
+
+
 class Importer:
     def __init__(
         self,
@@ -113,28 +94,157 @@ class Importer:
         provider: Provider | None = None,
         threads: int = 2,
         prompt_existing: bool = False,
+        prefetch: int = DEFAULT_PREFETCH,
+        engine: str = "threads",
+        concurrency: int = DEFAULT_CONCURRENCY,
+        auto_accept: float | None = None,
+        quiet: bool = False,
+        defer: bool = False,
+        decisions: dict[str, dict[str, Any]] | None = None,
+        recorder: DecisionRecorder | None = None,
     ) -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown import engine: {engine}")
         self.library = library
         self.provider = provider or Provider()
         self.threads = max(1, threads)
         self.prompt_existing = prompt_existing
-        self._in_q: queue.Queue[Optional[ImportTask]] = queue.Queue()
+        self.prefetch = max(1, prefetch)
+        self.engine = engine
+        self.concurrency = max(1, concurrency)
+        self.auto_accept = auto_accept
+        self.quiet = quiet
+        self.defer = defer
+        self.decisions = decisions or {}
+        self.recorder = recorder
+        self.skipped = 0
+        self.deferred = 0
+        self._fetchers = 1 if engine == "async" else self.threads
+        self._stop = threading.Event()
+        self._in_q: queue.Queue[Optional[ImportTask]] = queue.Queue(self.threads)
         self._out_q: queue.Queue[Optional[tuple[ImportTask, List[ImportCandidate]]]] = (
-            queue.Queue()
+            queue.Queue(self.prefetch)
         )
 
-    def _worker(self) -> None:
-        while True:
-            task = self._in_q.get()
-            if task is None:
-                self._out_q.put(None)
-                self._in_q.task_done()
-                break
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        while not self._stop.is_set():
             try:
+                q.put(item, timeout=QUEUE_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=QUEUE_POLL)
+            except queue.Empty:
+                continue
+        return None
+
+    def _worker(self) -> None:
+        try:
+            while True:
+                task = self._get(self._in_q)
+                if task is None:
+                    break
                 candidates = self.provider.candidates(task)
-                self._out_q.put((task, candidates))
-            finally:
-                self._in_q.task_done()
+                if not self._put(self._out_q, (task, candidates)):
+                    break
+        finally:
+            self._put(self._out_q, None)
+
+    async def _put_async(self, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._out_q.put_nowait(item)
+                return True
+            except queue.Full:
+                await asyncio.sleep(QUEUE_POLL)
+        return False
+
+    async def _lookup(
+        self, task: ImportTask, executor: Executor, limit: asyncio.Semaphore
+    ) -> None:
+        try:
+            candidates = await provider_candidates(self.provider, task, executor)
+            await self._put_async((task, candidates))
+        finally:
+            limit.release()
+
+    async def _fetch_async(self, task_source: Iterable[ImportTask]) -> None:
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(self.concurrency)
+        pending: set[asyncio.Task] = set()
+        tasks = iter(task_source)
+        executor = ThreadPoolExecutor(max_workers=self.threads)
+        try:
+            while not self._stop.is_set():
+                task = await loop.run_in_executor(None, next, tasks, None)
+                if task is None:
+                    break
+                await limit.acquire()
+                lookup = asyncio.create_task(self._lookup(task, executor, limit))
+                pending.add(lookup)
+                lookup.add_done_callback(pending.discard)
+            while pending and not self._stop.is_set():
+                await asyncio.wait(set(pending), timeout=QUEUE_POLL)
+        finally:
+            for lookup in pending:
+                lookup.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            executor.shutdown(wait=False, cancel_futures=True)
+            await self._put_async(None)
+
+    def _auto_candidate(
+        self, fields: Dict[str, Any], candidates: List[ImportCandidate]
+    ) -> tuple[ImportCandidate | None, float]:
+        scored = [c for c in candidates if c.source != "base"] or candidates
+        idx, score = scorer.best(fields, [c.fields for c in scored])
+        if idx is None or self.auto_accept is None or score < self.auto_accept:
+            return None, score
+        return scored[idx], score
+
+    def _add_game(self, fields: Dict[str, Any], on_imported: Any | None) -> None:
+        game = self.library.add_game(fields)
+        self._apply_achievements(game.id, fields)
+        if on_imported is not None:
+            on_imported(game)
+
+    def _update_unattended(
+        self, existing: Any, candidates: List[ImportCandidate]
+    ) -> bool:
+        current = self._game_fields(existing)
+        candidate, score = self._auto_candidate(current, candidates)
+        if candidate is None:
+            self._log_skip(current, score)
+            return False
+        merged = self._merge_missing_fields(current, candidate.fields)
+        fields = [field for field in GAME_FIELDS if field != "id"]
+        updated = self._apply_diff(existing.id, current, merged, fields)
+        self._apply_achievements(
+            existing.id, _achievement_fields(candidate, candidates)
+        )
+        return updated
+
+    def _log_skip(self, fields: Dict[str, Any], score: float) -> None:
+        self.skipped += 1
+        title = fields.get("title") or "Unknown"
+        print(info(f'Skipped "{title}" (best match {_similarity_string(score)})'))
+
+    def _finish(self, task: ImportTask) -> None:
+        finish = getattr(self.provider, "finish", None)
+        if finish is not None:
+            finish(task)
+
+    def _with_late_candidates(
+        self, task: ImportTask, candidates: List[ImportCandidate]
+    ) -> List[ImportCandidate]:
+        late = getattr(self.provider, "late_candidates", None)
+        if late is not None:
+            candidates = candidates + list(late(task))
+        return _sort_candidates(task.original, candidates)
 
     def _prompt(
         self,
@@ -152,6 +262,7 @@ class Importer:
         incoming = self._summarize_fields(task.original)
         if incoming:
             print(f"  Incoming: {incoming}")
+        self._warn_duplicates(task.original)
 
         if len(candidates) > 1:
             while True:
@@ -259,13 +370,16 @@ class Importer:
         self.library.update_game(game_id, updates)
         return True
 
-    def _apply_achievements(
-        self, game_id: int, achievements: list[dict] | None
-    ) -> None:
+    def _apply_achievements(self, game_id: int, fields: Dict[str, Any]) -> None:
+        achievements = fields.get("achievements")
         if achievements is None:
             return
         if achievements:
             self.library.upsert_achievements(game_id, achievements)
+        if fields.get("achievements_synced"):
+            self.library.mark_achievements_synced(
+                [(game_id, fields["achievements_synced"])]
+            )
 
     def _ignore_import(self, fields: Dict[str, Any]) -> bool:
         path = fields.get("path")
@@ -278,6 +392,18 @@ class Importer:
         print(info(f'Ignoring future imports for "{title}" ({rendered_path}).'))
         return True
 
+    def _warn_duplicates(self, fields: Dict[str, Any]) -> None:
+        title = fields.get("title")
+        if not title:
+            return
+        for game in self.library.find_games_by_title(str(title)):
+            if fields.get("path") and game.path == fields.get("path"):
+                continue
+            location = game.path or "no path"
+            print(
+                warning(f"  Already in library as {game.id}: {game.title} ({location})")
+            )
+
     def _game_fields(self, game: Any) -> Dict[str, Any]:
         return {field: getattr(game, field) for field in GAME_FIELDS}
 
@@ -289,7 +415,7 @@ class Importer:
                 print(f"  {key}: {rendered}")
 
     def _render_value(self, key: str, value: Any) -> str | None:
-        if value is None:
+        if value is None or key == "achievements_synced":
             return None
         if key == "achievements" and isinstance(value, list):
             return f"[{len(value)} achievements]"
@@ -354,7 +480,9 @@ class Importer:
         merged = self._merge_missing_fields(current, candidate.fields)
         merged["id"] = existing.id
         fields = [field for field in GAME_FIELDS if field != "id"]
+        achievements = _achievement_fields(candidate, candidates)
         if not diff_item(current, proposed, fields):
+            self._apply_achievements(existing.id, achievements)
             return 0, False
         if len(candidates) == 1:
             self._print_fields("Current entry", current)
@@ -370,17 +498,11 @@ class Importer:
                 return 0, False
             if choice == "a":
                 updated = self._apply_diff(existing.id, current, proposed, fields)
-                if updated:
-                    self._apply_achievements(
-                        existing.id, candidate.fields.get("achievements")
-                    )
+                self._apply_achievements(existing.id, achievements)
                 return (1 if updated else 0), False
             if choice == "m":
                 updated = self._apply_diff(existing.id, current, merged, fields)
-                if updated:
-                    self._apply_achievements(
-                        existing.id, candidate.fields.get("achievements")
-                    )
+                self._apply_achievements(existing.id, achievements)
                 return (1 if updated else 0), False
             if choice == "i":
                 if self._ignore_import(current):
@@ -411,10 +533,13 @@ class Importer:
         return 0, False
 
     def _produce(self, task_source: Iterable[ImportTask]) -> None:
-        for task in task_source:
-            self._in_q.put(task)
-        for _ in range(self.threads):
-            self._in_q.put(None)
+        try:
+            for task in task_source:
+                if not self._put(self._in_q, task):
+                    return
+        finally:
+            for _ in range(self.threads):
+                self._put(self._in_q, None)
 
     def run(self, task_source: Iterable[ImportTask]) -> tuple[int, int]:
         return self.run_with_hooks(task_source)
@@ -427,103 +552,254 @@ class Importer:
         on_existing: Any | None = None,
         tick: Any | None = None,
     ) -> tuple[int, int]:
-        workers = [
-            threading.Thread(target=self._worker, daemon=True)
-            for _ in range(self.threads)
-        ]
-        for worker in workers:
-            worker.start()
-        producer = threading.Thread(
-            target=self._produce, args=(task_source,), daemon=True
+        self._stop.clear()
+        if self.engine == "async":
+            threading.Thread(
+                target=asyncio.run, args=(self._fetch_async(task_source),), daemon=True
+            ).start()
+        else:
+            workers = [
+                threading.Thread(target=self._worker, daemon=True)
+                for _ in range(self.threads)
+            ]
+            for worker in workers:
+                worker.start()
+            producer = threading.Thread(
+                target=self._produce, args=(task_source,), daemon=True
+            )
+            producer.start()
+        try:
+            return self._consume(on_imported, on_existing, tick)
+        finally:
+            self._stop.set()
+
+    def _choose(
+        self,
+        task: ImportTask,
+        candidates: List[ImportCandidate],
+        on_imported: Any | None,
+    ) -> str:
+        selected = 0
+        while True:
+            action, selected = self._prompt(task, candidates, selected)
+            if action == "m":
+                candidates = self._with_late_candidates(task, candidates)
+                continue
+            if action == "a":
+                self._add_game(candidates[selected].fields, on_imported)
+                self._record(task, "accept", candidates, candidates[selected])
+                return "a"
+            if action == "s":
+                self._record(task, "skip")
+                return "s"
+            if action == "i":
+                if self._ignore_import(task.original):
+                    self._record(task, "ignore")
+                    return "i"
+                continue
+            if action == "e":
+                try:
+                    edited = self._edit_candidate(candidates[selected])
+                except Exception as exc:
+                    print(error(f"Edit failed: {exc}"))
+                    continue
+                print(info("Changes:"))
+                changed = show_model_changes(
+                    candidates[selected].fields,
+                    edited.fields,
+                    GAME_FIELDS,
+                    header="candidate",
+                )
+                if not changed:
+                    print(info("No changes to apply."))
+                    continue
+                if not input_yn("Apply edited changes? (Y/n)", require=False):
+                    continue
+                self._add_game(edited.fields, on_imported)
+                self._record(task, "accept", fields=edited.fields)
+                return "a"
+            if action == "q":
+                return "q"
+            print(warning("Unknown choice."))
+            continue
+
+    def _record(
+        self,
+        task: ImportTask,
+        action: str,
+        candidates: List[ImportCandidate] | None = None,
+        candidate: ImportCandidate | None = None,
+        fields: Dict[str, Any] | None = None,
+    ) -> None:
+        path = task.original.get("path")
+        if self.recorder is None or not path:
+            return
+        source = rank = identity = None
+        if candidate is not None and candidates is not None:
+            source = candidate.source
+            same_source = [c for c in candidates if c.source == source]
+            rank = next(i for i, c in enumerate(same_source) if c is candidate)
+            identity = candidate_identity(candidate.fields)
+        self.recorder.record(
+            str(path),
+            action,
+            source=source,
+            rank=rank,
+            identity=identity,
+            fields=fields,
+        )
+
+    def _replay(
+        self,
+        task: ImportTask,
+        candidates: List[ImportCandidate],
+        on_imported: Any | None,
+    ) -> str | None:
+        path = task.original.get("path")
+        entry = self.decisions.get(str(path)) if path else None
+        if entry is None:
+            return None
+        action = entry["action"]
+        if action == "skip":
+            self._record(task, "skip")
+            return "s"
+        if action == "ignore":
+            if not self._ignore_import(task.original):
+                return None
+            self._record(task, "ignore")
+            return "i"
+        fields = entry.get("fields")
+        if isinstance(fields, dict):
+            self._add_game(fields, on_imported)
+            self._record(task, "accept", fields=fields)
+            return "a"
+        identity = entry.get("identity")
+        same_source = [c for c in candidates if c.source == entry.get("source")]
+        rank = entry.get("rank") or 0
+        if isinstance(rank, int) and rank < len(same_source):
+            # Search results can be reordered, so the recorded rank is only
+            # tried first; the candidate must still have the same identity.
+            same_source.insert(0, same_source.pop(rank))
+        elif identity is None:
+            same_source = []
+        chosen = next(
+            (
+                c
+                for c in same_source
+                if identity is None or candidate_identity(c.fields) == identity
+            ),
+            None,
+        )
+        if chosen is None:
+            print(warning(f"Recorded candidate for {path} is no longer available."))
+            return None
+        self._add_game(chosen.fields, on_imported)
+        self._record(task, "accept", candidates, chosen)
+        return "a"
+
+    def _defer(self, task: ImportTask, candidates: List[ImportCandidate]) -> None:
+        self.library.add_pending_import(
+            task.original,
+            [{"source": c.source, "fields": c.fields} for c in candidates],
         )
-        producer.start()
+        self.deferred += 1
 
+    def review(self, on_imported: Any | None = None) -> tuple[int, int]:
+        completed = 0
+        reviewed = 0
+        for entry in self.library.list_pending_imports():
+            path = entry["path"]
+            if path and self.library.get_game_by_path(str(path)):
+                self.library.remove_pending_import(entry["id"])
+                continue
+            task = ImportTask(original=entry["original"])
+            candidates = [
+                ImportCandidate(fields=item["fields"], source=item["source"])
+                for item in entry["candidates"]
+            ]
+            outcome = self._choose(task, candidates, on_imported)
+            if outcome == "q":
+                break
+            reviewed += 1
+            if outcome == "s":
+                continue
+            self.library.remove_pending_import(entry["id"])
+            if outcome == "a":
+                completed += 1
+        return completed, reviewed
+
+    def _consume(
+        self,
+        on_imported: Any | None,
+        on_existing: Any | None,
+        tick: Any | None,
+    ) -> tuple[int, int]:
         completed = 0
         updated = 0
         done_workers = 0
-        while done_workers < self.threads:
-            item = self._out_q.get()
+        while done_workers < self._fetchers:
+            item = self._get(self._out_q)
             if item is None:
                 done_workers += 1
                 continue
             task, candidates = item
-            candidates = _sort_candidates(task.original, candidates)
-
-            path = task.original.get("path")
-            existing = self.library.get_game_by_path(str(path)) if path else None
-            if existing:
-                if on_existing is not None:
-                    on_existing(existing)
-                if not self.prompt_existing:
-                    if self._apply_updates(
-                        existing.id, task.original, {"path", "title"}
-                    ):
-                        updated += 1
-                    self._apply_achievements(
-                        existing.id, task.original.get("achievements")
+            candidates = self._with_late_candidates(task, candidates)
+            try:
+                path = task.original.get("path")
+                existing = self.library.get_game_by_path(str(path)) if path else None
+                if existing:
+                    if on_existing is not None:
+                        on_existing(existing)
+                    if self.quiet and self.prompt_existing:
+                        if self._update_unattended(existing, candidates):
+                            updated += 1
+                        continue
+                    if not self.prompt_existing:
+                        if self._apply_updates(
+                            existing.id, task.original, {"path", "title"}
+                        ):
+                            updated += 1
+                        self._apply_achievements(existing.id, task.original)
+                        continue
+                    updated_count, should_quit = self.prompt_existing_update(
+                        existing, candidates
                     )
+                    updated += updated_count
+                    if tick is not None:
+                        tick()
+                    if should_quit:
+                        return completed, updated
                     continue
-                updated_count, should_quit = self.prompt_existing_update(
-                    existing, candidates
-                )
-                updated += updated_count
-                if tick is not None:
-                    tick()
-                if should_quit:
-                    return completed, updated
-                continue
 
-            if not candidates:
-                continue
-            selected = 0
-            while True:
-                action, selected = self._prompt(task, candidates, selected)
-                if action == "m":
+                if not candidates:
                     continue
-                if action == "a":
-                    game = self.library.add_game(candidates[selected].fields)
-                    completed += 1
-                    self._apply_achievements(
-                        game.id, candidates[selected].fields.get("achievements")
-                    )
-                    if on_imported is not None:
-                        on_imported(game)
-                    break
-                if action == "s":
-                    break
-                if action == "i":
-                    if self._ignore_import(task.original):
-                        break
+                outcome = self._replay(task, candidates, on_imported)
+                if outcome is not None:
+                    if outcome == "a":
+                        completed += 1
                     continue
-                if action == "e":
-                    try:
-                        edited = self._edit_candidate(candidates[selected])
-                    except Exception as exc:
-                        print(error(f"Edit failed: {exc}"))
+                score = 0.0
+                if self.auto_accept is not None or self.quiet:
+                    candidate, score = self._auto_candidate(task.original, candidates)
+                    if candidate is not None:
+                        self._add_game(candidate.fields, on_imported)
+                        self._record(task, "accept", candidates, candidate)
+                        completed += 1
                         continue
-                    print(info("Changes:"))
-                    changed = show_model_changes(
-                        candidates[selected].fields,
-                        edited.fields,
-                        GAME_FIELDS,
-                        header="candidate",
-                    )
-                    if not changed:
-                        print(info("No changes to apply."))
-                        continue
-                    if not input_yn("Apply edited changes? (Y/n)", require=False):
-                        continue
-                    game = self.library.add_game(edited.fields)
+                if self.defer:
+                    self._defer(task, candidates)
+                    continue
+                if self.quiet:
+                    self._log_skip(task.original, score)
+                    continue
+                outcome = self._choose(task, candidates, on_imported)
+                if outcome == "a":
                     completed += 1
-                    self._apply_achievements(game.id, edited.fields.get("achievements"))
-                    if on_imported is not None:
-                        on_imported(game)
-                    break
-                if action == "q":
+                if outcome == "q":
                     return completed, updated
-                print(warning("Unknown choice."))
-                continue
-            if tick is not None:
-                tick()
+                if tick is not None:
+                    tick()
+            finally:
+                self._finish(task)
 
         return completed, updated
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Sequence
+
+from yamu.util.text import normalize_text
+
+
+SIMILARITY_FIELDS = (
+    "title",
+    "platform",
+    "release_date",
+    "genre",
+    "developer",
+    "publisher",
+    "region",
+)
+
+SIMILARITY_WEIGHTS = {
+    "title": 5.0,
+    "platform": 1.0,
+    "release_date": 1.0,
+    "genre": 1.0,
+    "developer": 1.0,
+    "publisher": 1.0,
+    "region": 1.0,
+}
+
+CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalized(value: str) -> str:
+    return normalize_text(value)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _char_counts(value: str) -> Counter[str]:
+    return Counter(value)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def pair_ratio(left: str, right: str) -> float:
+    if left == right:
+        return 1.0
+    if not left or not right:
+        return 0.0
+    return SequenceMatcher(a=left, b=right).ratio()
+
+
+def pair_bound(left: str, right: str) -> float:
+    if left == right:
+        return 1.0
+    if not left or not right:
+        return 0.0
+    common = sum((_char_counts(left) & _char_counts(right)).values())
+    return 2.0 * common / (len(left) + len(right))
+
+
+def _pairs(
+    base: Dict[str, Any], candidate: Dict[str, Any], fields: Sequence[str]
+) -> Iterable[tuple[str, str, str]]:
+    for field in fields:
+        left = base.get(field)
+        right = candidate.get(field)
+        if left in (None, "") or right in (None, ""):
+            continue
+        yield field, normalized(str(left)), normalized(str(right))
+
+
+class SimilarityScorer:
+    def __init__(
+        self,
+        fields: Sequence[str] = SIMILARITY_FIELDS,
+        weights: Dict[str, float] | None = None,
+    ) -> None:
+        self.fields = tuple(fields)
+        self.weights = SIMILARITY_WEIGHTS if weights is None else weights
+
+    def _combine(
+        self, base: Dict[str, Any], candidate: Dict[str, Any], ratio: Any
+    ) -> float:
+        weighted_score = 0.0
+        total_weight = 0.0
+        for field, left, right in _pairs(base, candidate, self.fields):
+            weight = self.weights.get(field, 1.0)
+            weighted_score += ratio(left, right) * weight
+            total_weight += weight
+        if total_weight:
+            return weighted_score / total_weight
+        return ratio(
+            normalized(str(base.get("title"))),
+            normalized(str(candidate.get("title"))),
+        )
+
+    def score(self, base: Dict[str, Any], candidate: Dict[str, Any]) -> float:
+        return self._combine(base, candidate, pair_ratio)
+
+    def bound(self, base: Dict[str, Any], candidate: Dict[str, Any]) -> float:
+        return self._combine(base, candidate, pair_bound)
+
+    def score_all(
+        self, base: Dict[str, Any], candidates: Sequence[Dict[str, Any]]
+    ) -> list[float]:
+        return [self.score(base, candidate) for candidate in candidates]
+
+    def best(
+        self, base: Dict[str, Any], candidates: Sequence[Dict[str, Any]]
+    ) -> tuple[int | None, float]:
+        bounds = sorted(
+            (
+                (self.bound(base, candidate), idx)
+                for idx, candidate in enumerate(candidates)
+            ),
+            reverse=True,
+        )
+        best_idx: int | None = None
+        best_score = 0.0
+        for bound, idx in bounds:
+            if best_idx is not None and bound < best_score:
+                break
+            score = self.score(base, candidates[idx])
+            if (
+                best_idx is None
+                or score > best_score
+                or (score == best_score and idx < best_idx)
+            ):
+                best_idx, best_score = idx, score
+        return best_idx, best_score
+
+
+scorer = SimilarityScorer()
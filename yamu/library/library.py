@@ -1,16 +1,132 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Sequence
 
 from yamu.dbcore.db import Database
 from yamu.dbcore.query import Query, AndQuery
 from yamu.library.models import Game, GAME_FIELDS, sanitize_fields
+from yamu.util.query import build_game_query
+from yamu.util.text import (
+    fuzzy_similarity,
+    normalize_text,
+    sort_text,
+    trigram_match,
+)
+
+
+ATTACH_TABLES = {"games", "games_fts", "collection_members", "achievements"}
+ATTACH_COLUMNS = {"title_norm", "title_sort"}
+
+
+def _source_name(path: str, taken: set[str]) -> str:
+    base = re.sub(r"[^A-Za-z0-9_]+", "_", Path(path).stem).strip("_") or "library"
+    if base.lower() in {"main", "temp"}:
+        base = f"{base}_db"
+    name = base
+    suffix = 2
+    while name in taken:
+        name = f"{base}_{suffix}"
+        suffix += 1
+    taken.add(name)
+    return name
+
+
+def _title_keys(title: Any) -> dict[str, str]:
+    return {
+        "title_norm": normalize_text(title or ""),
+        "title_sort": sort_text(title or ""),
+    }
 
 
 class Library:
-    def __init__(self, path: str) -> None:
-        self.db = Database(path)
-        self._ensure_schema()
+    def __init__(
+        self,
+        path: str,
+        mode: str = "rw",
+        checkpoint_interval: float = 0,
+        attach: Sequence[str] = (),
+    ) -> None:
+        self.db = Database(path, mode=mode, checkpoint_interval=checkpoint_interval)
+        self.db.create_function("similarity", 2, fuzzy_similarity, deterministic=True)
+        # Without FTS5, games_fts is a plain view and MATCH falls back to this.
+        self.db.create_function("match", 2, trigram_match, deterministic=True)
+        self._title_index = True
+        if not self.db.readonly:
+            self._ensure_schema()
+        self.attached = [str(extra) for extra in attach]
+        taken: set[str] = set()
+        self.sources: list[tuple[str, str]] = [(_source_name(path, taken), "main")]
+        for extra in self.attached:
+            name = _source_name(extra, taken)
+            self.db.attach(extra, name)
+            self._check_attached(extra, name)
+            self.sources.append((name, name))
+        self._source_selects = self._build_source_selects()
+        self._collection_clauses: dict[str, tuple[str, list[Any]]] | None = None
+
+    @property
+    def federated(self) -> bool:
+        return len(self.sources) > 1
+
+    def _check_attached(self, path: str, schema: str) -> None:
+        rows = self.db.query(f'SELECT name FROM "{schema}".sqlite_master')
+        tables = {row["name"] for row in rows}
+        columns = set(self.db.columns("games", schema))
+        if not ATTACH_TABLES <= tables or not ATTACH_COLUMNS <= columns:
+            raise ValueError(
+                f"{path} uses an older library schema; "
+                f"open it once with 'yamu --db {path} ls' to upgrade it"
+            )
+
+    def _schema(self, source: str | None) -> str | None:
+        if source is None:
+            return "main"
+        for name, schema in self.sources:
+            if name == source:
+                return schema
+        return None
+
+    def _build_source_selects(self) -> list[str]:
+        if not self.federated:
+            return []
+        columns = self.db.columns("games")
+        selects = []
+        for name, schema in self.sources:
+            present = set(self.db.columns("games", schema))
+            rendered = ", ".join(
+                column if column in present else f"NULL AS {column}"
+                for column in columns
+            )
+            selects.append(
+                f"SELECT '{name}' AS source, {rendered} FROM \"{schema}\".games"
+            )
+        return selects
+
+    def _games_sql(
+        self, query: Query, main_only: bool = False
+    ) -> tuple[str, list[Any]]:
+        if main_only or not self.federated:
+            clause, params = query.clause()
+            sql = f"SELECT * FROM games WHERE {clause}"
+            params = list(params)
+        else:
+            branches = []
+            params = []
+            for (_, schema), select in zip(self.sources, self._source_selects):
+                clause, branch_params = query.clause(schema)
+                branches.append(f"SELECT * FROM ({select}) WHERE {clause}")
+                params.extend(branch_params)
+            sql = f"SELECT * FROM ({' UNION ALL '.join(branches)})"
+        order = query.order()
+        if order is None:
+            return f"{sql} ORDER BY title_sort, id", params
+        order_sql, order_params = order
+        return f"{sql} ORDER BY {order_sql}, title_sort", params + list(order_params)
 
     def _ensure_schema(self) -> None:
         self.db.execute(
@@ -54,8 +170,12 @@ class Library:
                 "release_date": "TEXT",
                 "igdb_rating": "REAL",
                 "critic_rating": "REAL",
+                "title_norm": "TEXT",
+                "title_sort": "TEXT",
+                "achievements_synced": "TEXT",
             }
         )
+        self._ensure_title_keys()
         self.db.execute(
             """
             CREATE TABLE IF NOT EXISTS achievements (
@@ -72,6 +192,122 @@ class Library:
             )
             """
         )
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS collections (
+                name TEXT PRIMARY KEY,
+                query TEXT NOT NULL
+            )
+            """
+        )
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS collection_members (
+                collection TEXT NOT NULL,
+                game_id INTEGER NOT NULL,
+                PRIMARY KEY (collection, game_id)
+            )
+            """
+        )
+        self.db.execute(
+            """
+            CREATE INDEX IF NOT EXISTS collection_members_game
+            ON collection_members (game_id)
+            """
+        )
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pending_imports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT UNIQUE,
+                original TEXT NOT NULL,
+                candidates TEXT NOT NULL,
+                added REAL NOT NULL
+            )
+            """
+        )
+        self._ensure_title_index()
+
+    def _ensure_title_index(self) -> None:
+        rows = self.db.query("SELECT type FROM sqlite_master WHERE name = 'games_fts'")
+        kind = rows[0]["type"] if rows else None
+        if kind == "table":
+            return
+        if not self._trigram_supported():
+            self._title_index = False
+            if kind is None:
+                self.db.execute(
+                    """
+                    CREATE VIEW games_fts AS
+                    SELECT id AS rowid, title_norm AS title FROM games
+                    """
+                )
+            return
+        if kind == "view":
+            self.db.execute("DROP VIEW games_fts")
+        self.db.execute(
+            "CREATE VIRTUAL TABLE games_fts USING fts5(title, tokenize='trigram')"
+        )
+        with self.db.transaction():
+            self.db.execute(
+                """
+                INSERT INTO games_fts (rowid, title)
+                SELECT id, COALESCE(title_norm, '') FROM games
+                """
+            )
+
+    def _trigram_supported(self) -> bool:
+        try:
+            self.db.execute(
+                "CREATE VIRTUAL TABLE temp.trigram_probe "
+                "USING fts5(title, tokenize='trigram')"
+            )
+        except sqlite3.OperationalError:
+            return False
+        self.db.execute("DROP TABLE temp.trigram_probe")
+        return True
+
+    def _index_title(self, game_id: int, title_norm: str) -> None:
+        if not self._title_index:
+            return
+        self.db.execute("DELETE FROM games_fts WHERE rowid = ?", [game_id])
+        self.db.execute(
+            "INSERT INTO games_fts (rowid, title) VALUES (?, ?)",
+            [game_id, title_norm],
+        )
+
+    def _ensure_title_keys(self) -> None:
+        # Older versions reduced every non-ASCII character to a space, so
+        # those titles are keyed again as well.
+        rows = self.db.query(
+            "SELECT id, title, title_norm FROM games "
+            "WHERE title_norm IS NULL OR title GLOB ?",
+            ["*[^ -~]*"],
+        )
+        updates = []
+        for row in rows:
+            keys = _title_keys(row["title"])
+            if keys["title_norm"] != row["title_norm"]:
+                updates.append((keys["title_norm"], keys["title_sort"], row["id"]))
+        if updates:
+            fts = self.db.query(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE name = 'games_fts' AND type = 'table'"
+            )
+            with self.db.transaction():
+                self.db.executemany(
+                    "UPDATE games SET title_norm = ?, title_sort = ? WHERE id = ?",
+                    updates,
+                )
+                if fts:
+                    for title_norm, _, game_id in updates:
+                        self._index_title(game_id, title_norm)
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS games_title_norm ON games (title_norm)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS games_title_sort ON games (title_sort)"
+        )
 
     def _ensure_columns(self, columns: dict[str, str]) -> None:
         rows = self.db.query("PRAGMA table_info(games)")
@@ -85,6 +321,7 @@ class Library:
         fields = sanitize_fields(data, GAME_FIELDS)
         if "title" not in fields or not fields["title"]:
             raise ValueError("title is required")
+        fields.update(_title_keys(fields["title"]))
         columns = ", ".join(fields.keys())
         placeholders = ", ".join(["?"] * len(fields))
         values = list(fields.values())
@@ -93,15 +330,22 @@ class Library:
                 f"INSERT INTO games ({columns}) VALUES ({placeholders})",
                 values,
             )
-        game_id = cur.lastrowid
+            game_id = cur.lastrowid
+            self._index_title(game_id, fields["title_norm"])
+            self._update_memberships(game_id)
         row = self.db.query("SELECT * FROM games WHERE id = ?", [game_id])[0]
         return Game.from_row(dict(row))
 
-    def get_game(self, game_id: int) -> Game | None:
-        rows = self.db.query("SELECT * FROM games WHERE id = ?", [game_id])
+    def get_game(self, game_id: int, source: str | None = None) -> Game | None:
+        schema = self._schema(source)
+        if schema is None:
+            return None
+        rows = self.db.query(f'SELECT * FROM "{schema}".games WHERE id = ?', [game_id])
         if not rows:
             return None
-        return Game.from_row(dict(rows[0]))
+        game = Game.from_row(dict(rows[0]))
+        game.source = source
+        return game
 
     def get_game_by_path(self, path: str) -> Game | None:
         rows = self.db.query("SELECT * FROM games WHERE path = ? LIMIT 1", [path])
@@ -109,11 +353,35 @@ class Library:
             return None
         return Game.from_row(dict(rows[0]))
 
-    def list_games(self, query: Query | None = None) -> list[Game]:
+    def list_games(
+        self, query: Query | None = None, main_only: bool = False
+    ) -> list[Game]:
         if query is None:
             query = AndQuery([])
-        clause, params = query.clause()
-        rows = self.db.query(f"SELECT * FROM games WHERE {clause}", params)
+        sql, params = self._games_sql(query, main_only)
+        rows = self.db.query(sql, params)
+        return [Game.from_row(dict(row)) for row in rows]
+
+    def explain_games(self, query: Query) -> dict[str, Any]:
+        sql, params = self._games_sql(query)
+        plan = self.db.explain(sql, params)
+        start = time.perf_counter()
+        rows = self.db.query(sql, params)
+        return {
+            "sql": sql,
+            "params": params,
+            "plan": plan,
+            "rows": len(rows),
+            "seconds": time.perf_counter() - start,
+        }
+
+    def find_games_by_title(self, title: str) -> list[Game]:
+        key = normalize_text(title)
+        if not key:
+            return []
+        rows = self.db.query(
+            "SELECT * FROM games WHERE title_norm = ? ORDER BY id", [key]
+        )
         return [Game.from_row(dict(row)) for row in rows]
 
     def list_games_missing_status(self) -> list[Game]:
@@ -124,10 +392,16 @@ class Library:
         fields = sanitize_fields(changes, GAME_FIELDS)
         if not fields:
             return self.get_game(game_id)
+        if "title" in fields:
+            fields.update(_title_keys(fields["title"]))
         set_clause = ", ".join([f"{key} = ?" for key in fields.keys()])
         values = list(fields.values()) + [game_id]
         with self.db.transaction():
-            self.db.execute(f"UPDATE games SET {set_clause} WHERE id = ?", values)
+            cur = self.db.execute(f"UPDATE games SET {set_clause} WHERE id = ?", values)
+            if "title" in fields and cur.rowcount:
+                self._index_title(game_id, fields["title_norm"])
+            if cur.rowcount:
+                self._update_memberships(game_id)
         return self.get_game(game_id)
 
     def set_status(self, game_id: int, status: str | None) -> Game | None:
@@ -135,42 +409,69 @@ class Library:
         return self.update_game(game_id, changes)
 
     def upsert_achievements(self, game_id: int, achievements: list[dict]) -> None:
+        self.upsert_achievements_many([(game_id, achievements)])
+
+    def upsert_achievements_many(self, items: Iterable[tuple[int, list[dict]]]) -> int:
         rows = []
-        for entry in achievements:
-            rows.append(
-                (
-                    game_id,
-                    entry.get("api_name"),
-                    entry.get("name"),
-                    entry.get("description"),
-                    entry.get("icon"),
-                    entry.get("icon_gray"),
-                    entry.get("achieved", 0),
-                    entry.get("unlock_time", 0),
+        for game_id, achievements in items:
+            for entry in achievements:
+                rows.append(
+                    (
+                        game_id,
+                        entry.get("api_name"),
+                        entry.get("name"),
+                        entry.get("description"),
+                        entry.get("icon"),
+                        entry.get("icon_gray"),
+                        entry.get("achieved", 0),
+                        entry.get("unlock_time", 0),
+                    )
                 )
+        if not rows:
+            return 0
+        with self.db.transaction():
+            self.db.executemany(
+                """
+                INSERT INTO achievements
+                    (game_id, api_name, name, description, icon, icon_gray,
+                     achieved, unlock_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(game_id, api_name)
+                DO UPDATE SET
+                    name=excluded.name,
+                    description=excluded.description,
+                    icon=excluded.icon,
+                    icon_gray=excluded.icon_gray,
+                    achieved=excluded.achieved,
+                    unlock_time=excluded.unlock_time
+                """,
+                rows,
             )
+        return len(rows)
+
+    def achievement_sync_tokens(self) -> dict[str, str]:
+        rows = self.db.query(
+            "SELECT path, achievements_synced FROM games "
+            "WHERE path IS NOT NULL AND achievements_synced IS NOT NULL"
+        )
+        return {row["path"]: row["achievements_synced"] for row in rows}
+
+    def mark_achievements_synced(self, items: Iterable[tuple[int, str]]) -> None:
+        rows = [(token, game_id) for game_id, token in items]
+        if not rows:
+            return
         with self.db.transaction():
-            for row in rows:
-                self.db.execute(
-                    """
-                    INSERT INTO achievements
-                        (game_id, api_name, name, description, icon, icon_gray, achieved, unlock_time)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(game_id, api_name)
-                    DO UPDATE SET
-                        name=excluded.name,
-                        description=excluded.description,
-                        icon=excluded.icon,
-                        icon_gray=excluded.icon_gray,
-                        achieved=excluded.achieved,
-                        unlock_time=excluded.unlock_time
-                    """,
-                    row,
-                )
+            self.db.executemany(
+                "UPDATE games SET achievements_synced = ? WHERE id = ?", rows
+            )
 
-    def list_achievements(self, game_id: int) -> list[dict]:
+    def list_achievements(self, game_id: int, source: str | None = None) -> list[dict]:
+        schema = self._schema(source)
+        if schema is None:
+            return []
         rows = self.db.query(
-            "SELECT * FROM achievements WHERE game_id = ? ORDER BY achieved DESC, name",
+            f'SELECT * FROM "{schema}".achievements WHERE game_id = ? '
+            "ORDER BY achieved DESC, name",
             [game_id],
         )
         return [dict(row) for row in rows]
@@ -178,6 +479,11 @@ class Library:
     def remove_game(self, game_id: int) -> bool:
         with self.db.transaction():
             self.db.execute("DELETE FROM achievements WHERE game_id = ?", [game_id])
+            if self._title_index:
+                self.db.execute("DELETE FROM games_fts WHERE rowid = ?", [game_id])
+            self.db.execute(
+                "DELETE FROM collection_members WHERE game_id = ?", [game_id]
+            )
             cur = self.db.execute("DELETE FROM games WHERE id = ?", [game_id])
         return cur.rowcount > 0
 
@@ -196,5 +502,138 @@ class Library:
         rows = self.db.query("SELECT path FROM ignored_imports")
         return {str(row["path"]) for row in rows if row["path"]}
 
+    def add_pending_import(
+        self, original: Dict[str, Any], candidates: list[dict[str, Any]]
+    ) -> None:
+        path = original.get("path")
+        with self.db.transaction():
+            self.db.execute(
+                """
+                INSERT INTO pending_imports (path, original, candidates, added)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    original = excluded.original,
+                    candidates = excluded.candidates,
+                    added = excluded.added
+                """,
+                [
+                    str(path) if path else None,
+                    json.dumps(original, default=str),
+                    json.dumps(candidates, default=str),
+                    time.time(),
+                ],
+            )
+
+    def list_pending_imports(self) -> list[dict[str, Any]]:
+        if not self.db.columns("pending_imports"):
+            return []
+        rows = self.db.query(
+            "SELECT id, path, original, candidates, added FROM pending_imports"
+            " ORDER BY id"
+        )
+        return [
+            {
+                "id": row["id"],
+                "path": row["path"],
+                "original": json.loads(row["original"]),
+                "candidates": json.loads(row["candidates"]),
+                "added": row["added"],
+            }
+            for row in rows
+        ]
+
+    def remove_pending_import(self, pending_id: int) -> bool:
+        with self.db.transaction():
+            cur = self.db.execute(
+                "DELETE FROM pending_imports WHERE id = ?", [pending_id]
+            )
+        return cur.rowcount > 0
+
+    def _compile_collection(self, parts: list[str]) -> tuple[str, list[Any]]:
+        query, _ = build_game_query(parts, extra_fields={"artpath"})
+        clause, params = query.clause()
+        return clause, list(params)
+
+    def _collection_queries(self) -> dict[str, tuple[str, list[Any]]]:
+        if self._collection_clauses is None:
+            self._collection_clauses = {
+                name: self._compile_collection(parts)
+                for name, parts in self.list_collections().items()
+            }
+        return self._collection_clauses
+
+    def _update_memberships(self, game_id: int) -> None:
+        for name, (clause, params) in self._collection_queries().items():
+            rows = self.db.query(
+                f"SELECT 1 FROM games WHERE id = ? AND ({clause})",
+                [game_id, *params],
+            )
+            if rows:
+                self.db.execute(
+                    """
+                    INSERT OR IGNORE INTO collection_members (collection, game_id)
+                    VALUES (?, ?)
+                    """,
+                    [name, game_id],
+                )
+            else:
+                self.db.execute(
+                    "DELETE FROM collection_members "
+                    "WHERE collection = ? AND game_id = ?",
+                    [name, game_id],
+                )
+
+    def _refresh_collection(self, name: str, clause: str, params: list[Any]) -> int:
+        self.db.execute("DELETE FROM collection_members WHERE collection = ?", [name])
+        cur = self.db.execute(
+            f"""
+            INSERT INTO collection_members (collection, game_id)
+            SELECT ?, id FROM games WHERE {clause}
+            """,
+            [name, *params],
+        )
+        return cur.rowcount
+
+    def save_collection(self, name: str, parts: list[str]) -> int:
+        if not name:
+            raise ValueError("collection name is required")
+        clause, params = self._compile_collection(parts)
+        with self.db.transaction():
+            self.db.execute(
+                """
+                INSERT INTO collections (name, query) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET query = excluded.query
+                """,
+                [name, json.dumps(list(parts))],
+            )
+            count = self._refresh_collection(name, clause, params)
+        self._collection_clauses = None
+        return count
+
+    def list_collections(self) -> dict[str, list[str]]:
+        rows = self.db.query("SELECT name, query FROM collections ORDER BY name")
+        return {str(row["name"]): json.loads(row["query"]) for row in rows}
+
+    def refresh_collections(self, name: str | None = None) -> dict[str, int]:
+        collections = self._collection_queries()
+        if name is not None:
+            if name not in collections:
+                raise ValueError(f"Unknown collection: {name}")
+            collections = {name: collections[name]}
+        counts: dict[str, int] = {}
+        with self.db.transaction():
+            for entry, (clause, params) in collections.items():
+                counts[entry] = self._refresh_collection(entry, clause, params)
+        return counts
+
+    def remove_collection(self, name: str) -> bool:
+        with self.db.transaction():
+            self.db.execute(
+                "DELETE FROM collection_members WHERE collection = ?", [name]
+            )
+            cur = self.db.execute("DELETE FROM collections WHERE name = ?", [name])
+        self._collection_clauses = None
+        return cur.rowcount > 0
+
     def close(self) -> None:
         self.db.close()
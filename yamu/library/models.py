@@ -37,6 +37,7 @@ class Game:
     artpath: str | None = None
     igdb_rating: float | None = None
     critic_rating: float | None = None
+    source: str | None = None
 
     @classmethod
     def from_row(cls, row: Dict[str, Any]) -> "Game":
@@ -55,6 +56,7 @@ class Game:
             artpath=row["artpath"],
             igdb_rating=row["igdb_rating"],
             critic_rating=row["critic_rating"],
+            source=row.get("source"),
         )
 
 
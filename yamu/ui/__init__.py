@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from typing import Callable
 
+from yamu.dbcore.db import DatabaseChanged
 from yamu.library.library import Library
+from yamu.util.color import error
 from yamu.util.config import load_config
 from yamu.ui.commands import (
+    achievements,
     add,
     list_,
     update,
@@ -15,6 +19,8 @@ from yamu.ui.commands import (
     completion,
     web,
     fetchart,
+    db,
+    collection,
 )
 from yamuplug import load_plugins
 
@@ -24,7 +30,16 @@ CommandFunc = Callable[[argparse.Namespace, Library], int]
 
 def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="yamu", description="Game library manager")
-    parser.add_argument("--db", help="Override library database path")
+    parser.add_argument(
+        "--db",
+        action="append",
+        help="Override library database path; repeat to search several libraries",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Work on an in-memory copy of the library and save it on exit",
+    )
 
     config = load_config()
     load_plugins(config.get("plugins", []))
@@ -37,12 +52,16 @@ def _build_parser() -> argparse.ArgumentParser:
     remove.add_subparser(subparsers)
     import_.add_subparser(subparsers)
     edit.add_subparser(subparsers)
+    db.add_subparser(subparsers)
+    collection.add_subparser(subparsers)
     if "completion" in enabled:
         completion.add_subparser(subparsers)
     if "web" in enabled:
         web.add_subparser(subparsers)
     if "fetchart" in enabled:
         fetchart.add_subparser(subparsers)
+    if "steam" in enabled:
+        achievements.add_subparser(subparsers)
 
     return parser
 
@@ -51,9 +70,29 @@ def main(argv: list[str] | None = None) -> int:
     parser = _build_parser()
     args = parser.parse_args(argv)
     config = load_config()
-    db_path = args.db or config["library"]["path"]
-    library = Library(db_path)
+    library_cfg = config["library"]
+    if args.db:
+        db_path, *attach = args.db
+    else:
+        db_path = library_cfg["path"]
+        attach = library_cfg.get("attach", [])
+    mode = "memory" if args.memory else str(library_cfg.get("mode", "rw"))
+    interval = float(library_cfg.get("checkpoint_interval", 0) or 0)
+    library = Library(db_path, mode=mode, checkpoint_interval=interval, attach=attach)
+    slow_query_ms = float(library_cfg.get("slow_query_ms", 0) or 0)
+    query_stats = bool(library_cfg.get("query_stats", False))
+    if slow_query_ms > 0 or query_stats:
+        library.db.instrument(slow_query_ms)
+    status = 1
     try:
-        return args.func(args, library)
+        status = args.func(args, library)
     finally:
-        library.close()
+        if query_stats:
+            for line in library.db.format_stats():
+                print(line, file=sys.stderr)
+        try:
+            library.close()
+        except DatabaseChanged as exc:
+            print(error(str(exc)))
+            status = 1
+    return status
@@ -9,4 +9,6 @@ __all__ = [
     "completion",
     "web",
     "fetchart",
+    "db",
+    "collection",
 ]
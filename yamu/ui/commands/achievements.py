@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import argparse
+
+from yamu.library.library import Library
+from yamu.util.color import error, info, success
+from yamu.util.config import load_config
+from yamu.util.http_client import HttpError
+from yamu.util.query import build_game_query
+from yamuplug.steam import (
+    STEAM_API_HOST,
+    SteamError,
+    get_api_key,
+    get_steam_ids,
+    import_achievements,
+)
+
+
+def add_subparser(subparsers: argparse._SubParsersAction) -> None:
+    parser = subparsers.add_parser("achievements", help="Manage Steam achievements")
+    commands = parser.add_subparsers(dest="achievements_command", required=True)
+
+    sync = commands.add_parser("sync", help="Refresh achievements from Steam")
+    sync.add_argument("query", nargs="*", help="Query parts (field:value or terms)")
+    sync.add_argument("--threads", type=int, default=4)
+    sync.add_argument(
+        "--rate",
+        type=float,
+        metavar="REQUESTS",
+        help="Steam Web API requests per second",
+    )
+    sync.add_argument("--steam-id", help="SteamID64 (default: first steam.steam_ids)")
+    sync.set_defaults(func=run_sync)
+
+
+def _with_rate(config: dict, rate: float) -> dict:
+    steam = dict(config.get("steam") or {})
+    limits = dict(steam.get("rate_limits") or {})
+    limits[STEAM_API_HOST] = {
+        **(limits.get(STEAM_API_HOST) or {}),
+        "requests": rate,
+        "per": 1,
+    }
+    steam["rate_limits"] = limits
+    return {**config, "steam": steam}
+
+
+def run_sync(args: argparse.Namespace, library: Library) -> int:
+    config = load_config()
+    if args.rate is not None:
+        if args.rate <= 0:
+            print(error("--rate must be positive"))
+            return 1
+        config = _with_rate(config, args.rate)
+    steam_ids = [args.steam_id] if args.steam_id else get_steam_ids(config)
+    if not steam_ids:
+        print(error("No Steam ID configured; set steam.steam_ids or pass --steam-id"))
+        return 1
+    api_key = get_api_key(config)
+    if not api_key:
+        print(error("STEAM_API_KEY is required to sync achievements"))
+        return 1
+
+    query, _ = build_game_query(args.query)
+    games = library.list_games(query, main_only=True)
+    try:
+        report = import_achievements(
+            library,
+            steam_ids[0],
+            api_key,
+            games,
+            config,
+            workers=args.threads or 1,
+        )
+    except (SteamError, HttpError) as exc:
+        print(error(str(exc)))
+        return 1
+
+    for title, message in report.errors:
+        print(error(f"{title}: {message}"))
+    print(
+        success(
+            f"Synced achievements for {report.updated} of {report.games} games "
+            f"({report.rows} achievements) in {report.elapsed:.1f}s "
+            f"({report.rate:.1f} games/s)"
+        )
+    )
+    if report.unchanged:
+        print(info(f"{report.unchanged} games unchanged since the last sync"))
+    if report.errors:
+        print(error(f"{len(report.errors)} games failed"))
+        return 1
+    return 0
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import shlex
+
+from yamu.library.library import Library
+from yamu.util.color import error, info, success
+
+
+def add_subparser(subparsers: argparse._SubParsersAction) -> None:
+    parser = subparsers.add_parser(
+        "collection", help="Manage smart collections (saved queries)"
+    )
+    commands = parser.add_subparsers(dest="collection_command", required=True)
+
+    save = commands.add_parser("save", help="Save a query as a collection")
+    save.add_argument("name")
+    save.add_argument("query", nargs="*", help="Query parts (field:value or terms)")
+    save.set_defaults(func=run_save)
+
+    list_parser = commands.add_parser("list", aliases=("ls",), help="List collections")
+    list_parser.set_defaults(func=run_list)
+
+    refresh = commands.add_parser("refresh", help="Rebuild collection membership")
+    refresh.add_argument("name", nargs="?")
+    refresh.set_defaults(func=run_refresh)
+
+    remove = commands.add_parser("remove", aliases=("rm",), help="Remove a collection")
+    remove.add_argument("name")
+    remove.set_defaults(func=run_remove)
+
+
+def run_save(args: argparse.Namespace, library: Library) -> int:
+    try:
+        count = library.save_collection(args.name, args.query)
+    except ValueError as exc:
+        print(error(str(exc)))
+        return 1
+    print(success(f"Saved collection {args.name} with {count} games"))
+    return 0
+
+
+def run_list(args: argparse.Namespace, library: Library) -> int:
+    collections = library.list_collections()
+    if not collections:
+        print(info("No collections saved"))
+        return 0
+    for name, parts in collections.items():
+        print(f"{name}: {shlex.join(parts)}")
+    return 0
+
+
+def run_refresh(args: argparse.Namespace, library: Library) -> int:
+    try:
+        counts = library.refresh_collections(args.name)
+    except ValueError as exc:
+        print(error(str(exc)))
+        return 1
+    for name, count in counts.items():
+        print(success(f"Refreshed {name}: {count} games"))
+    return 0
+
+
+def run_remove(args: argparse.Namespace, library: Library) -> int:
+    if not library.remove_collection(args.name):
+        print(error(f"No collection named {args.name}"))
+        return 1
+    print(success(f"Removed collection {args.name}"))
+    return 0
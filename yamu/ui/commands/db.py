@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+
+from yamu.dbcore.db import BACKUP_PAGES, BACKUP_SLEEP
+from yamu.library.library import Library
+from yamu.util.color import error, info, success
+
+
+def add_subparser(subparsers: argparse._SubParsersAction) -> None:
+    parser = subparsers.add_parser("db", help="Maintain the library database")
+    commands = parser.add_subparsers(dest="db_command", required=True)
+
+    backup = commands.add_parser("backup", help="Back up a live library")
+    backup.add_argument("dest", help="Destination file, or :memory:")
+    backup.add_argument(
+        "--pages",
+        type=int,
+        default=BACKUP_PAGES,
+        help=f"Pages copied per step (default: {BACKUP_PAGES})",
+    )
+    backup.add_argument(
+        "--sleep",
+        type=float,
+        default=BACKUP_SLEEP,
+        help=f"Seconds to pause between steps (default: {BACKUP_SLEEP})",
+    )
+    backup.set_defaults(func=run_backup)
+
+    optimize = commands.add_parser(
+        "optimize", help="Analyze and vacuum the library database"
+    )
+    optimize.set_defaults(func=run_optimize)
+
+
+def _format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def run_backup(args: argparse.Namespace, library: Library) -> int:
+    if args.pages == 0 or args.sleep < 0:
+        print(error("--pages must be non-zero and --sleep non-negative"))
+        return 1
+    start = time.perf_counter()
+    try:
+        if args.dest == ":memory:":
+            target = sqlite3.connect(":memory:")
+            try:
+                library.db.backup(target, pages=args.pages, sleep=args.sleep)
+                page_count = target.execute("PRAGMA page_count").fetchone()[0]
+            finally:
+                target.close()
+        else:
+            library.db.backup(args.dest, pages=args.pages, sleep=args.sleep)
+            page_count = None
+    except (OSError, sqlite3.Error) as exc:
+        print(error(f"Backup failed: {exc}"))
+        return 1
+    elapsed = time.perf_counter() - start
+    if page_count is not None:
+        print(info(f"Copied {page_count} pages into memory"))
+    print(
+        success(
+            f"Backed up {_format_size(library.db.size())} to {args.dest} "
+            f"in {elapsed:.2f}s"
+        )
+    )
+    return 0
+
+
+def run_optimize(args: argparse.Namespace, library: Library) -> int:
+    try:
+        stats = library.db.optimize()
+    except sqlite3.Error as exc:
+        print(error(f"Optimize failed: {exc}"))
+        return 1
+    print(
+        success(
+            f"Optimized library: {_format_size(stats['size_before'])} -> "
+            f"{_format_size(stats['size_after'])} in {stats['seconds']:.2f}s"
+        )
+    )
+    return 0
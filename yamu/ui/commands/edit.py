@@ -24,7 +24,7 @@ def add_subparser(subparsers: argparse._SubParsersAction) -> None:
 
 def _select_games(args: argparse.Namespace, library: Library) -> List[Dict[str, Any]]:
     query, _ = build_game_query(args.query)
-    games = library.list_games(query)
+    games = library.list_games(query, main_only=True)
     items: List[Dict[str, Any]] = []
     for game in games:
         data = {field: getattr(game, field) for field in EDIT_FIELDS}
@@ -19,7 +19,7 @@ def add_subparser(subparsers: argparse._SubParsersAction) -> None:
 def run(args: argparse.Namespace, library: Library) -> int:
     config = load_config()
     query, _ = build_game_query(args.query, extra_fields={"status", "artpath"})
-    games = library.list_games(query)
+    games = library.list_games(query, main_only=True)
 
     if not games:
         print(info("No games matched"))
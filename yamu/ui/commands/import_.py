@@ -1,9 +1,29 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
 from types import SimpleNamespace
+from typing import Any
 
-from yamu.importer.pipeline import ImportCandidate, Importer
+from yamu.importer.decisions import DecisionRecorder, load_decisions
+from yamu.importer.health import (
+    DEFAULT_BREAKER_COOLDOWN,
+    DEFAULT_BREAKER_THRESHOLD,
+    ProviderHealth,
+    ProviderStats,
+    ProviderUnavailable,
+)
+from yamu.importer.pipeline import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_PREFETCH,
+    ENGINES,
+    ImportCandidate,
+    Importer,
+)
 from yamu.library.library import Library
 from yamu.util.color import error, info, success
 from yamu.util.config import load_config
@@ -11,6 +31,9 @@ from yamu.util.query import build_game_query
 from yamuplug import import_providers, load_plugins
 
 
+DEFAULT_SEARCH_TIMEOUT = 10.0
+
+
 def add_subparser(subparsers: argparse._SubParsersAction) -> None:
     parser = subparsers.add_parser("import", help="Import games interactively")
     parser.add_argument("--threads", type=int)
@@ -20,6 +43,41 @@ def add_subparser(subparsers: argparse._SubParsersAction) -> None:
         action="store_true",
         help="Reprocess games already in the library",
     )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Never prompt; skip games that are not auto-accepted",
+    )
+    parser.add_argument(
+        "--auto-accept",
+        type=float,
+        metavar="THRESHOLD",
+        help=(
+            "Accept the best match automatically when its similarity "
+            "is at least THRESHOLD (0-1)"
+        ),
+    )
+    parser.add_argument(
+        "--defer",
+        action="store_true",
+        help="Queue games that need a decision for a later --review",
+    )
+    parser.add_argument(
+        "--review",
+        action="store_true",
+        help="Work through games queued by --defer",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help="Append every import decision to FILE",
+    )
+    parser.add_argument(
+        "--decisions",
+        metavar="FILE",
+        help="Apply decisions recorded with --record instead of prompting",
+    )
     parser.add_argument("query", nargs="*", help="Match existing games when using -f")
     parser.set_defaults(func=run)
 
@@ -28,6 +86,32 @@ def run(args: argparse.Namespace, library: Library) -> int:
     if args.query and not args.force:
         print(error("QUERY is only supported with --force"))
         return 1
+    if args.auto_accept is not None and not 0 <= args.auto_accept <= 1:
+        print(error("--auto-accept must be between 0 and 1"))
+        return 1
+    decisions = None
+    if args.decisions:
+        try:
+            decisions = load_decisions(args.decisions)
+        except (OSError, ValueError) as exc:
+            print(error(f"Cannot read decisions: {exc}"))
+            return 1
+    recorder = DecisionRecorder(args.record) if args.record else None
+    try:
+        if args.review:
+            return run_review(library, recorder)
+        return _run_import(args, library, decisions, recorder)
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+
+def _run_import(
+    args: argparse.Namespace,
+    library: Library,
+    decisions: dict | None,
+    recorder: DecisionRecorder | None,
+) -> int:
 
     config = load_config()
     load_plugins(config.get("plugins", []))
@@ -45,15 +129,16 @@ def run(args: argparse.Namespace, library: Library) -> int:
     if not enabled:
         print(
             error(
-                "No import sources configured. Enable a plugin and configure its settings."
+                "No import sources configured. "
+                "Enable a plugin and configure its settings."
             )
         )
         return 1
 
-    existing_games = library.list_games()
+    existing_games = library.list_games(main_only=True)
     if args.force and args.query:
         query, _ = build_game_query(args.query)
-        existing_games = library.list_games(query)
+        existing_games = library.list_games(query, main_only=True)
     ignored_paths = library.list_ignored_import_paths()
     existing_paths = {
         str(game.path)
@@ -61,6 +146,14 @@ def run(args: argparse.Namespace, library: Library) -> int:
         if game.path and str(game.path) not in ignored_paths
     }
     seen_paths = set() if args.force else set(existing_paths) | set(ignored_paths)
+    if args.defer and not args.force:
+        seen_paths |= {
+            str(entry["path"])
+            for entry in library.list_pending_imports()
+            if entry["path"]
+        }
+
+    synced = library.achievement_sync_tokens() if args.force else {}
 
     def task_source():
         for provider in providers:
@@ -73,6 +166,8 @@ def run(args: argparse.Namespace, library: Library) -> int:
                         if str(path) in seen_paths:
                             continue
                         seen_paths.add(str(path))
+                        if str(path) in synced:
+                            task.original["achievements_synced"] = synced[str(path)]
                     else:
                         if path:
                             path = str(path)
@@ -90,53 +185,263 @@ def run(args: argparse.Namespace, library: Library) -> int:
             threads = config_threads
         else:
             threads = 2
+    prefetch = config.get("import", {}).get("prefetch")
+    if not isinstance(prefetch, int) or prefetch <= 0:
+        prefetch = DEFAULT_PREFETCH
+    engine = config.get("import", {}).get("engine") or "threads"
+    if engine not in ENGINES:
+        print(error(f"Unknown import engine: {engine}"))
+        return 1
+    concurrency = config.get("import", {}).get("concurrency")
+    if not isinstance(concurrency, int) or concurrency <= 0:
+        concurrency = DEFAULT_CONCURRENCY
     search_providers = [
         provider for provider in providers if hasattr(provider, "search")
     ]
-    provider = CandidateProvider(search_providers, config)
+    search_timeout = config.get("import", {}).get("search_timeout")
+    if not isinstance(search_timeout, (int, float)) or search_timeout <= 0:
+        search_timeout = DEFAULT_SEARCH_TIMEOUT
+    breaker_threshold = config.get("import", {}).get("breaker_threshold")
+    if not isinstance(breaker_threshold, int) or breaker_threshold <= 0:
+        breaker_threshold = DEFAULT_BREAKER_THRESHOLD
+    breaker_cooldown = config.get("import", {}).get("breaker_cooldown")
+    if not isinstance(breaker_cooldown, (int, float)) or breaker_cooldown < 0:
+        breaker_cooldown = DEFAULT_BREAKER_COOLDOWN
+    provider = CandidateProvider(
+        search_providers,
+        config,
+        timeout=search_timeout,
+        concurrency=concurrency if engine == "async" else threads,
+        breaker_threshold=breaker_threshold,
+        breaker_cooldown=breaker_cooldown,
+    )
     importer = Importer(
         library,
         provider=provider,
-        threads=threads,
+        threads=threads if engine == "async" else max(threads, provider.width),
         prompt_existing=args.force,
+        prefetch=prefetch,
+        engine=engine,
+        concurrency=concurrency,
+        auto_accept=args.auto_accept,
+        quiet=args.quiet,
+        defer=args.defer,
+        decisions=decisions,
+        recorder=recorder,
     )
-    tasks = list(task_source())
-    completed, updated = importer.run(tasks)
+    try:
+        completed, updated = importer.run(task_source())
+    finally:
+        provider.close()
+    for stats in provider.stats():
+        if stats.calls or stats.rejected:
+            print(info(stats.summary()))
     if updated:
         print(info(f"Updated metadata for {updated} games"))
+    if importer.deferred:
+        print(
+            info(
+                f"Queued {importer.deferred} games for review; "
+                "run 'yamu import --review'"
+            )
+        )
+    if importer.skipped:
+        print(info(f"Skipped {importer.skipped} games below the match threshold"))
     if completed:
         print(success(f"Imported {completed} games"))
-    elif not updated:
+    elif not updated and not importer.skipped and not importer.deferred:
         print(info("No new games found to import"))
     return 0
 
 
+def run_review(library: Library, recorder: DecisionRecorder | None = None) -> int:
+    if not library.list_pending_imports():
+        print(info("No games waiting for review"))
+        return 0
+    completed, reviewed = Importer(library, recorder=recorder).review()
+    print(success(f"Imported {completed} of {reviewed} reviewed games"))
+    remaining = len(library.list_pending_imports())
+    if remaining:
+        print(info(f"{remaining} games are still waiting for review"))
+    return 0
+
+
 class CandidateProvider:
-    def __init__(self, providers: list[object], config: dict) -> None:
+    def __init__(
+        self,
+        providers: list[object],
+        config: dict,
+        timeout: float = DEFAULT_SEARCH_TIMEOUT,
+        concurrency: int = 2,
+        breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        breaker_cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+    ) -> None:
         self.providers = providers
         self.config = config
+        self.timeout = timeout
+        limits = {
+            id(provider): self._concurrency(provider, concurrency)
+            for provider in providers
+        }
+        self._health = {
+            id(provider): ProviderHealth(
+                getattr(provider, "name", "search"),
+                limits[id(provider)],
+                breaker_threshold,
+                breaker_cooldown,
+            )
+            for provider in providers
+        }
+        self.width = max(limits.values(), default=1)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, sum(limits.values())))
+        self._lock = threading.Lock()
+        self._late: dict[int, tuple[object, list[ImportCandidate]]] = {}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> list[ProviderStats]:
+        return [self._health[id(provider)].stats for provider in self.providers]
+
+    def _concurrency(self, provider: object, default: int) -> int:
+        section = self.config.get(getattr(provider, "name", ""))
+        value = section.get("concurrency") if isinstance(section, dict) else None
+        if isinstance(value, int) and value > 0:
+            return value
+        hint = getattr(provider, "concurrency", None)
+        if callable(hint):
+            default = max(default, int(hint(self.config) or 0))
+        return max(1, default)
+
+    def _timeout(self, provider: object) -> float:
+        section = self.config.get(getattr(provider, "name", ""))
+        value = section.get("search_timeout") if isinstance(section, dict) else None
+        if isinstance(value, (int, float)) and value > 0:
+            return float(value)
+        return self.timeout
+
+    def _defer(self, task, provider: object, future: Any) -> None:
+        with self._lock:
+            if id(task) not in self._late:
+                self._late[id(task)] = (task, [])
+
+        def done(future: Any) -> None:
+            if future.cancelled():
+                return
+            try:
+                found = list(future.result())
+            except Exception as exc:
+                print(error(f"{provider.name} search failed: {exc}"))
+                return
+            merged = self._merge(task, provider, found)
+            with self._lock:
+                # Results for a finished task are dropped rather than kept.
+                entry = self._late.get(id(task))
+                if entry is not None and entry[0] is task:
+                    entry[1].extend(merged)
+
+        future.add_done_callback(done)
+
+    def late_candidates(self, task) -> list[ImportCandidate]:
+        with self._lock:
+            entry = self._late.get(id(task))
+            if entry is None or entry[0] is not task:
+                return []
+            found = list(entry[1])
+            entry[1].clear()
+        return found
+
+    def finish(self, task) -> None:
+        with self._lock:
+            entry = self._late.get(id(task))
+            if entry is not None and entry[0] is task:
+                del self._late[id(task)]
+
+    def _merge(
+        self, task, provider: object, found: list[ImportCandidate]
+    ) -> list[ImportCandidate]:
+        merged_candidates = []
+        for candidate in found:
+            merged = dict(task.original)
+            for key, value in candidate.fields.items():
+                if value is None or value == "":
+                    continue
+                merged[key] = value
+            merged_candidates.append(
+                ImportCandidate(
+                    fields=merged,
+                    source=getattr(provider, "name", "search"),
+                )
+            )
+        return merged_candidates
 
     def candidates(self, task) -> list[ImportCandidate]:
         candidates = [ImportCandidate(fields=dict(task.original), source="base")]
         if not self.providers:
             return candidates
         game = SimpleNamespace(**task.original)
-        for provider in self.providers:
+        start = time.monotonic()
+        searches = [
+            (
+                provider,
+                self._executor.submit(
+                    self._health[id(provider)].call,
+                    provider.search,
+                    game,
+                    self.config,
+                ),
+            )
+            for provider in self.providers
+        ]
+        for provider, future in searches:
+            remaining = start + self._timeout(provider) - time.monotonic()
             try:
-                found = list(provider.search(game, self.config))
+                found = list(future.result(timeout=max(0, remaining)))
+            except FutureTimeout:
+                self._health[id(provider)].timed_out()
+                self._defer(task, provider, future)
+                continue
+            except ProviderUnavailable:
+                continue
             except Exception as exc:
                 print(error(f"{provider.name} search failed: {exc}"))
                 continue
-            for candidate in found:
-                merged = dict(task.original)
-                for key, value in candidate.fields.items():
-                    if value is None or value == "":
-                        continue
-                    merged[key] = value
-                candidates.append(
-                    ImportCandidate(
-                        fields=merged,
-                        source=getattr(provider, "name", "search"),
-                    )
-                )
+            candidates.extend(self._merge(task, provider, found))
+        return candidates
+
+    async def _search_async(self, provider: object, game: SimpleNamespace) -> list:
+        health = self._health[id(provider)]
+        if hasattr(provider, "search_async"):
+            return list(await health.acall(provider.search_async, game, self.config))
+        loop = asyncio.get_running_loop()
+        return list(
+            await loop.run_in_executor(
+                self._executor, health.call, provider.search, game, self.config
+            )
+        )
+
+    async def acandidates(self, task) -> list[ImportCandidate]:
+        candidates = [ImportCandidate(fields=dict(task.original), source="base")]
+        game = SimpleNamespace(**task.original)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        searches = [
+            (provider, asyncio.ensure_future(self._search_async(provider, game)))
+            for provider in self.providers
+        ]
+        for provider, lookup in searches:
+            remaining = start + self._timeout(provider) - loop.time()
+            done, _ = await asyncio.wait({lookup}, timeout=max(0, remaining))
+            if not done:
+                self._health[id(provider)].timed_out()
+                self._defer(task, provider, lookup)
+                continue
+            try:
+                found = lookup.result()
+            except ProviderUnavailable:
+                continue
+            except Exception as exc:
+                print(error(f"{provider.name} search failed: {exc}"))
+                continue
+            candidates.extend(self._merge(task, provider, found))
         return candidates
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import argparse
 import re
+from yamu.dbcore.query import Query
 from yamu.library.library import Library
-from yamu.util.color import error
+from yamu.util.color import error, info
 from yamu.util.query import build_game_query
 
 
@@ -11,6 +12,11 @@ def add_subparser(subparsers: argparse._SubParsersAction) -> None:
     parser = subparsers.add_parser("list", aliases=("ls",), help="List games")
     parser.add_argument("query", nargs="*", help="Query parts (field:value or terms)")
     parser.add_argument("-f", "--format", help="Format string with $fields")
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Print the generated SQL, its query plan and timing instead of games",
+    )
     parser.set_defaults(func=run)
 
 
@@ -30,8 +36,24 @@ def _render_format(fmt: str, game: object, allowed_fields: set[str]) -> str:
     return re.sub(r"\$([a-zA-Z_][a-zA-Z0-9_]*)", repl, fmt)
 
 
+def _explain(library: Library, query: Query) -> int:
+    report = library.explain_games(query)
+    print(info("SQL:"))
+    print(f"  {' '.join(report['sql'].split())}")
+    print(info("Params:"))
+    print(f"  {report['params']!r}")
+    print(info("Plan:"))
+    for line in report["plan"]:
+        print(f"  {line}")
+    print(info(f"{report['rows']} rows in {report['seconds'] * 1000:.2f} ms"))
+    return 0
+
+
 def run(args: argparse.Namespace, library: Library) -> int:
-    query, allowed_fields = build_game_query(args.query)
+    extra_fields = {"source"} if library.federated else None
+    query, allowed_fields = build_game_query(args.query, extra_fields=extra_fields)
+    if getattr(args, "explain", False):
+        return _explain(library, query)
     games = library.list_games(query)
 
     fmt = args.format or "$title"
@@ -44,7 +44,7 @@ def run(args: argparse.Namespace, library: Library) -> int:
         return 0
 
     query, _ = build_game_query(args.query)
-    games = library.list_games(query)
+    games = library.list_games(query, main_only=True)
     if not games:
         print(warning("No games matched"))
         return 1
@@ -4,6 +4,7 @@ import argparse
 
 from yamu.library.library import Library
 from yamu.util.config import load_config
+from yamu.util.http_client import HttpError
 from yamu.util.color import error, success, warning
 from yamuplug.steam import (
     SteamError,
@@ -12,10 +13,9 @@ from yamuplug.steam import (
     get_api_key,
     extract_genres,
     extract_release_date,
-    _cache_paths,
-    _load_cache,
+    _cache_options,
     _rate_config,
-    _save_cache,
+    open_steam_cache,
 )
 
 
@@ -24,7 +24,7 @@ def add_subparser(subparsers: argparse._SubParsersAction) -> None:
     parser.add_argument("steam_id", help="SteamID64")
     parser.add_argument("--api-key", help="Steam Web API key (or set STEAM_API_KEY)")
     parser.add_argument(
-        "--no-cache", action="store_true", help="Disable Steam appdetails cache"
+        "--no-cache", action="store_true", help="Disable the Steam response cache"
     )
     parser.set_defaults(func=run)
 
@@ -33,17 +33,15 @@ def run(args: argparse.Namespace, library: Library) -> int:
     try:
         config = load_config()
         api_key = args.api_key or get_api_key(config)
-        games = fetch_owned_games(args.steam_id, api_key)
+        cache = None if args.no_cache else open_steam_cache(config)
+        games = fetch_owned_games(args.steam_id, api_key, cache=cache)
     except SteamError as exc:
         print(error(str(exc)))
         return 1
     added = 0
     fetch_details = bool(config.get("steam", {}).get("fetch_details", False))
-    delay, retries, backoff, ttl = _rate_config(config)
-    if args.no_cache:
-        ttl = 0
-    cache_path, _ = _cache_paths(config)
-    cache = _load_cache(cache_path) if ttl > 0 else None
+    retries, backoff, ttl = _rate_config(config)
+    negative_ttl, compress = _cache_options(config)
     for game in games:
         appid = game.get("appid")
         name = game.get("name")
@@ -55,19 +53,21 @@ def run(args: argparse.Namespace, library: Library) -> int:
         genre = None
         release_date = None
         if fetch_details:
-            details = fetch_app_details(
-                str(appid),
-                retries=retries,
-                backoff=backoff,
-                cache=cache,
-                ttl=ttl,
-            )
+            try:
+                details = fetch_app_details(
+                    str(appid),
+                    retries=retries,
+                    backoff=backoff,
+                    cache=cache,
+                    ttl=ttl,
+                    negative_ttl=negative_ttl,
+                    compress=compress,
+                )
+            except (HttpError, ValueError) as exc:
+                print(warning(f"Could not fetch details for {name}: {exc}"))
+                details = {}
             genre = extract_genres(details)
             release_date = extract_release_date(details)
-            if delay:
-                import time
-
-                time.sleep(delay)
         library.add_game(
             {
                 "title": name,
@@ -78,8 +78,6 @@ def run(args: argparse.Namespace, library: Library) -> int:
             }
         )
         added += 1
-    if cache is not None:
-        _save_cache(cache_path, cache)
     if added == 0:
         print(warning("No new games to import from Steam"))
     else:
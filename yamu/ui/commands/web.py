@@ -19,5 +19,19 @@ def run(args: argparse.Namespace, library: Library) -> int:
     web_cfg = config.get("web", {})
     host = args.host or web_cfg.get("host", "127.0.0.1")
     port = args.port or int(web_cfg.get("port", 8337))
-    run_server(library, host, port)
+    mode = str(web_cfg.get("mode", "ro"))
+    budget = {
+        "query_timeout": float(web_cfg.get("query_timeout", 0) or 0),
+        "query_steps": int(web_cfg.get("query_steps", 0) or 0),
+    }
+    if mode == "rw":
+        run_server(library, host, port, **budget)
+        return 0
+    reader = Library(str(library.db.path), mode=mode, attach=library.attached)
+    if library.db.stats is not None:
+        reader.db.instrument(library.db.slow_query_ms)
+    try:
+        run_server(reader, host, port, **budget)
+    finally:
+        reader.close()
     return 0
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable
+
+from yamu.util.text import normalize_text
+
+
+CACHE_NAME = "cache.db"
+MISSING = object()
+SEARCH_TTL = 7 * 24 * 3600
+SEARCH_NEGATIVE_TTL = 24 * 3600
+
+_caches: dict[Path, KeyValueCache] = {}
+_caches_lock = threading.Lock()
+
+
+def cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return Path(base) / "yamu"
+
+
+class KeyValueCache:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value, expires FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return default
+        value = row[0]
+        if isinstance(value, bytes):
+            value = zlib.decompress(value)
+        return json.loads(value)
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl: float,
+        compress: bool = False,
+    ) -> None:
+        if ttl <= 0:
+            return
+        data: str | bytes = json.dumps(value, default=str)
+        if compress:
+            data = zlib.compress(data.encode("utf-8"))
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT INTO entries (namespace, key, value, expires)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(namespace, key) DO UPDATE SET
+                    value = excluded.value,
+                    expires = excluded.expires
+                """,
+                (namespace, key, data, time.time() + ttl),
+            )
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+
+    def purge(self) -> int:
+        with self._lock:
+            cur = self.conn.execute(
+                "DELETE FROM entries WHERE expires <= ?", (time.time(),)
+            )
+        return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+def open_cache(path: str | Path | None = None) -> KeyValueCache:
+    resolved = Path(path) if path else cache_dir() / CACHE_NAME
+    with _caches_lock:
+        cache = _caches.get(resolved)
+        if cache is None:
+            cache = KeyValueCache(resolved)
+            _caches[resolved] = cache
+        return cache
+
+
+def close_caches() -> None:
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.close()
+        _caches.clear()
+
+
+def search_key(query: str, params: dict[str, Any] | None = None) -> str:
+    fingerprint = json.dumps(params or {}, sort_keys=True, default=str)
+    digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+    return f"{normalize_text(query)}|{digest}"
+
+
+def cached_search(
+    provider: str,
+    query: str,
+    fetch: Callable[[], list[Any]],
+    config: dict | None = None,
+    params: dict[str, Any] | None = None,
+) -> list[Any]:
+    section = (config or {}).get(provider) or {}
+    ttl = float(section.get("search_cache_ttl", SEARCH_TTL) or 0)
+    negative_ttl = float(section.get("search_negative_ttl", SEARCH_NEGATIVE_TTL) or 0)
+    if not ttl and not negative_ttl:
+        return fetch()
+    cache = open_cache()
+    namespace = f"search:{provider}"
+    key = search_key(query, params)
+    cached = cache.get(namespace, key, MISSING)
+    if cached is not MISSING:
+        return cached
+    results = fetch()
+    cache.set(namespace, key, results, ttl if results else negative_ttl)
+    return results
@@ -71,6 +71,13 @@ def load_config() -> Dict[str, Any]:
         library = {}
     if "path" in library:
         library["path"] = _expand_path(str(library["path"]))
+    attach_value = library.get("attach", [])
+    if isinstance(attach_value, str):
+        attach_value = [attach_value]
+    if isinstance(attach_value, list):
+        library["attach"] = [_expand_path(str(item)) for item in attach_value if item]
+    else:
+        library["attach"] = []
     merged["library"] = library
 
     plugins_value = merged.get("plugins", [])
@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import hashlib
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any
+
+from yamu.util import ratelimit
+
+if TYPE_CHECKING:
+    from yamu.util.cache import KeyValueCache
+
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 0.5
+POOL_SIZE = 8
+MAX_REDIRECTS = 5
+USER_AGENT = "yamu"
+RETRY_STATUSES = {502, 503, 504}
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+HTTP_NAMESPACE = "http"
+REVALIDATE_TTL = 30 * 24 * 3600
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+
+class HttpError(RuntimeError):
+    def __init__(self, message: str, code: int | None = None, url: str = "") -> None:
+        super().__init__(message)
+        self.code = code
+        self.url = url
+
+
+@dataclass
+class Response:
+    status: int
+    url: str
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode("utf-8"))
+
+
+def _retry_after(response: Response, default: float) -> float:
+    value = response.headers.get("retry-after", "")
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return default
+
+
+def validators(response: Response) -> dict[str, str]:
+    return {
+        name: response.headers[name]
+        for name in ("etag", "last-modified")
+        if response.headers.get(name)
+    }
+
+
+def conditional_headers(stored: dict[str, str] | None) -> dict[str, str]:
+    headers: dict[str, str] = {}
+    if not stored:
+        return headers
+    if stored.get("etag"):
+        headers["If-None-Match"] = stored["etag"]
+    if stored.get("last-modified"):
+        headers["If-Modified-Since"] = stored["last-modified"]
+    return headers
+
+
+def _max_age(response: Response) -> float | None:
+    for directive in response.headers.get("cache-control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "no-cache":
+            return 0.0
+        if name.lower() == "max-age":
+            try:
+                return max(0.0, float(value.strip('"')))
+            except ValueError:
+                return None
+    return None
+
+
+def _storable(response: Response) -> bool:
+    cache_control = response.headers.get("cache-control", "").lower()
+    return response.status == 200 and "no-store" not in cache_control
+
+
+def _origin(url: str) -> tuple[str, str, int, str]:
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise HttpError(f"Unsupported URL: {url}", url=url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    return parts.scheme, parts.hostname, port, target
+
+
+@dataclass
+class Proxy:
+    host: str
+    port: int
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def _parse_proxy(value: str) -> Proxy | None:
+    if "://" not in value:
+        value = f"http://{value}"
+    parts = urllib.parse.urlsplit(value)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    headers = {}
+    if parts.username is not None:
+        credentials = ":".join(
+            urllib.parse.unquote(part or "")
+            for part in (parts.username, parts.password)
+        )
+        token = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+        headers["Proxy-Authorization"] = f"Basic {token}"
+    return Proxy(parts.hostname, parts.port or 80, headers)
+
+
+class HttpClient:
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        pool_size: int = POOL_SIZE,
+        proxies: dict[str, str] | None = None,
+    ) -> None:
+        self.timeout = timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        # Same HTTP(S)_PROXY / NO_PROXY environment urllib honours.
+        self.proxies = urllib.request.getproxies() if proxies is None else proxies
+        self._lock = threading.Lock()
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+
+    def _proxy_for(self, scheme: str, host: str) -> Proxy | None:
+        value = self.proxies.get(scheme)
+        if not value or urllib.request.proxy_bypass_environment(host, self.proxies):
+            return None
+        return _parse_proxy(value)
+
+    def _acquire(
+        self, key: tuple[str, str, int], timeout: float, proxy: Proxy | None
+    ) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        scheme, host, port = key
+        if proxy is None:
+            if scheme == "https":
+                return http.client.HTTPSConnection(host, port, timeout=timeout), False
+            return http.client.HTTPConnection(host, port, timeout=timeout), False
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(proxy.host, proxy.port, timeout=timeout)
+            conn.set_tunnel(host, port, headers=proxy.headers)
+            return conn, False
+        conn = http.client.HTTPConnection(proxy.host, proxy.port, timeout=timeout)
+        return conn, False
+
+    def _release(
+        self, key: tuple[str, str, int], conn: http.client.HTTPConnection
+    ) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for idle in pools:
+            for conn in idle:
+                conn.close()
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None,
+        headers: dict[str, str],
+        timeout: float,
+    ) -> Response:
+        scheme, host, port, target = _origin(url)
+        key = (scheme, host, port)
+        proxy = self._proxy_for(scheme, host)
+        if proxy is not None and scheme == "http":
+            # Plain HTTP goes through the proxy as an absolute-form request.
+            target = urllib.parse.urlsplit(url)._replace(fragment="").geturl()
+            headers = {**headers, **proxy.headers}
+        conn, reused = self._acquire(key, timeout, proxy)
+        try:
+            conn.request(method, target, body=body, headers=headers)
+            raw = conn.getresponse()
+            data = raw.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if not reused:
+                raise
+            conn, _ = self._acquire(key, timeout, proxy)
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                raw = conn.getresponse()
+                data = raw.read()
+            except BaseException:
+                conn.close()
+                raise
+        response_headers = {name.lower(): value for name, value in raw.getheaders()}
+        if raw.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        if response_headers.get("content-encoding") == "gzip":
+            data = gzip.decompress(data)
+        return Response(raw.status, url, data, response_headers)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: dict[str, Any] | None = None,
+        data: bytes | str | dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = None,
+        retries: int | None = None,
+        backoff: float = RETRY_BACKOFF,
+        cache: KeyValueCache | None = None,
+        ttl: float = 0,
+    ) -> Response:
+        if params:
+            separator = "&" if "?" in url else "?"
+            url = f"{url}{separator}{urllib.parse.urlencode(params)}"
+        request_headers = {
+            "Accept-Encoding": "gzip",
+            "User-Agent": USER_AGENT,
+        }
+        body: bytes | None = None
+        if isinstance(data, dict):
+            body = urllib.parse.urlencode(data).encode("utf-8")
+            request_headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif isinstance(data, str):
+            body = data.encode("utf-8")
+        else:
+            body = data
+        request_headers.update(headers or {})
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        if cache is None or method != "GET":
+            return self._perform(
+                method, url, body, request_headers, timeout, retries, backoff
+            )
+
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        stored = cache.get(HTTP_NAMESPACE, key)
+        if stored is not None and stored["fresh_until"] > time.time():
+            return self._from_cache(url, stored)
+        if stored is not None:
+            request_headers.update(conditional_headers(stored["headers"]))
+        response = self._perform(
+            method, url, body, request_headers, timeout, retries, backoff
+        )
+        if response.status == 304 and stored is not None:
+            stored["headers"].update(validators(response))
+            fresh = _max_age(response)
+            stored["fresh_until"] = time.time() + (ttl if fresh is None else fresh)
+            cache.set(HTTP_NAMESPACE, key, stored, REVALIDATE_TTL, compress=True)
+            return self._from_cache(url, stored)
+        if _storable(response) and (validators(response) or ttl > 0):
+            fresh = _max_age(response)
+            entry = {
+                "fresh_until": time.time() + (ttl if fresh is None else fresh),
+                "headers": {
+                    name: response.headers[name]
+                    for name in STORED_HEADERS
+                    if name in response.headers
+                },
+                "body": base64.b64encode(response.body).decode("ascii"),
+            }
+            cache.set(HTTP_NAMESPACE, key, entry, REVALIDATE_TTL, compress=True)
+        return response
+
+    def _from_cache(self, url: str, stored: dict[str, Any]) -> Response:
+        body = base64.b64decode(stored["body"])
+        return Response(200, url, body, dict(stored["headers"]))
+
+    def _perform(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None,
+        request_headers: dict[str, str],
+        timeout: float,
+        retries: int,
+        backoff: float,
+    ) -> Response:
+        attempt = 0
+        redirects = 0
+        while True:
+            limiter = ratelimit.limiter_for(_origin(url)[1])
+            try:
+                with limiter.slot() if limiter is not None else nullcontext():
+                    response = self._send(method, url, body, request_headers, timeout)
+            except (OSError, http.client.HTTPException) as exc:
+                if attempt < retries:
+                    time.sleep(backoff * (2**attempt))
+                    attempt += 1
+                    continue
+                raise HttpError(f"{method} {url} failed: {exc}", url=url) from exc
+            if response.status in REDIRECT_STATUSES and "location" in response.headers:
+                redirects += 1
+                if redirects > MAX_REDIRECTS:
+                    raise HttpError("Too many redirects", response.status, url)
+                url = urllib.parse.urljoin(url, response.headers["location"])
+                if response.status == 303:
+                    method, body = "GET", None
+                continue
+            if response.status == 429 and attempt < retries:
+                wait = _retry_after(response, backoff * (2**attempt))
+                if limiter is not None:
+                    limiter.pause(wait)
+                else:
+                    time.sleep(wait)
+                attempt += 1
+                continue
+            if response.status in RETRY_STATUSES and attempt < retries:
+                time.sleep(backoff * (2**attempt))
+                attempt += 1
+                continue
+            if response.status >= 400:
+                raise HttpError(
+                    f"HTTP {response.status} for {url}", response.status, url
+                )
+            return response
+
+
+_client = HttpClient()
+
+
+def get(url: str, **kwargs: Any) -> Response:
+    return _client.request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> Response:
+    return _client.request("POST", url, **kwargs)
+
+
+def get_json(url: str, **kwargs: Any) -> Any:
+    return get(url, **kwargs).json()
+
+
+def post_json(url: str, **kwargs: Any) -> Any:
+    return post(url, **kwargs).json()
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from yamu.dbcore.query import CONTAINS_FIELDS, Query, parse_query
+from yamu.dbcore.query import (
+    CONTAINS_FIELDS,
+    CollectionQuery,
+    Query,
+    parse_query,
+)
 from yamu.library.models import GAME_FIELDS
 
 
@@ -17,6 +22,7 @@ def build_query(parts: list[str], allowed_fields: set[str]) -> Query:
         default_field="title",
         allowed_fields=allowed_fields,
         contains_fields=CONTAINS_FIELDS,
+        field_queries={"in": CollectionQuery},
     )
 
 
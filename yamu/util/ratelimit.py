@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        requests: float,
+        per: float = 1.0,
+        burst: float | None = None,
+        concurrency: int = 0,
+    ) -> None:
+        if requests <= 0 or per <= 0:
+            raise ValueError("rate limit must be positive")
+        self.requests = requests
+        self.per = per
+        self.rate = requests / per
+        self.capacity = burst if burst is not None else max(1.0, requests)
+        self.concurrency = concurrency
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            self.acquire()
+            yield
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def matches(
+        self, requests: float, per: float, burst: float | None, concurrency: int
+    ) -> bool:
+        return (
+            self.requests == requests
+            and self.per == per
+            and self.capacity == (burst if burst is not None else max(1.0, requests))
+            and self.concurrency == concurrency
+        )
+
+
+_limiters: dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def configure(
+    host: str,
+    requests: float,
+    per: float = 1.0,
+    burst: float | None = None,
+    concurrency: int = 0,
+) -> TokenBucket:
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None or not limiter.matches(requests, per, burst, concurrency):
+            limiter = TokenBucket(requests, per, burst, concurrency)
+            _limiters[host] = limiter
+        return limiter
+
+
+def configure_from(limits: Any) -> None:
+    if not isinstance(limits, dict):
+        return
+    for host, spec in limits.items():
+        if not isinstance(spec, dict):
+            raise ValueError(f"Invalid rate limit for {host}")
+        configure(
+            str(host),
+            float(spec.get("requests", 1)),
+            float(spec.get("per", 1.0)),
+            float(spec["burst"]) if spec.get("burst") is not None else None,
+            int(spec.get("concurrency", 0) or 0),
+        )
+
+
+def limiter_for(host: str) -> TokenBucket | None:
+    with _limiters_lock:
+        return _limiters.get(host)
+
+
+def reset() -> None:
+    with _limiters_lock:
+        _limiters.clear()
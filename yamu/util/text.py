@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Any
+
+
+def normalize_text(value: Any) -> str:
+    text = unicodedata.normalize("NFKC", str(value)).casefold()
+    text = re.sub(r"[\W_]+", " ", text)
+    return " ".join(text.split())
+
+
+ARTICLES = ("the", "a", "an")
+
+
+def sort_text(value: Any) -> str:
+    text = normalize_text(value)
+    first, _, rest = text.partition(" ")
+    if first in ARTICLES and rest:
+        return rest
+    return text
+
+
+def trigrams(value: Any) -> list[str]:
+    text = normalize_text(value)
+    seen: dict[str, None] = {}
+    for idx in range(len(text) - 2):
+        seen.setdefault(text[idx : idx + 3], None)
+    return list(seen)
+
+
+def trigram_match(pattern: Any, value: Any) -> bool:
+    if value is None:
+        return False
+    text = str(value)
+    return any(gram in text for gram in re.findall(r'"([^"]*)"', str(pattern)))
+
+
+def fuzzy_similarity(value: Any, term: Any) -> float:
+    if value is None or term is None:
+        return 0.0
+    text = normalize_text(value)
+    needle = normalize_text(term)
+    if not text or not needle:
+        return 0.0
+    if needle in text:
+        return 1.0
+    best = SequenceMatcher(a=needle, b=text).ratio()
+    words = text.split()
+    size = len(needle.split())
+    for start in range(max(1, len(words) - size + 1)):
+        window = " ".join(words[start : start + size])
+        best = max(best, SequenceMatcher(a=needle, b=window).ratio())
+    return best
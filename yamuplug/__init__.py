@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from importlib import import_module
 
+from yamu.util.cache import cached_search
 from yamu.util.color import warning
 from typing import Iterable, List, Protocol
 
@@ -45,4 +46,5 @@ __all__ = [
     "register_import_provider",
     "load_plugins",
     "ImportProvider",
+    "cached_search",
 ]
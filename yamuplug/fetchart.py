@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import os
-import urllib.request
 from pathlib import Path
 
 from yamu.library.library import Library
+from yamu.util import http_client, ratelimit
+from yamu.util.cache import KeyValueCache, open_cache
+
+
+ART_NAMESPACE = "fetchart:validators"
 
 
 class FetchArtError(RuntimeError):
@@ -28,27 +32,36 @@ def _art_dir(config: dict) -> Path:
     return Path(os.path.expanduser(str(raw)))
 
 
-def fetch_steam_art(appid: str, dest: Path) -> None:
+def fetch_steam_art(appid: str, dest: Path, cache: KeyValueCache | None = None) -> None:
     url = _steam_art_url(appid)
+    stored = None
+    if cache is not None and dest.exists():
+        stored = cache.get(ART_NAMESPACE, url)
     try:
         dest.parent.mkdir(parents=True, exist_ok=True)
-        with urllib.request.urlopen(url, timeout=30) as response:
-            if response.status != 200:
-                raise FetchArtError(f"Steam art not found for app {appid}")
-            data = response.read()
+        response = http_client.get(url, headers=http_client.conditional_headers(stored))
+        if response.status == 304 and stored:
+            return
+        if response.status != 200:
+            raise FetchArtError(f"Steam art not found for app {appid}")
+        data = response.body
     except Exception as exc:
         raise FetchArtError(str(exc)) from exc
 
     dest.write_bytes(data)
+    found = http_client.validators(response)
+    if cache is not None and found:
+        cache.set(ART_NAMESPACE, url, found, http_client.REVALIDATE_TTL)
 
 
 def fetch_art_for_path(path: str | None, config: dict) -> str | None:
     appid = _steam_appid_from_path(path)
     if not appid:
         return None
+    ratelimit.configure_from(config.get("fetchart", {}).get("rate_limits"))
     art_dir = _art_dir(config)
     dest = art_dir / f"steam-{appid}.jpg"
-    fetch_steam_art(appid, dest)
+    fetch_steam_art(appid, dest, cache=open_cache())
     return str(dest)
 
 
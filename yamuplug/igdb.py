@@ -2,17 +2,21 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 import time
-import urllib.parse
-import urllib.request
+from concurrent.futures import Future
 from typing import Any
 
 from yamu.importer.pipeline import ImportCandidate
-from yamuplug import register_import_provider
+from yamu.util import http_client, ratelimit
+from yamuplug import cached_search, register_import_provider
 
 
 IGDB_TOKEN_URL = "https://id.twitch.tv/oauth2/token"
 IGDB_GAMES_URL = "https://api.igdb.com/v4/games"
+IGDB_MULTIQUERY_URL = "https://api.igdb.com/v4/multiquery"
+MULTIQUERY_LIMIT = 10
+DEFAULT_BATCH_LINGER = 0.05
 
 
 class IgdbError(RuntimeError):
@@ -71,10 +75,7 @@ def _fetch_token(client_id: str, client_secret: str) -> dict[str, Any]:
         "client_secret": client_secret,
         "grant_type": "client_credentials",
     }
-    data = urllib.parse.urlencode(params).encode("utf-8")
-    req = urllib.request.Request(IGDB_TOKEN_URL, data=data, method="POST")
-    with urllib.request.urlopen(req, timeout=30) as response:
-        payload = json.loads(response.read().decode("utf-8"))
+    payload = http_client.post_json(IGDB_TOKEN_URL, data=params)
     if not isinstance(payload, dict) or "access_token" not in payload:
         raise IgdbError("Failed to fetch IGDB access token")
     return payload
@@ -105,10 +106,8 @@ def get_igdb_token(config: dict) -> str:
     return token
 
 
-def fetch_igdb_games(term: str, config: dict, limit: int = 5) -> list[dict]:
-    client_id = _get_client_id(config)
-    token = get_igdb_token(config)
-    query = (
+def _games_query(term: str, limit: int) -> str:
+    return (
         f"search {json.dumps(term)}; "
         "fields name,first_release_date,genres.name,platforms.name,"
         "involved_companies.developer,involved_companies.publisher,"
@@ -116,16 +115,102 @@ def fetch_igdb_games(term: str, config: dict, limit: int = 5) -> list[dict]:
         "involved_companies.company.name; "
         f"limit {max(1, limit)};"
     )
-    req = urllib.request.Request(IGDB_GAMES_URL, data=query.encode("utf-8"))
-    req.add_header("Client-ID", client_id)
-    req.add_header("Authorization", f"Bearer {token}")
-    with urllib.request.urlopen(req, timeout=30) as response:
-        payload = json.loads(response.read().decode("utf-8"))
+
+
+def _headers(config: dict) -> dict[str, str]:
+    token = get_igdb_token(config)
+    return {"Client-ID": _get_client_id(config), "Authorization": f"Bearer {token}"}
+
+
+def fetch_igdb_games(term: str, config: dict, limit: int = 5) -> list[dict]:
+    headers = _headers(config)
+    payload = http_client.post_json(
+        IGDB_GAMES_URL, data=_games_query(term, limit), headers=headers
+    )
     if isinstance(payload, list):
         return payload
     return []
 
 
+def fetch_igdb_games_many(
+    searches: list[tuple[str, int]], config: dict
+) -> list[list[dict]]:
+    if len(searches) > MULTIQUERY_LIMIT:
+        raise IgdbError(f"IGDB multiquery accepts at most {MULTIQUERY_LIMIT} queries")
+    body = "\n".join(
+        f'query games "{idx}" {{ {_games_query(term, limit)} }};'
+        for idx, (term, limit) in enumerate(searches)
+    )
+    payload = http_client.post_json(
+        IGDB_MULTIQUERY_URL, data=body, headers=_headers(config)
+    )
+    if not isinstance(payload, list):
+        raise IgdbError("Unexpected IGDB multiquery response")
+    results: dict[str, list[dict]] = {}
+    for entry in payload:
+        if isinstance(entry, dict) and isinstance(entry.get("result"), list):
+            results[str(entry.get("name"))] = entry["result"]
+    return [results.get(str(idx), []) for idx in range(len(searches))]
+
+
+class SearchBatcher:
+    def __init__(
+        self,
+        config: dict,
+        size: int = MULTIQUERY_LIMIT,
+        linger: float = DEFAULT_BATCH_LINGER,
+    ) -> None:
+        self.config = config
+        self.size = max(1, min(size, MULTIQUERY_LIMIT))
+        self.linger = linger
+        self._lock = threading.Lock()
+        self._pending: list[tuple[str, int, Future]] = []
+        self._leader = False
+
+    def _take(self) -> list[tuple[str, int, Future]]:
+        batch, self._pending = self._pending[: self.size], self._pending[self.size :]
+        return batch
+
+    def _send(self, batch: list[tuple[str, int, Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                term, limit, _ = batch[0]
+                results = [fetch_igdb_games(term, self.config, limit=limit)]
+            else:
+                results = fetch_igdb_games_many(
+                    [(term, limit) for term, limit, _ in batch], self.config
+                )
+        except Exception as exc:
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def search(self, term: str, limit: int = 5) -> list[dict]:
+        future: Future = Future()
+        batch: list[tuple[str, int, Future]] = []
+        lead = False
+        with self._lock:
+            self._pending.append((term, limit, future))
+            if len(self._pending) >= self.size:
+                batch = self._take()
+            elif not self._leader:
+                self._leader = lead = True
+        if batch:
+            self._send(batch)
+        elif lead:
+            time.sleep(self.linger)
+            while True:
+                with self._lock:
+                    batch = self._take()
+                    if not batch:
+                        self._leader = False
+                        break
+                self._send(batch)
+        return future.result()
+
+
 def _release_date_from_timestamp(ts: int | None) -> str | None:
     if not ts:
         return None
@@ -192,19 +277,51 @@ def _candidate_fields(entry: dict) -> dict[str, Any]:
     return fields
 
 
+def _batch_size(config: dict) -> int:
+    return int(config.get("igdb", {}).get("batch_size", MULTIQUERY_LIMIT) or 1)
+
+
 class IgdbImportProvider:
     name = "igdb"
 
+    def __init__(self) -> None:
+        self._batcher: SearchBatcher | None = None
+        self._lock = threading.Lock()
+
     def tasks(self, _config: dict):
         return iter(())
 
+    def concurrency(self, config: dict) -> int:
+        # Searches beyond the import threads fill the multiquery batches.
+        return _batch_size(config)
+
+    def _fetch(self, term: str, config: dict, limit: int) -> list[dict]:
+        size = _batch_size(config)
+        if size <= 1:
+            return fetch_igdb_games(term, config, limit=limit)
+        with self._lock:
+            if self._batcher is None or self._batcher.config is not config:
+                linger = config.get("igdb", {}).get("batch_linger")
+                if not isinstance(linger, (int, float)) or linger < 0:
+                    linger = DEFAULT_BATCH_LINGER
+                self._batcher = SearchBatcher(config, size, float(linger))
+            batcher = self._batcher
+        return batcher.search(term, limit)
+
     def search(self, game, config: dict):
         limit = int(config.get("igdb", {}).get("search_limit", 5) or 5)
+        ratelimit.configure_from(config.get("igdb", {}).get("rate_limits"))
         term = getattr(game, "title", None)
         if not term:
             return []
         try:
-            results = fetch_igdb_games(str(term), config, limit=limit)
+            results = cached_search(
+                "igdb",
+                str(term),
+                lambda: self._fetch(str(term), config, limit),
+                config,
+                params={"limit": limit},
+            )
         except Exception as exc:
             raise IgdbError(str(exc)) from exc
         candidates: list[ImportCandidate] = []
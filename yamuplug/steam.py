@@ -1,17 +1,19 @@
 from __future__ import annotations
 
-import json
 import os
+import threading
 import time
-import urllib.parse
-import urllib.request
-import urllib.error
-from typing import Any, Dict, Iterable, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List
 
 from yamu.importer.pipeline import ImportCandidate, ImportTask
-from yamuplug import register_import_provider
+from yamu.util import http_client, ratelimit
+from yamu.util.cache import CACHE_NAME, MISSING, KeyValueCache, open_cache
+from yamuplug import cached_search, register_import_provider
 
 
+STEAM_API_HOST = "api.steampowered.com"
 STEAM_OWNED_GAMES_URL = "https://api.steampowered.com/IPlayerService/GetOwnedGames/v1/"
 STEAM_APPDETAILS_URL = "https://store.steampowered.com/api/appdetails"
 STEAM_PLAYER_ACHIEVEMENTS_URL = (
@@ -37,7 +39,9 @@ def get_api_key(config: dict | None = None) -> str:
     return _get_api_key(config)
 
 
-def fetch_owned_games(steam_id: str, api_key: str) -> List[dict]:
+def fetch_owned_games(
+    steam_id: str, api_key: str, cache: KeyValueCache | None = None
+) -> List[dict]:
     if not api_key:
         raise SteamError("STEAM_API_KEY is required to fetch Steam libraries")
 
@@ -47,9 +51,7 @@ def fetch_owned_games(steam_id: str, api_key: str) -> List[dict]:
         "include_appinfo": 1,
         "include_played_free_games": 1,
     }
-    url = f"{STEAM_OWNED_GAMES_URL}?{urllib.parse.urlencode(params)}"
-    with urllib.request.urlopen(url, timeout=30) as response:
-        payload = json.loads(response.read().decode("utf-8"))
+    payload = http_client.get_json(STEAM_OWNED_GAMES_URL, params=params, cache=cache)
 
     games = payload.get("response", {}).get("games", [])
     if not isinstance(games, list):
@@ -57,99 +59,75 @@ def fetch_owned_games(steam_id: str, api_key: str) -> List[dict]:
     return games
 
 
-def _cache_path(config: dict, key: str, default_name: str) -> str:
-    raw = str(config.get("steam", {}).get(key, "")).strip()
-    if raw:
-        return os.path.expanduser(raw)
-    base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
-    return os.path.join(base, "yamu", default_name)
+DETAILS_NAMESPACE = "steam:appdetails"
+SCHEMA_NAMESPACE = "steam:schema"
+ACHIEVEMENT_BATCH = 50
 
 
-def _cache_paths(config: dict) -> tuple[str, str]:
-    raw = str(config.get("steam", {}).get("cache_path", "")).strip()
-    if raw:
-        expanded = os.path.expanduser(raw)
-        if expanded.endswith(os.sep):
-            details = os.path.join(expanded, "steam_appdetails.json")
-            achievements = os.path.join(expanded, "steam_achievement_schema.json")
-            return details, achievements
-        root, ext = os.path.splitext(expanded)
-        if ext:
-            return f"{root}-details{ext}", f"{root}-achievements{ext}"
-        return f"{expanded}-details.json", f"{expanded}-achievements.json"
-    return (
-        _cache_path(config, "details_cache_path", "steam_appdetails.json"),
-        _cache_path(config, "achievements_cache_path", "steam_achievement_schema.json"),
-    )
+def open_steam_cache(config: dict) -> KeyValueCache | None:
+    if _rate_config(config)[2] <= 0:
+        return None
+    return _open_steam_db(config)
 
 
-def _rate_config(config: dict) -> tuple[float, int, float, int]:
-    delay = float(config.get("steam", {}).get("delay", 0) or 0)
-    retries = int(config.get("steam", {}).get("retries", 3) or 0)
-    backoff = float(config.get("steam", {}).get("backoff", 1.0) or 0)
-    ttl = int(config.get("steam", {}).get("cache_ttl", 0) or 0)
-    return delay, retries, backoff, ttl
+def _incremental(config: dict) -> bool:
+    return bool(config.get("steam", {}).get("incremental", True))
 
 
-def _load_cache(path: str) -> Dict[str, Dict[str, Any]]:
-    try:
-        with open(path, "r", encoding="utf-8") as handle:
-            payload = json.load(handle)
-        items = payload.get("items", {})
-        if isinstance(items, dict):
-            return items
-    except FileNotFoundError:
-        return {}
-    except Exception:
-        return {}
-    return {}
+def _open_steam_db(config: dict) -> KeyValueCache:
+    raw = str(config.get("steam", {}).get("cache_path", "")).strip()
+    if not raw:
+        return open_cache()
+    expanded = os.path.expanduser(raw)
+    if expanded.endswith(os.sep) or os.path.isdir(expanded):
+        return open_cache(os.path.join(expanded, CACHE_NAME))
+    return open_cache(expanded)
 
 
-def _save_cache(path: str, items: Dict[str, Dict[str, Any]]) -> None:
-    try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as handle:
-            json.dump({"items": items}, handle)
-    except OSError:
-        return
+def _cache_options(config: dict) -> tuple[int, bool]:
+    negative_ttl = int(config.get("steam", {}).get("cache_negative_ttl", 86400) or 0)
+    compress = bool(config.get("steam", {}).get("cache_compress", True))
+    return negative_ttl, compress
+
+
+def _rate_config(config: dict) -> tuple[int, float, int]:
+    ratelimit.configure_from(config.get("steam", {}).get("rate_limits"))
+    retries = int(config.get("steam", {}).get("retries", 3) or 0)
+    backoff = float(config.get("steam", {}).get("backoff", 1.0) or 0)
+    ttl = int(config.get("steam", {}).get("cache_ttl", 0) or 0)
+    return retries, backoff, ttl
 
 
 def fetch_app_details(
     appid: str,
     retries: int = 3,
     backoff: float = 1.0,
-    cache: Dict[str, Dict[str, Any]] | None = None,
+    cache: KeyValueCache | None = None,
     ttl: int = 0,
+    negative_ttl: int = 0,
+    compress: bool = True,
 ) -> dict:
-    now = int(time.time())
     if cache is not None and ttl > 0:
-        cached = cache.get(appid)
-        if cached and now - int(cached.get("ts", 0)) < ttl:
-            data = cached.get("data")
-            if isinstance(data, dict):
-                return data
+        cached = cache.get(DETAILS_NAMESPACE, str(appid), MISSING)
+        if isinstance(cached, dict):
+            return cached
     params = {"appids": appid, "l": "english"}
-    url = f"{STEAM_APPDETAILS_URL}?{urllib.parse.urlencode(params)}"
-    attempt = 0
-    while True:
-        try:
-            with urllib.request.urlopen(url, timeout=30) as response:
-                payload = json.loads(response.read().decode("utf-8"))
-            details = payload.get(str(appid), {})
-            if not details or not details.get("success"):
-                return {}
-            data = details.get("data", {}) or {}
-            if cache is not None and ttl > 0:
-                cache[appid] = {"ts": now, "data": data}
-            return data
-        except urllib.error.HTTPError as exc:
-            if exc.code == 429 and attempt < retries:
-                time.sleep(backoff * (2**attempt))
-                attempt += 1
-                continue
-            return {}
-        except Exception:
-            return {}
+    payload = http_client.get_json(
+        STEAM_APPDETAILS_URL,
+        params=params,
+        retries=retries,
+        backoff=backoff,
+        cache=cache,
+    )
+    details = payload.get(str(appid), {})
+    if not details or not details.get("success"):
+        if cache is not None:
+            cache.set(DETAILS_NAMESPACE, str(appid), {}, negative_ttl)
+        return {}
+    data = details.get("data", {}) or {}
+    if cache is not None:
+        cache.set(DETAILS_NAMESPACE, str(appid), data, ttl, compress)
+    return data
 
 
 def extract_genres(details: dict) -> str | None:
@@ -224,6 +202,7 @@ def fetch_player_achievements(
     appid: str,
     retries: int = 3,
     backoff: float = 1.0,
+    cache: KeyValueCache | None = None,
 ) -> list[dict]:
     params = {
         "key": api_key,
@@ -231,24 +210,20 @@ def fetch_player_achievements(
         "appid": appid,
         "l": "english",
     }
-    url = f"{STEAM_PLAYER_ACHIEVEMENTS_URL}?{urllib.parse.urlencode(params)}"
-    attempt = 0
-    while True:
-        try:
-            with urllib.request.urlopen(url, timeout=30) as response:
-                payload = json.loads(response.read().decode("utf-8"))
-            stats = payload.get("playerstats", {}) or {}
-            return stats.get("achievements", []) or []
-        except urllib.error.HTTPError as exc:
-            if exc.code in {400, 403, 404}:
-                return []
-            if exc.code == 429 and attempt < retries:
-                time.sleep(backoff * (2**attempt))
-                attempt += 1
-                continue
-            raise
-        except Exception:
+    try:
+        payload = http_client.get_json(
+            STEAM_PLAYER_ACHIEVEMENTS_URL,
+            params=params,
+            retries=retries,
+            backoff=backoff,
+            cache=cache,
+        )
+    except http_client.HttpError as exc:
+        if exc.code in {400, 403, 404}:
             return []
+        raise
+    stats = payload.get("playerstats", {}) or {}
+    return stats.get("achievements", []) or []
 
 
 def fetch_schema(
@@ -256,41 +231,41 @@ def fetch_schema(
     appid: str,
     retries: int = 3,
     backoff: float = 1.0,
-    cache: Dict[str, Dict[str, Any]] | None = None,
+    cache: KeyValueCache | None = None,
     ttl: int = 0,
+    negative_ttl: int = 0,
+    compress: bool = True,
 ) -> dict:
-    now = int(time.time())
     if cache is not None and ttl > 0:
-        cached = cache.get(appid)
-        if cached and now - int(cached.get("ts", 0)) < ttl:
-            data = cached.get("data")
-            if isinstance(data, dict):
-                return data
+        cached = cache.get(SCHEMA_NAMESPACE, str(appid), MISSING)
+        if isinstance(cached, dict):
+            return cached
     params = {
         "key": api_key,
         "appid": appid,
         "l": "english",
     }
-    url = f"{STEAM_SCHEMA_URL}?{urllib.parse.urlencode(params)}"
-    attempt = 0
-    while True:
-        try:
-            with urllib.request.urlopen(url, timeout=30) as response:
-                payload = json.loads(response.read().decode("utf-8"))
-            data = payload.get("game", {}) or {}
-            if cache is not None and ttl > 0:
-                cache[appid] = {"ts": now, "data": data}
-            return data
-        except urllib.error.HTTPError as exc:
-            if exc.code in {400, 403, 404}:
-                return {}
-            if exc.code == 429 and attempt < retries:
-                time.sleep(backoff * (2**attempt))
-                attempt += 1
-                continue
-            raise
-        except Exception:
+    try:
+        payload = http_client.get_json(
+            STEAM_SCHEMA_URL,
+            params=params,
+            retries=retries,
+            backoff=backoff,
+            cache=cache,
+        )
+    except http_client.HttpError as exc:
+        if exc.code in {400, 403, 404}:
+            if cache is not None:
+                cache.set(SCHEMA_NAMESPACE, str(appid), {}, negative_ttl)
             return {}
+        raise
+    data = payload.get("game", {}) or {}
+    if cache is not None:
+        if data:
+            cache.set(SCHEMA_NAMESPACE, str(appid), data, ttl, compress)
+        else:
+            cache.set(SCHEMA_NAMESPACE, str(appid), {}, negative_ttl)
+    return data
 
 
 def _schema_map(schema: dict) -> dict[str, dict]:
@@ -306,7 +281,7 @@ def _schema_map(schema: dict) -> dict[str, dict]:
     return mapping
 
 
-def fetch_store_search(term: str, limit: int = 5) -> list[dict]:
+def _store_search(term: str, limit: int = 5) -> list[dict]:
     params = {
         "term": term,
         "l": "english",
@@ -314,33 +289,49 @@ def fetch_store_search(term: str, limit: int = 5) -> list[dict]:
         "category1": "998",
         "count": max(1, limit),
     }
-    url = f"{STEAM_STORE_SEARCH_URL}?{urllib.parse.urlencode(params)}"
-    try:
-        with urllib.request.urlopen(url, timeout=30) as response:
-            payload = json.loads(response.read().decode("utf-8"))
-        items = payload.get("items", []) or []
-        if isinstance(items, list):
-            return items
-    except Exception:
-        return []
+    payload = http_client.get_json(STEAM_STORE_SEARCH_URL, params=params)
+    items = payload.get("items", []) or []
+    if isinstance(items, list):
+        return items
     return []
 
 
+def fetch_store_search(
+    term: str, limit: int = 5, config: dict | None = None
+) -> list[dict]:
+    return cached_search(
+        "steam",
+        term,
+        lambda: _store_search(term, limit),
+        config,
+        params={"limit": limit},
+    )
+
+
 def fetch_game_achievements(
     steam_id: str,
     api_key: str,
     appid: str,
     retries: int = 3,
     backoff: float = 1.0,
-    cache: Dict[str, Dict[str, Any]] | None = None,
+    cache: KeyValueCache | None = None,
     ttl: int = 0,
+    negative_ttl: int = 0,
+    compress: bool = True,
 ) -> list[dict]:
     schema = fetch_schema(
-        api_key, appid, retries=retries, backoff=backoff, cache=cache, ttl=ttl
+        api_key,
+        appid,
+        retries=retries,
+        backoff=backoff,
+        cache=cache,
+        ttl=ttl,
+        negative_ttl=negative_ttl,
+        compress=compress,
     )
     schema_map = _schema_map(schema)
     achievements = fetch_player_achievements(
-        steam_id, api_key, appid, retries=retries, backoff=backoff
+        steam_id, api_key, appid, retries=retries, backoff=backoff, cache=cache
     )
     normalized = []
     for entry in achievements:
@@ -370,23 +361,79 @@ def _steam_appid_from_path(path: str | None) -> str | None:
     return path.split("steam://", 1)[1]
 
 
+def sync_state(game: dict) -> dict[str, Any]:
+    return {
+        "playtime_forever": int(game.get("playtime_forever") or 0),
+        "rtime_last_played": int(game.get("rtime_last_played") or 0),
+        "has_community_visible_stats": bool(game.get("has_community_visible_stats")),
+    }
+
+
+def sync_token(steam_id: str, appid: str, owned: dict[str, Any]) -> str:
+    return (
+        f"{steam_id}:{appid}:{owned['playtime_forever']}:{owned['rtime_last_played']}"
+    )
+
+
+@dataclass
+class AchievementReport:
+    games: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rows: int = 0
+    errors: list[tuple[str, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+
 def import_achievements(
     library,
     steam_id: str,
     api_key: str,
     games: Iterable,
     config: dict,
-) -> list[int]:
-    delay, retries, backoff, ttl = _rate_config(config)
-    _, cache_path = _cache_paths(config)
-    cache = _load_cache(cache_path) if ttl > 0 else None
-
-    updated_ids: list[int] = []
+    workers: int = 1,
+    batch_size: int = ACHIEVEMENT_BATCH,
+) -> AchievementReport:
+    retries, backoff, ttl = _rate_config(config)
+    negative_ttl, compress = _cache_options(config)
+    cache = open_steam_cache(config)
+    owned: dict[str, dict[str, Any]] = {}
+    synced: dict[str, str] = {}
+    if _incremental(config):
+        for entry in fetch_owned_games(steam_id, api_key, cache=cache):
+            if entry.get("appid"):
+                owned[str(entry["appid"])] = sync_state(entry)
+        synced = library.achievement_sync_tokens()
+
+    report = AchievementReport()
+    started = time.monotonic()
+    jobs = []
+    no_stats = []
+    main = library.sources[0][0]
     for game in games:
         appid = _steam_appid_from_path(game.path)
-        if not appid:
+        # Ids of games from attached libraries would point at other main rows.
+        if not appid or getattr(game, "source", None) not in (None, main):
+            continue
+        report.games += 1
+        current = owned.get(appid)
+        token = sync_token(steam_id, appid, current) if current else None
+        if token is not None and synced.get(game.path) == token:
+            report.unchanged += 1
+            continue
+        if current is not None and not current["has_community_visible_stats"]:
+            no_stats.append((game.id, token))
+            report.unchanged += 1
             continue
-        normalized = fetch_game_achievements(
+        jobs.append((game, appid, token))
+    library.mark_achievements_synced(no_stats)
+
+    def fetch(appid: str) -> list[dict]:
+        return fetch_game_achievements(
             steam_id,
             api_key,
             appid,
@@ -394,19 +441,45 @@ def import_achievements(
             backoff=backoff,
             cache=cache,
             ttl=ttl,
+            negative_ttl=negative_ttl,
+            compress=compress,
         )
-        if normalized:
-            library.upsert_achievements(game.id, normalized)
-        updated_ids.append(game.id)
-        if delay:
-            time.sleep(delay)
 
-    if cache is not None:
-        _save_cache(cache_path, cache)
-    return updated_ids
+    pending: list[tuple[Any, str, str | None, list[dict]]] = []
 
+    def flush() -> None:
+        report.rows += library.upsert_achievements_many(
+            (game.id, achievements) for game, _, _, achievements in pending
+        )
+        library.mark_achievements_synced(
+            (game.id, token) for game, _, token, _ in pending if token is not None
+        )
+        report.updated += len(pending)
+        pending.clear()
 
-def _steam_ids(config: dict) -> list[str]:
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = {pool.submit(fetch, job[1]): job for job in jobs}
+        for future in as_completed(futures):
+            game, appid, token = futures[future]
+            try:
+                achievements = future.result()
+            except Exception as exc:
+                report.errors.append((game.title, str(exc)))
+                continue
+            pending.append((game, appid, token, achievements))
+            if len(pending) >= batch_size:
+                flush()
+    finally:
+        # Keep what was already fetched if the sync is interrupted.
+        pool.shutdown(wait=False, cancel_futures=True)
+        if pending:
+            flush()
+    report.elapsed = time.monotonic() - started
+    return report
+
+
+def get_steam_ids(config: dict) -> list[str]:
     raw = config.get("steam", {}).get("steam_ids", [])
     if isinstance(raw, str):
         return [raw]
@@ -418,15 +491,25 @@ def _steam_ids(config: dict) -> list[str]:
 class SteamImportProvider:
     name = "steam"
 
+    def __init__(self) -> None:
+        self._owned: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
     def tasks(self, config: dict):
+        ratelimit.configure_from(config.get("steam", {}).get("rate_limits"))
         api_key = _get_api_key(config)
-        for steam_id in _steam_ids(config):
-            games = fetch_owned_games(steam_id, api_key)
+        cache = open_steam_cache(config)
+        with self._lock:
+            self._owned = {}
+        for steam_id in get_steam_ids(config):
+            games = fetch_owned_games(steam_id, api_key, cache=cache)
             for game in games:
                 appid = game.get("appid")
                 name = game.get("name")
                 if not appid or not name:
                     continue
+                with self._lock:
+                    self._owned.setdefault(str(appid), sync_state(game))
                 path = f"steam://{appid}"
                 yield ImportTask(
                     original={
@@ -442,11 +525,11 @@ class SteamImportProvider:
             config.get("steam", {}).get("fetch_achievements", True)
         )
         api_key = _get_api_key(config)
-        steam_ids = _steam_ids(config)
-        delay, retries, backoff, ttl = _rate_config(config)
-        cache_path, ach_cache_path = _cache_paths(config)
-        cache = _load_cache(cache_path) if ttl > 0 else None
-        ach_cache = _load_cache(ach_cache_path) if ttl > 0 else None
+        steam_ids = get_steam_ids(config)
+        retries, backoff, ttl = _rate_config(config)
+        negative_ttl, compress = _cache_options(config)
+        cache = open_steam_cache(config)
+        incremental = _incremental(config)
         search_limit = int(config.get("steam", {}).get("search_limit", 5) or 5)
         steam_id = steam_ids[0] if steam_ids else ""
         appids: list[str] = []
@@ -454,7 +537,9 @@ class SteamImportProvider:
         if appid:
             appids.append(appid)
         elif getattr(game, "title", None):
-            results = fetch_store_search(str(game.title), limit=search_limit)
+            results = fetch_store_search(
+                str(game.title), limit=search_limit, config=config
+            )
             for result in results:
                 found = result.get("id")
                 if found:
@@ -462,6 +547,13 @@ class SteamImportProvider:
 
         candidates: list[ImportCandidate] = []
         for appid in appids:
+            with self._lock:
+                owned = self._owned.get(appid)
+            token = sync_token(steam_id, appid, owned) if owned and steam_id else None
+            stored = getattr(game, "achievements_synced", None)
+            if incremental and token is not None and token == stored:
+                # Not played since the last sync: nothing to refresh.
+                continue
             fields: dict[str, Any] = {}
             if fetch_details:
                 details = fetch_app_details(
@@ -470,30 +562,30 @@ class SteamImportProvider:
                     backoff=backoff,
                     cache=cache,
                     ttl=ttl,
+                    negative_ttl=negative_ttl,
+                    compress=compress,
                 )
                 fields["genre"] = extract_genres(details)
                 fields["release_date"] = extract_release_date(details)
-                if delay:
-                    time.sleep(delay)
             if fetch_achievements and api_key and steam_id:
-                fields["achievements"] = fetch_game_achievements(
-                    steam_id,
-                    api_key,
-                    str(appid),
-                    retries=retries,
-                    backoff=backoff,
-                    cache=ach_cache,
-                    ttl=ttl,
-                )
-                if delay:
-                    time.sleep(delay)
+                if owned is not None and not owned["has_community_visible_stats"]:
+                    fields["achievements"] = []
+                else:
+                    fields["achievements"] = fetch_game_achievements(
+                        steam_id,
+                        api_key,
+                        str(appid),
+                        retries=retries,
+                        backoff=backoff,
+                        cache=cache,
+                        ttl=ttl,
+                        negative_ttl=negative_ttl,
+                        compress=compress,
+                    )
+                if token is not None:
+                    fields["achievements_synced"] = token
             if fields:
                 candidates.append(ImportCandidate(fields=fields))
-
-        if cache is not None:
-            _save_cache(cache_path, cache)
-        if ach_cache is not None:
-            _save_cache(ach_cache_path, ach_cache)
         return candidates
 
 
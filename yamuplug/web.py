@@ -6,6 +6,7 @@ from pathlib import Path
 from urllib.parse import parse_qs, urlparse
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
+from yamu.dbcore.db import QueryInterrupted
 from yamu.library.library import Library
 from yamu.library.models import GAME_FIELDS
 from yamu.util.query import build_query
@@ -78,6 +79,7 @@ def _rep(game) -> dict:
         "status": game.status,
         "artpath": game.artpath,
         "release_date": release_date,
+        "source": game.source,
     }
 
 
@@ -92,6 +94,15 @@ def _load_ui_date_format() -> str:
 
 class WebHandler(BaseHTTPRequestHandler):
     def do_GET(self) -> None:
+        server = self.server
+        db = server.library.db
+        try:
+            with db.read(), db.budget(server.query_timeout, server.query_steps):
+                self._handle_get()
+        except QueryInterrupted as exc:
+            self._send_json(400, {"error": str(exc)})
+
+    def _handle_get(self) -> None:
         if self.path == "/" or self.path.startswith("/index"):
             body = _render_template("index.html", title="yamu")
             self._send(200, body, "text/html")
@@ -107,14 +118,16 @@ class WebHandler(BaseHTTPRequestHandler):
             return
 
         if self.path.startswith("/api/games/"):
+            parsed = urlparse(self.path)
+            source = parse_qs(parsed.query).get("source", [None])[0]
             try:
-                tail = self.path.split("/api/games/")[1]
-                game_id = int(tail.split("/")[0].split("?")[0])
+                tail = parsed.path.split("/api/games/")[1]
+                game_id = int(tail.split("/")[0])
             except ValueError:
                 self._send_json(404, {"error": "not found"})
                 return
-            if self.path.endswith("/art"):
-                game = self.server.library.get_game(game_id)
+            if parsed.path.endswith("/art"):
+                game = self.server.library.get_game(game_id, source)
                 if not game or not game.artpath:
                     self._send_json(404, {"error": "not found"})
                     return
@@ -124,22 +137,29 @@ class WebHandler(BaseHTTPRequestHandler):
                     return
                 self._send_file(200, art_path, _content_type_for_path(art_path))
                 return
-            if self.path.endswith("/achievements"):
-                achievements = self.server.library.list_achievements(game_id)
+            if parsed.path.endswith("/achievements"):
+                achievements = self.server.library.list_achievements(game_id, source)
                 self._send_json(200, {"achievements": achievements})
                 return
-            game = self.server.library.get_game(game_id)
+            game = self.server.library.get_game(game_id, source)
             if not game:
                 self._send_json(404, {"error": "not found"})
                 return
             self._send_json(200, _rep(game))
             return
 
+        if self.path == "/api/pending":
+            pending = self.server.library.list_pending_imports()
+            self._send_json(200, {"pending": pending})
+            return
+
         if self.path.startswith("/api/games"):
             parsed = urlparse(self.path)
             params = parse_qs(parsed.query)
             query = params.get("q", [""])[0]
             allowed_fields = set(GAME_FIELDS + ["id", "status", "artpath"])
+            if self.server.library.federated:
+                allowed_fields.add("source")
             parts = query.split() if query else []
             try:
                 q = build_query(parts, allowed_fields)
@@ -179,12 +199,26 @@ class WebHandler(BaseHTTPRequestHandler):
 
 
 class WebServer(HTTPServer):
-    def __init__(self, server_address: tuple[str, int], library: Library) -> None:
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        library: Library,
+        query_timeout: float = 0,
+        query_steps: int = 0,
+    ) -> None:
         super().__init__(server_address, WebHandler)
         self.library = library
-
-
-def run_server(library: Library, host: str, port: int) -> None:
-    server = WebServer((host, port), library)
+        self.query_timeout = query_timeout
+        self.query_steps = query_steps
+
+
+def run_server(
+    library: Library,
+    host: str,
+    port: int,
+    query_timeout: float = 0,
+    query_steps: int = 0,
+) -> None:
+    server = WebServer((host, port), library, query_timeout, query_steps)
     print(f"Serving Yamu library on http://{host}:{port}")
     server.serve_forever()